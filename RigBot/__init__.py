@@ -1,7 +1,13 @@
 import bpy
 
-from . import operators
-from . import ui
+from . import core
+from .core import instrumentation
+
+# Operator and panel modules only hold the Blender classes, their work is done by the lazily imported
+# core modules (see core/__init__.py). The imports and register() steps are timed for the Stats panel.
+with instrumentation.timed_imports(__name__):
+    from . import operators
+    from . import ui
 
 addon_keymaps = []
 
@@ -48,14 +54,18 @@ def unregister_keymaps():
 # --- End Keymap Handling ---
 
 def register():
-    operators.register()
-    ui.register()
-    register_keymaps()
+    steps = (("core", core.register), ("operators", operators.register), ("ui", ui.register),
+             ("keymaps", register_keymaps))
+    for name, register_step in steps:
+        with instrumentation.startup_step(f"register {name}"):
+            register_step()
+    instrumentation.startup_finished()
 
 def unregister():
     unregister_keymaps() # Unregister keymaps first
     operators.unregister()
     ui.unregister()
+    core.unregister()
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
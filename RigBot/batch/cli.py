@@ -0,0 +1,152 @@
+"""Headless batch rigging: runs a RigBot job spec over a directory of .blend files.
+
+Each file is processed by its own background Blender process (see worker.py), a pool of
+`--jobs` processes runs in parallel. Files whose content hash and job spec hash are unchanged
+since the last run are skipped.
+
+    python RigBot/batch/cli.py JOB.json ASSET_DIR --blender /path/to/blender --jobs 8
+
+This script only uses the standard library, it doesn't need to run inside Blender.
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+RESULT_PREFIX = "RIGBOT_RESULT "
+STATE_FILENAME = ".rigbot_batch_state.json"
+STATE_VERSION = 1
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for block in iter(lambda: stream.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def resolve_job(job_path):
+    """Loads the job spec, makes preset paths absolute and returns (job, job hash).
+
+    The hash covers the spec and the content of every preset file it references.
+    """
+    with open(job_path, "r", encoding="utf-8") as job_file:
+        job = json.load(job_file)
+    if not isinstance(job.get("steps"), list) or not job["steps"]:
+        raise ValueError("Job spec needs a non-empty 'steps' list")
+
+    digest = hashlib.sha256()
+    job_dir = os.path.dirname(os.path.abspath(job_path))
+    for step in job["steps"]:
+        if "preset" in step:
+            step["preset"] = os.path.normpath(os.path.join(job_dir, step["preset"]))
+            digest.update(file_hash(step["preset"]).encode())
+    digest.update(json.dumps(job, sort_keys=True).encode())
+    return job, digest.hexdigest()
+
+def find_blend_files(directory, recursive):
+    if not recursive:
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".blend"))
+    found = []
+    for root, _dirs, names in os.walk(directory):
+        found.extend(os.path.join(root, name) for name in names if name.endswith(".blend"))
+    return sorted(found)
+
+def load_state(state_path):
+    try:
+        with open(state_path, "r", encoding="utf-8") as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+    return state.get("files", {}) if state.get("version") == STATE_VERSION else {}
+
+def save_state(state_path, files):
+    # Write next to the target and rename, a crash never leaves a truncated state file
+    state_dir = os.path.dirname(os.path.abspath(state_path))
+    with tempfile.NamedTemporaryFile("w", dir=state_dir, delete=False, suffix=".tmp", encoding="utf-8") as state_file:
+        json.dump({"version": STATE_VERSION, "files": files}, state_file, indent=2, sort_keys=True)
+    os.replace(state_file.name, state_path)
+
+def run_worker(blender, blend_path, job_file_path, output_path, timeout):
+    """Runs one background Blender process, returns (ok, results or error text)."""
+    command = [blender, "-b", blend_path, "--factory-startup", "--python-exit-code", "2",
+               "--python", WORKER_SCRIPT, "--", job_file_path]
+    if output_path:
+        command.append(output_path)
+    try:
+        process = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return False, str(e)
+
+    for line in process.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX) and process.returncode == 0:
+            return True, json.loads(line[len(RESULT_PREFIX):])
+    return False, (process.stderr or process.stdout).strip()[-2000:]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("job", help="Job spec (JSON)")
+    parser.add_argument("directory", help="Directory containing .blend files")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--recursive", "-r", action="store_true", help="Also process subdirectories")
+    parser.add_argument("--output-dir", help="Write results here instead of saving the files in place")
+    parser.add_argument("--state", help=f"State file (default: DIRECTORY/{STATE_FILENAME})")
+    parser.add_argument("--force", action="store_true", help="Process every file, even if unchanged")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-file timeout in seconds")
+    args = parser.parse_args(argv)
+
+    job, job_hash = resolve_job(args.job)
+    state_path = args.state or os.path.join(args.directory, STATE_FILENAME)
+    state = {} if args.force else load_state(state_path)
+
+    blend_paths = find_blend_files(args.directory, args.recursive)
+    pending = []
+    for blend_path in blend_paths:
+        key = os.path.relpath(blend_path, args.directory)
+        if state.get(key) == {"file": file_hash(blend_path), "job": job_hash}:
+            continue
+        output_path = None
+        if args.output_dir:
+            output_path = os.path.join(os.path.abspath(args.output_dir), key)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        pending.append((key, blend_path, output_path))
+
+    print(f"{len(pending)} file(s) to process, {len(blend_paths) - len(pending)} unchanged.")
+    if not pending:
+        return 0
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        job_file_path = os.path.join(temp_dir, "job.json")
+        with open(job_file_path, "w", encoding="utf-8") as job_file:
+            json.dump(job, job_file)
+
+        # Threads only wait on the Blender processes, the work happens in the subprocesses
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            futures = {pool.submit(run_worker, args.blender, blend_path, job_file_path, output_path, args.timeout):
+                       (key, blend_path, output_path)
+                       for key, blend_path, output_path in pending}
+            for future in as_completed(futures):
+                key, blend_path, output_path = futures[future]
+                ok, result = future.result()
+                if ok:
+                    # Hash after the run when saving in place, so the next run sees the file as unchanged
+                    state[key] = {"file": file_hash(blend_path), "job": job_hash}
+                    print(f"[ok] {key}: {json.dumps(result)}")
+                else:
+                    state.pop(key, None)
+                    failures += 1
+                    print(f"[failed] {key}: {result}", file=sys.stderr)
+
+    save_state(state_path, state)
+    print(f"Done, {len(pending) - failures} succeeded, {failures} failed.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
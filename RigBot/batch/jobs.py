@@ -0,0 +1,171 @@
+import bpy
+
+from ..core import bake
+from ..core import ik_rig
+from ..core import name_match
+from ..core import parenting
+from ..core import pose_reset
+from ..core import presets
+from ..core import profiler
+from ..core import skeleton_gen
+from ..core import symmetry
+from ..core import topology
+
+# A job spec is a JSON document of the form
+#
+# {
+#     "steps": [
+#         {"op": "parent_by_name", "armature": "Rig", "rules": {"strip_prefixes": ["MESH_"]}, "keep_transform": false},
+#         {"op": "constraint_preset", "preset": "/abs/path/preset.json", "armatures": ["Rig"], "replace": true},
+#         {"op": "reset_pose", "armatures": ["Rig"], "channels": ["LOCATION", "ROTATION", "SCALE"]},
+#         {"op": "generate_skeleton", "template": "humanoid", "name": "Rig", "scale": 1.0},
+#         {"op": "auto_ik", "armatures": ["Rig"], "min_length": 2, "skip_tip_bones": 1, "max_chain_count": 2},
+#         {"op": "symmetrize", "armatures": ["Rig"], "axis": "X", "positive": true, "constraints": true},
+#         {"op": "profile_constraints", "armatures": ["Rig"], "frames": 5, "repeats": 3, "top": 20},
+#         {"op": "bake", "armatures": ["Rig"], "frame_start": 1, "frame_end": 250, "clean": true, "remove_constraints": true}
+#     ],
+#     "save": true
+# }
+#
+# "armature"/"armatures" are optional, by default every armature in the scene is used.
+# generate_skeleton takes a template name or path, or "CHAIN"/"TENTACLE" with the parameters of
+# skeleton_gen.make_layout(). With "armature" the bones are added to that existing armature.
+
+
+def _scene_armatures(names=None):
+    scene_objects = bpy.context.scene.objects
+    if names:
+        missing = [name for name in names if name not in scene_objects]
+        if missing:
+            raise ValueError(f"Armature(s) not found: {', '.join(missing)}")
+        return [scene_objects[name] for name in names]
+    return [obj for obj in scene_objects if obj.type == 'ARMATURE']
+
+def run_parent_by_name(step):
+    armature_names = [step["armature"]] if step.get("armature") else None
+    rules = name_match.NameMatchRules(**{key: tuple(value) if isinstance(value, list) else value
+                                         for key, value in step.get("rules", {}).items()})
+    # Make sure pose matrices are evaluated before computing parent inverses
+    bpy.context.view_layer.update()
+
+    parented_count = skipped_count = 0
+    for armature_obj in _scene_armatures(armature_names):
+        name_index = name_match.get_bone_name_index(armature_obj.data, rules)
+        assignments = []
+        for obj in bpy.context.scene.objects:
+            if obj.type == 'ARMATURE':
+                continue
+            bone_name = name_index.match(obj.name)
+            if bone_name is not None:
+                assignments.append((obj, bone_name))
+        parented, skipped = parenting.parent_objects_to_bones(
+                armature_obj, assignments, keep_transform=step.get("keep_transform", False))
+        parented_count += parented
+        skipped_count += skipped
+    return {"parented": parented_count, "skipped": skipped_count}
+
+def run_constraint_preset(step):
+    preset = presets.load_preset(step["preset"])
+    added_count, errors = presets.apply_preset(preset, _scene_armatures(step.get("armatures")),
+                                               replace=step.get("replace", True))
+    return {"added": added_count, "errors": errors}
+
+def run_reset_pose(step):
+    channels = tuple(step.get("channels", ('LOCATION', 'ROTATION', 'SCALE')))
+    reset_count = 0
+    for armature_obj in _scene_armatures(step.get("armatures")):
+        reset_count += pose_reset.reset_pose_bones(armature_obj, step.get("bones"), channels=channels)
+    return {"reset": reset_count}
+
+def run_generate_skeleton(step):
+    parameters = {key: step[key] for key in ("segments", "branches", "depth", "length", "spread", "taper") if key in step}
+    bone_layout = skeleton_gen.transform_layout(skeleton_gen.make_layout(step["template"], **parameters),
+                                                scale=step.get("scale", 1.0), offset=step.get("location", (0.0, 0.0, 0.0)))
+    if step.get("armature"):
+        armature_obj = _scene_armatures([step["armature"]])[0]
+    else:
+        armature_obj = skeleton_gen.new_armature_object(step.get("name", "Skeleton"), bpy.context.scene.collection)
+    bone_names = skeleton_gen.build_skeleton(armature_obj, bone_layout, bpy.context.view_layer)
+    return {"armature": armature_obj.name, "bones": len(bone_names)}
+
+def run_auto_ik(step):
+    rig_count = 0
+    for armature_obj in _scene_armatures(step.get("armatures")):
+        topology_data = topology.get_topology(armature_obj.data)
+        chains = topology.limb_chains(topology_data, step.get("min_length", 2))
+        plans = ik_rig.plan_ik_chains(topology_data, chains, step.get("skip_tip_bones", 0), step.get("max_chain_count", 0))
+        if plans:
+            rig_count += len(ik_rig.add_ik_rigs(armature_obj, topology_data, plans, use_pole=step.get("use_pole", True),
+                                                view_layer=bpy.context.view_layer))
+    return {"ik_chains": rig_count}
+
+def run_symmetrize(step):
+    mirrored_count = added_count = 0
+    errors = []
+    for armature_obj in _scene_armatures(step.get("armatures")):
+        topology_data = topology.get_topology(armature_obj.data)
+        pairs = symmetry.mirror_pair_index(topology_data.names)
+        sources = symmetry.source_bones(topology_data, pairs, step.get("axis", 'X'), step.get("positive", True))
+        if not sources:
+            continue
+        source_names = [topology_data.names[i] for i in sources]
+        target_names = symmetry.symmetrize_bones(armature_obj, source_names, pairs, step.get("axis", 'X'),
+                                                 bpy.context.view_layer)
+        mirrored_count += len(target_names)
+        if step.get("constraints", True):
+            added, step_errors = symmetry.symmetrize_constraints(armature_obj, source_names, target_names, pairs)
+            added_count += added
+            errors.extend(step_errors)
+    return {"mirrored": mirrored_count, "constraints": added_count, "errors": errors}
+
+def run_profile_constraints(step):
+    scene = bpy.context.scene
+    frames = profiler.sample_frames(scene, step.get("frames", 5))
+    results = {}
+    for armature_obj in _scene_armatures(step.get("armatures")):
+        profile = profiler.profile_constraints(scene, armature_obj, frames, step.get("repeats", 3))
+        results[armature_obj.name] = {
+            "frame_ms": profile.frame_ms,
+            "hottest": [{"bone": bone_name, "constraint": constraint_name, "ms": cost}
+                        for (bone_name, constraint_name), cost in profiler.hottest(profile, step.get("top", 20))],
+        }
+    return {"profiles": results}
+
+def run_bake(step):
+    scene = bpy.context.scene
+    bone_count = key_count = 0
+    for armature_obj in _scene_armatures(step.get("armatures")):
+        animation_data = armature_obj.animation_data or armature_obj.animation_data_create()
+        if animation_data.action is None:
+            animation_data.action = bpy.data.actions.new(f"{armature_obj.name}Action")
+        result = bake.bake_pose(scene, armature_obj, animation_data.action, step.get("bones"),
+                                step.get("frame_start"), step.get("frame_end"), tolerance=step.get("tolerance", 1e-5),
+                                clean=step.get("clean", True), remove_constraints=step.get("remove_constraints", False))
+        bone_count += result["bones"]
+        key_count += result["keys"]
+    return {"bones": bone_count, "keys": key_count}
+
+STEP_RUNNERS = {
+    "parent_by_name": run_parent_by_name,
+    "constraint_preset": run_constraint_preset,
+    "reset_pose": run_reset_pose,
+    "generate_skeleton": run_generate_skeleton,
+    "auto_ik": run_auto_ik,
+    "symmetrize": run_symmetrize,
+    "profile_constraints": run_profile_constraints,
+    "bake": run_bake,
+}
+
+def validate_job(job):
+    """Raises ValueError if the job spec contains unknown steps."""
+    steps = job.get("steps")
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("Job spec needs a non-empty 'steps' list")
+    for step in steps:
+        if step.get("op") not in STEP_RUNNERS:
+            raise ValueError(f"Unknown job step '{step.get('op')}'")
+
+def run_job(job):
+    """Runs every step of the job on the open file, returns a list of per-step results."""
+    validate_job(job)
+    return [{"op": step["op"], **STEP_RUNNERS[step["op"]](step)} for step in job["steps"]]
@@ -0,0 +1,40 @@
+"""Runs a RigBot job spec on the .blend file Blender was started with. Started by cli.py as:
+
+    blender -b FILE.blend --factory-startup --python-exit-code 2 --python worker.py -- JOB.json [OUTPUT.blend]
+"""
+import importlib
+import json
+import os
+import sys
+
+import bpy
+
+# Import the add-on package by its directory name, it may be installed as "RigBot" or "rigbot"
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_DIR))
+jobs = importlib.import_module(f"{os.path.basename(ADDON_DIR)}.batch.jobs")
+
+RESULT_PREFIX = "RIGBOT_RESULT "
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:]
+    job_path = argv[0]
+    output_path = argv[1] if len(argv) > 1 else None
+
+    with open(job_path, "r", encoding="utf-8") as job_file:
+        job = json.load(job_file)
+
+    results = jobs.run_job(job)
+
+    if job.get("save", True):
+        bpy.context.preferences.filepaths.save_version = 0 # No .blend1 backups next to the assets
+        if output_path:
+            bpy.ops.wm.save_as_mainfile(filepath=output_path, copy=True)
+        else:
+            bpy.ops.wm.save_mainfile()
+
+    # A single machine-readable line for cli.py
+    print(RESULT_PREFIX + json.dumps(results))
+
+main()
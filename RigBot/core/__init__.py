@@ -0,0 +1,59 @@
+import importlib.machinery
+import importlib.util
+import sys
+
+from . import instrumentation
+
+# Only the modules needed to register RigBot are imported when the add-on is enabled. The implementation
+# modules (most of them pull in NumPy) are lazy: their module objects exist from the start, so
+# `from ..core import weights` works everywhere, but a module's code runs on its first attribute access,
+# i.e. on the first execute() or draw() that uses it.
+with instrumentation.timed_imports(__name__):
+    from . import cache
+    from . import jobs
+    from . import profiler
+    from . import properties
+
+LAZY_MODULES = (
+    "bake",
+    "constraints",
+    "envelope",
+    "ik_rig",
+    "name_match",
+    "parenting",
+    "pose_reset",
+    "pose_snapshots",
+    "presets",
+    "rename",
+    "selection",
+    "skeleton_gen",
+    "skeletonize",
+    "skin_io",
+    "symmetry",
+    "topology",
+    "weights",
+)
+
+def _lazy_import(name):
+    full_name = f"{__name__}.{name}"
+    module = sys.modules.get(full_name)
+    if module is None:
+        spec = importlib.machinery.PathFinder.find_spec(full_name, __path__)
+        spec.loader = importlib.util.LazyLoader(instrumentation.TimedLoader(spec.loader))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[full_name] = module
+        spec.loader.exec_module(module) # Deferred until first attribute access
+    globals()[name] = module
+
+for _name in LAZY_MODULES:
+    _lazy_import(_name)
+
+def register():
+    cache.register()
+    properties.register()
+    profiler.register()
+
+def unregister():
+    profiler.unregister()
+    properties.unregister()
+    cache.unregister()
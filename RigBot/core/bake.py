@@ -0,0 +1,275 @@
+import numpy as np
+
+from . import instrumentation
+from . import topology
+
+# Constraint baking: every frame is evaluated once with frame_set() and all pose bone matrices are read
+# with one foreach_get. The conversion to local loc/rot/scale channels runs in NumPy over the whole
+# frame range, F-curves are written with keyframe_points.foreach_set.
+# Baked keys use linear interpolation, so dropping the inner keys of flat runs doesn't change the curves.
+_INTERPOLATION_LINEAR = 1 # Enum value of 'LINEAR' in Keyframe.interpolation
+# Blender's rotation orders as (i, j, k axis indices, parity), see mat3_normalized_to_eulO()
+_EULER_ORDERS = {
+    'XYZ': ((0, 1, 2), False),
+    'XZY': ((0, 2, 1), True),
+    'YXZ': ((1, 0, 2), True),
+    'YZX': ((1, 2, 0), False),
+    'ZXY': ((2, 0, 1), False),
+    'ZYX': ((2, 1, 0), True),
+}
+
+
+def _read_matrices(collection, property_name, count):
+    values = np.empty(count * 16, dtype=np.float32)
+    collection.foreach_get(property_name, values)
+    # foreach_get flattens matrices column by column, transpose to row-major
+    return values.reshape(count, 4, 4).transpose(0, 2, 1)
+
+def _plain_inheritance(armature_data):
+    """True per bone when its local channels follow from the parent's pose matrix alone
+    (full rotation and scale inheritance, local location)."""
+    return np.array([bone.use_inherit_rotation and bone.inherit_scale == 'FULL' and bone.use_local_location
+                     for bone in armature_data.bones], dtype=bool)
+
+def sample_pose_matrices(scene, armature_obj, frames, special=()):
+    """Evaluates every frame once and returns the armature-space pose matrices (F x N x 4 x 4).
+
+    Bones are in armature.bones order. For the bone indices in special, the local (basis) matrices are
+    computed with convert_space() during sampling and returned as {index: (F x 4 x 4)}.
+    """
+    pose_bones = armature_obj.pose.bones
+    count = len(pose_bones)
+    # Pose bones aren't guaranteed to be stored in bone order
+    bone_topology = topology.get_topology(armature_obj.data)
+    order = np.argsort([bone_topology.index_of[name] for name in pose_bones.keys()])
+    matrices = np.empty((len(frames), count, 4, 4), dtype=np.float32)
+    special_bones = [(i, pose_bones[bone_topology.names[i]]) for i in special]
+    special_local = {i: np.empty((len(frames), 4, 4)) for i in special}
+
+    for frame_index, frame in enumerate(frames):
+        scene.frame_set(frame)
+        matrices[frame_index] = _read_matrices(pose_bones, "matrix", count)[order]
+        for i, pose_bone in special_bones:
+            special_local[i][frame_index] = np.array(armature_obj.convert_space(
+                    pose_bone=pose_bone, matrix=pose_bone.matrix, from_space='POSE', to_space='LOCAL'))
+    instrumentation.count(frames=len(frames))
+    return matrices.astype(np.float64), special_local
+
+def local_matrices(pose_matrices, rest_matrices, parents):
+    """Basis matrices (what loc/rot/scale describe) of posed bones with plain inheritance.
+
+    pose = parent pose @ inverse(parent rest) @ rest @ basis, for root bones pose = rest @ basis.
+    pose_matrices is (F x N x 4 x 4), rest_matrices (N x 4 x 4) armature-space bone rest matrices.
+    """
+    has_parent = parents >= 0
+    rest_relative = rest_matrices.copy()
+    rest_relative[has_parent] = np.linalg.inv(rest_matrices[parents[has_parent]]) @ rest_matrices[has_parent]
+    parent_pose = np.broadcast_to(np.eye(4), pose_matrices.shape).copy()
+    parent_pose[:, has_parent] = pose_matrices[:, parents[has_parent]]
+    return np.linalg.solve(parent_pose @ rest_relative, pose_matrices)
+
+def decompose(matrices):
+    """Splits (... x 4 x 4) matrices into locations, rotation matrices and scales."""
+    locations = matrices[..., :3, 3]
+    scales = np.linalg.norm(matrices[..., :3, :3], axis=-2)
+    rotations = matrices[..., :3, :3] / np.maximum(scales, 1e-12)[..., None, :]
+    return locations, rotations, scales
+
+def matrix_to_quaternion(rotations):
+    """Unit quaternions (w, x, y, z) of (... x 3 x 3) rotation matrices."""
+    m = rotations
+    trace = m[..., 0, 0] + m[..., 1, 1] + m[..., 2, 2]
+    # One candidate per largest component, the best conditioned one is picked per matrix
+    candidates = np.stack((
+        np.stack((1.0 + trace, m[..., 2, 1] - m[..., 1, 2],
+                  m[..., 0, 2] - m[..., 2, 0], m[..., 1, 0] - m[..., 0, 1]), -1),
+        np.stack((m[..., 2, 1] - m[..., 1, 2], 1.0 + m[..., 0, 0] - m[..., 1, 1] - m[..., 2, 2],
+                  m[..., 0, 1] + m[..., 1, 0], m[..., 0, 2] + m[..., 2, 0]), -1),
+        np.stack((m[..., 0, 2] - m[..., 2, 0], m[..., 0, 1] + m[..., 1, 0],
+                  1.0 - m[..., 0, 0] + m[..., 1, 1] - m[..., 2, 2], m[..., 1, 2] + m[..., 2, 1]), -1),
+        np.stack((m[..., 1, 0] - m[..., 0, 1], m[..., 0, 2] + m[..., 2, 0],
+                  m[..., 1, 2] + m[..., 2, 1], 1.0 - m[..., 0, 0] - m[..., 1, 1] + m[..., 2, 2]), -1),
+    ), -2)
+    diagonal = np.stack((trace, m[..., 0, 0], m[..., 1, 1], m[..., 2, 2]), -1)
+    best = np.take_along_axis(candidates, np.argmax(diagonal, axis=-1)[..., None, None], -2)[..., 0, :]
+    quaternions = best / np.linalg.norm(best, axis=-1, keepdims=True)
+    return quaternions * np.where(quaternions[..., :1] < 0.0, -1.0, 1.0)
+
+def continuous_quaternions(quaternions):
+    """Flips the sign of (F x ... x 4) quaternions so consecutive frames take the short way."""
+    signs = np.ones(quaternions.shape[:-1])
+    signs[1:] = np.where((quaternions[1:] * quaternions[:-1]).sum(axis=-1) < 0.0, -1.0, 1.0)
+    return quaternions * np.cumprod(signs, axis=0)[..., None]
+
+def _euler_solutions(rotations, order):
+    """Both euler angle solutions of (... x 3 x 3) rotation matrices in a Blender rotation order."""
+    (i, j, k), parity = _EULER_ORDERS[order]
+    m = rotations
+    cy = np.hypot(m[..., i, i], m[..., j, i])
+    regular = cy > 16.0 * np.finfo(np.float32).eps
+    first = np.empty(m.shape[:-1])
+    second = np.empty(m.shape[:-1])
+    first[..., i] = np.where(regular, np.arctan2(m[..., k, j], m[..., k, k]), np.arctan2(-m[..., j, k], m[..., j, j]))
+    first[..., j] = np.arctan2(-m[..., k, i], cy)
+    first[..., k] = np.where(regular, np.arctan2(m[..., j, i], m[..., i, i]), 0.0)
+    second[..., i] = np.where(regular, np.arctan2(-m[..., k, j], -m[..., k, k]), first[..., i])
+    second[..., j] = np.where(regular, np.arctan2(-m[..., k, i], -cy), first[..., j])
+    second[..., k] = np.where(regular, np.arctan2(-m[..., j, i], -m[..., i, i]), first[..., k])
+    return (-first, -second) if parity else (first, second)
+
+def matrix_to_euler(rotations, order='XYZ'):
+    """Euler angles of (... x 3 x 3) rotation matrices in a Blender rotation order.
+
+    Of the two solutions the one with the smaller angle sum is used, like Blender does.
+    """
+    first, second = _euler_solutions(rotations, order)
+    pick_first = np.abs(first).sum(axis=-1) <= np.abs(second).sum(axis=-1)
+    return np.where(pick_first[..., None], first, second)
+
+def _compatible_euler(eulers, previous):
+    # Vectorized compatible_eul() of Blender: whole turns towards previous, then axes more than half a
+    # turn away while the other two are close go the other way around
+    delta = eulers - previous
+    turns = np.where(np.abs(delta) > 5.1, np.sign(delta) * np.floor(np.abs(delta) / (2.0 * np.pi) + 0.5), 0.0)
+    eulers = eulers - turns * 2.0 * np.pi
+    delta = eulers - previous
+    large = np.abs(delta) > 3.2
+    small = np.abs(delta) < 1.6
+    for axis in range(3):
+        flip = large[..., axis] & small[..., (axis + 1) % 3] & small[..., (axis + 2) % 3]
+        eulers[..., axis] -= np.where(flip, np.sign(delta[..., axis]) * 2.0 * np.pi, 0.0)
+    return eulers
+
+def continuous_eulers(rotations, order='XYZ'):
+    """Euler angles of (F x ... x 3 x 3) rotation matrices, every frame compatible with the one before.
+
+    Like to_euler(order, compat) in bpy.ops.nla.bake, the solution closest to the previous frame is
+    used, so curves neither jump by full turns nor flip between the two equivalent solutions.
+    """
+    first, second = _euler_solutions(rotations, order)
+    eulers = matrix_to_euler(rotations, order)
+    for frame in range(1, len(eulers)):
+        previous = eulers[frame - 1]
+        first_compatible = _compatible_euler(first[frame], previous)
+        second_compatible = _compatible_euler(second[frame], previous)
+        pick_first = (np.abs(first_compatible - previous).sum(axis=-1) <=
+                      np.abs(second_compatible - previous).sum(axis=-1))
+        eulers[frame] = np.where(pick_first[..., None], first_compatible, second_compatible)
+    return eulers
+
+def quaternion_to_axis_angle(quaternions):
+    """(angle, x, y, z) of (... x 4) unit quaternions, the axis is Y for zero rotations."""
+    half_sines = np.linalg.norm(quaternions[..., 1:], axis=-1)
+    angles = 2.0 * np.arctan2(half_sines, quaternions[..., 0])
+    axes = np.where(half_sines[..., None] > 1e-9, quaternions[..., 1:] / np.maximum(half_sines, 1e-9)[..., None],
+                    np.array([0.0, 1.0, 0.0]))
+    return np.concatenate((angles[..., None], axes), axis=-1)
+
+def redundant_key_mask(values, tolerance):
+    """True for the keys of a channel (F values) worth keeping: the ends of every flat run.
+
+    The first and last keys are always kept, keys after the baked range must not change its values.
+    """
+    keep = np.ones(len(values), dtype=bool)
+    steps = np.abs(np.diff(values)) > tolerance
+    keep[1:-1] = steps[:-1] | steps[1:]
+    return keep
+
+def write_fcurve(fcurves, data_path, index, group, frames, values, frame_range):
+    """Replaces the keys of one F-curve within frame_range (first, last) with linear keys at frames."""
+    fcurve = fcurves.find(data_path, index=index)
+    kept_points = np.empty((0, 2), dtype=np.float32)
+    kept_interpolation = np.empty(0, dtype=np.int32)
+    if fcurve is None:
+        fcurve = fcurves.new(data_path, index=index, action_group=group)
+    elif len(fcurve.keyframe_points):
+        points = fcurve.keyframe_points
+        coordinates = np.empty(len(points) * 2, dtype=np.float32)
+        interpolation = np.empty(len(points), dtype=np.int32)
+        points.foreach_get("co", coordinates)
+        points.foreach_get("interpolation", interpolation)
+        coordinates = coordinates.reshape(-1, 2)
+        outside = (coordinates[:, 0] < frame_range[0]) | (coordinates[:, 0] > frame_range[1])
+        kept_points, kept_interpolation = coordinates[outside], interpolation[outside]
+        points.clear()
+
+    coordinates = np.concatenate((kept_points, np.stack((frames, values), axis=1).astype(np.float32)))
+    interpolation = np.concatenate((kept_interpolation, np.full(len(frames), _INTERPOLATION_LINEAR, dtype=np.int32)))
+    order = np.argsort(coordinates[:, 0], kind="stable")
+    points = fcurve.keyframe_points
+    points.add(len(coordinates))
+    points.foreach_set("co", coordinates[order].ravel())
+    points.foreach_set("interpolation", interpolation[order])
+    fcurve.update()
+    return len(frames)
+
+def _channels(rotation_mode, locations, rotations, scales):
+    """(data path, F x size values) of one bone for its rotation mode."""
+    if rotation_mode == 'QUATERNION':
+        rotation = ("rotation_quaternion", continuous_quaternions(matrix_to_quaternion(rotations)))
+    elif rotation_mode == 'AXIS_ANGLE':
+        quaternions = continuous_quaternions(matrix_to_quaternion(rotations))
+        rotation = ("rotation_axis_angle", quaternion_to_axis_angle(quaternions))
+    else:
+        rotation = ("rotation_euler", continuous_eulers(rotations, rotation_mode))
+    return (("location", locations), rotation, ("scale", scales))
+
+def bake_pose(scene, armature_obj, action, bone_names=None, frame_start=None, frame_end=None,
+              tolerance=1e-5, clean=True, remove_constraints=False):
+    """Bakes the evaluated pose (constraints, drivers, ...) of the armature into keys on action.
+
+    bone_names=None bakes every bone. With clean, only the ends of flat key runs are kept. With
+    remove_constraints, the constraints of the baked bones are removed afterwards.
+    The current frame is restored. Returns a dict with the number of bones, frames and keys written.
+    """
+    armature_data = armature_obj.data
+    bone_topology = topology.get_topology(armature_data)
+    count = len(bone_topology)
+    frame_start = scene.frame_start if frame_start is None else frame_start
+    frame_end = scene.frame_end if frame_end is None else frame_end
+    frames = np.arange(frame_start, frame_end + 1)
+    if bone_names is None:
+        baked = np.arange(count)
+    else:
+        baked = np.array(sorted(bone_topology.index(name) for name in bone_names if bone_topology.index(name) >= 0),
+                         dtype=np.int64)
+    if not len(baked) or not len(frames):
+        return {"bones": 0, "frames": 0, "keys": 0}
+
+    # Bones with partial inheritance take the slow convert_space() path
+    plain = _plain_inheritance(armature_data)
+    special = [int(i) for i in baked if not plain[i]]
+    current_frame, current_subframe = scene.frame_current, scene.frame_subframe
+    try:
+        pose_matrices, special_local = sample_pose_matrices(scene, armature_obj, frames.tolist(), special)
+    finally:
+        scene.frame_set(current_frame, subframe=current_subframe)
+
+    rest_matrices = _read_matrices(armature_data.bones, "matrix_local", count).astype(np.float64)
+    # Parents outside the baked set still drive their children, so the conversion covers every bone
+    local = local_matrices(pose_matrices, rest_matrices, bone_topology.parents)[:, baked]
+    for position, bone_index in enumerate(baked.tolist()):
+        if bone_index in special_local:
+            local[:, position] = special_local[bone_index]
+    locations, rotations, scales = decompose(local)
+
+    pose_bones = armature_obj.pose.bones
+    fcurves = action.fcurves
+    key_count = 0
+    for position, bone_index in enumerate(baked.tolist()):
+        name = bone_topology.names[bone_index]
+        pose_bone = pose_bones[name]
+        for property_name, values in _channels(pose_bone.rotation_mode, locations[:, position],
+                                               rotations[:, position], scales[:, position]):
+            data_path = pose_bone.path_from_id(property_name)
+            for component in range(values.shape[1]):
+                channel = values[:, component]
+                keep = redundant_key_mask(channel, tolerance) if clean else np.ones(len(frames), dtype=bool)
+                key_count += write_fcurve(fcurves, data_path, component, name, frames[keep], channel[keep],
+                                          (frame_start, frame_end))
+        if remove_constraints:
+            for constraint in list(pose_bone.constraints):
+                pose_bone.constraints.remove(constraint)
+
+    instrumentation.count(bones=len(baked), keyframes=key_count)
+    return {"bones": len(baked), "frames": len(frames), "keys": key_count}
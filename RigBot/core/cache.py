@@ -0,0 +1,72 @@
+import bpy
+from bpy.app.handlers import persistent
+
+# Per-armature caches for data derived from the bone collection (name indices, topology, ...).
+# Entries are keyed on the armature data pointer and dropped when bones are renamed, when an
+# armature leaves Edit Mode (bones added/removed) and on undo/redo or file load.
+_entries = {} # armature pointer -> {key: (bone_count, value)}
+_msgbus_owner = object()
+
+# RNA properties whose change invalidates every cached entry
+_invalidating_properties = (
+    (bpy.types.Bone, "name"),
+    (bpy.types.EditBone, "name"),
+    (bpy.types.Object, "mode"),
+)
+
+
+def get(armature_data, key, builder):
+    """Returns the cached value for key on the armature data, calling builder(armature_data) on a miss."""
+    pointer = armature_data.as_pointer()
+    entries = _entries.setdefault(pointer, {})
+    bone_count = len(armature_data.bones)
+
+    entry = entries.get(key)
+    # The bone count guards against edits that did not notify the message bus
+    if entry is not None and entry[0] == bone_count:
+        return entry[1]
+
+    value = builder(armature_data)
+    entries[key] = (bone_count, value)
+    return value
+
+def invalidate(armature_data=None):
+    """Drops cached entries for one armature, or for all armatures when none is given."""
+    if armature_data is None:
+        _entries.clear()
+    else:
+        _entries.pop(armature_data.as_pointer(), None)
+
+def _on_property_changed(*_args):
+    # The message bus doesn't tell which armature changed, so drop everything
+    invalidate()
+
+def _subscribe():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    for key in _invalidating_properties:
+        bpy.msgbus.subscribe_rna(key=key, owner=_msgbus_owner, args=(), notify=_on_property_changed)
+
+@persistent
+def _on_load_post(*_args):
+    # Loading a file clears message bus subscriptions and reuses data pointers
+    invalidate()
+    _subscribe()
+
+@persistent
+def _on_undo_redo(*_args):
+    invalidate()
+
+def register():
+    _subscribe()
+    bpy.app.handlers.load_post.append(_on_load_post)
+    bpy.app.handlers.undo_post.append(_on_undo_redo)
+    bpy.app.handlers.redo_post.append(_on_undo_redo)
+
+def unregister():
+    for handlers, handler in ((bpy.app.handlers.redo_post, _on_undo_redo),
+                              (bpy.app.handlers.undo_post, _on_undo_redo),
+                              (bpy.app.handlers.load_post, _on_load_post)):
+        if handler in handlers:
+            handlers.remove(handler)
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    invalidate()
@@ -0,0 +1,59 @@
+from . import instrumentation
+
+# Default settings applied to new constraints, matching the single-bone RigBot operators
+DEFAULT_SETTINGS = {
+    'DAMPED_TRACK': {},
+    'STRETCH_TO': {},
+    'IK': {"chain_count": 0, "use_tail": True},
+}
+
+
+def resolve_subtarget(pose_bone, rule, active_name=""):
+    """Returns the subtarget bone name for a pose bone under a subtarget rule.
+
+    '' means no subtarget (target the armature object), None means the rule has no bone to offer.
+    """
+    bone = pose_bone.bone
+    if rule == 'NONE':
+        return ""
+    if rule == 'CHILD':
+        children = bone.children
+        if not children:
+            return None
+        # Prefer the connected child, that's the one continuing the chain
+        connected = [child for child in children if child.use_connect]
+        return (connected or children)[0].name
+    if rule == 'PARENT':
+        return bone.parent.name if bone.parent else None
+    if rule == 'ACTIVE':
+        return active_name if active_name and active_name != pose_bone.name else None
+    raise ValueError(f"Unknown subtarget rule '{rule}'")
+
+def add_constraints(armature_obj, pose_bones, constraint_type, subtarget_rule='NONE', settings=None, active_name=""):
+    """Adds and configures one constraint per pose bone through pose_bone.constraints.new().
+
+    The target is the armature object itself, the subtarget follows subtarget_rule.
+    Bones for which the rule yields no subtarget are skipped.
+    Returns (added constraints, names of skipped bones).
+    """
+    constraint_settings = dict(DEFAULT_SETTINGS.get(constraint_type, {}))
+    constraint_settings.update(settings or {})
+
+    added = []
+    skipped = []
+    for pose_bone in pose_bones:
+        subtarget = resolve_subtarget(pose_bone, subtarget_rule, active_name)
+        if subtarget is None:
+            skipped.append(pose_bone.name)
+            continue
+
+        constraint = pose_bone.constraints.new(constraint_type)
+        constraint.target = armature_obj
+        if subtarget:
+            constraint.subtarget = subtarget
+        for property_name, value in constraint_settings.items():
+            setattr(constraint, property_name, value)
+        added.append(constraint)
+
+    instrumentation.count(bones=len(added))
+    return added, skipped
@@ -0,0 +1,134 @@
+import numpy as np
+
+from . import instrumentation
+from . import properties
+from . import weights
+
+DEFAULT_CHUNK_ELEMENTS = properties.DEFAULT_CHUNK_ELEMENTS
+
+
+def read_bone_envelopes(armature_data, only_deform=True):
+    """Reads bone names, heads/tails (armature space) and envelope settings with foreach_get.
+
+    Returns a dict of NumPy arrays, restricted to deforming bones by default.
+    """
+    bones = armature_data.bones
+    count = len(bones)
+
+    def read(property_name, size=1, dtype=np.float32):
+        values = np.empty(count * size, dtype=dtype)
+        bones.foreach_get(property_name, values)
+        return values.reshape(count, size) if size > 1 else values
+
+    envelopes = {
+        "names": np.array(bones.keys(), dtype=object),
+        "heads": read("head_local", 3),
+        "tails": read("tail_local", 3),
+        "head_radius": read("head_radius"),
+        "tail_radius": read("tail_radius"),
+        "distance": read("envelope_distance"),
+        "weight": read("envelope_weight"),
+    }
+    if only_deform:
+        deform = read("use_deform", dtype=bool)
+        envelopes = {key: value[deform] for key, value in envelopes.items()}
+    return envelopes
+
+def read_vertices(mesh_obj, armature_obj):
+    """Vertex positions of the mesh object in the armature's space, read with one foreach_get."""
+    vertices = mesh_obj.data.vertices
+    coords = np.empty(len(vertices) * 3, dtype=np.float32)
+    vertices.foreach_get("co", coords)
+    coords = coords.reshape(-1, 3).astype(np.float64)
+
+    to_armature = np.array(armature_obj.matrix_world.inverted() @ mesh_obj.matrix_world, dtype=np.float64)
+    return coords @ to_armature[:3, :3].T + to_armature[:3, 3]
+
+def envelope_weights(points, envelopes, chunk_elements=DEFAULT_CHUNK_ELEMENTS, normalize=True, fill_unweighted=True):
+    """Computes envelope weights of points (N x 3) for every bone, like Blender's envelope deform.
+
+    Inside the interpolated head/tail radius a bone has full influence, it falls off quadratically
+    over envelope_distance and is scaled by envelope_weight. Points are processed in chunks.
+    Returns per-bone lists of (vertex indices, weights) arrays.
+    """
+    heads = envelopes["heads"].astype(np.float64)
+    segments = envelopes["tails"].astype(np.float64) - heads
+    lengths_squared = np.maximum((segments * segments).sum(axis=1), 1e-12)
+    head_radius = envelopes["head_radius"].astype(np.float64)
+    radius_delta = envelopes["tail_radius"].astype(np.float64) - head_radius
+    falloff = np.maximum(envelopes["distance"].astype(np.float64), 1e-6)
+    bone_weight = envelopes["weight"].astype(np.float64)
+
+    point_count = len(points)
+    bone_count = len(heads)
+    chunk_size = max(1, chunk_elements // max(1, bone_count))
+    bone_indices = [[] for _ in range(bone_count)]
+    bone_weights = [[] for _ in range(bone_count)]
+
+    for start in range(0, point_count, chunk_size):
+        chunk = points[start:start + chunk_size]
+        offsets = chunk[:, None, :] - heads[None, :, :] # (chunk, bones, 3)
+        along = np.clip((offsets * segments[None]).sum(axis=2) / lengths_squared, 0.0, 1.0)
+        closest = offsets - along[:, :, None] * segments[None]
+        distance = np.sqrt((closest * closest).sum(axis=2))
+        radius = head_radius + along * radius_delta
+
+        outside = np.maximum(distance - radius, 0.0)
+        contribution = np.where(outside < falloff, 1.0 - (outside / falloff) ** 2, 0.0) * bone_weight
+
+        if fill_unweighted:
+            # Vertices no envelope reaches go fully to the nearest bone surface
+            empty = ~(contribution > 0.0).any(axis=1)
+            if empty.any():
+                nearest = np.argmin(outside[empty], axis=1)
+                contribution[np.flatnonzero(empty), nearest] = 1.0
+
+        if normalize:
+            totals = contribution.sum(axis=1, keepdims=True)
+            np.divide(contribution, totals, out=contribution, where=totals > 0.0)
+
+        rows, columns = np.nonzero(contribution)
+        values = contribution[rows, columns]
+        order = np.argsort(columns, kind="stable")
+        rows, columns, values = rows[order], columns[order], values[order]
+        bounds = np.searchsorted(columns, np.arange(bone_count + 1))
+        for bone_index in range(bone_count):
+            low, high = bounds[bone_index], bounds[bone_index + 1]
+            if high > low:
+                bone_indices[bone_index].append(rows[low:high] + start)
+                bone_weights[bone_index].append(values[low:high])
+
+    empty_indices = np.empty(0, dtype=np.int64)
+    empty_weights = np.empty(0, dtype=np.float64)
+    return [(np.concatenate(indices) if indices else empty_indices,
+             np.concatenate(values) if values else empty_weights)
+            for indices, values in zip(bone_indices, bone_weights)]
+
+def skin_mesh_with_envelopes(mesh_obj, armature_obj, only_deform=True, normalize=True, fill_unweighted=True,
+                             chunk_elements=DEFAULT_CHUNK_ELEMENTS, resolution=weights.WEIGHT_RESOLUTION):
+    """Computes envelope weights for a mesh object and writes vertex groups plus an Armature modifier.
+
+    Returns the number of vertex groups written.
+    """
+    envelopes = read_bone_envelopes(armature_obj.data, only_deform)
+    if not len(envelopes["names"]):
+        return 0
+
+    points = read_vertices(mesh_obj, armature_obj)
+    per_bone = envelope_weights(points, envelopes, chunk_elements, normalize, fill_unweighted)
+
+    # Only bones that influence at least one vertex get a group, groups left from an earlier run of the
+    # other bones are removed so they don't keep stale weights
+    used = [i for i, (indices, _values) in enumerate(per_bone) if len(indices)]
+    weights.remove_vertex_groups(mesh_obj, [name for i, name in enumerate(envelopes["names"])
+                                            if not len(per_bone[i][0])])
+    weights.write_sparse_weights(
+            mesh_obj,
+            [envelopes["names"][i] for i in used],
+            [per_bone[i][0] for i in used],
+            [per_bone[i][1] for i in used],
+            resolution=resolution)
+    weights.ensure_armature_modifier(mesh_obj, armature_obj)
+
+    instrumentation.count(bones=len(used), vertices=len(points))
+    return len(used)
@@ -0,0 +1,133 @@
+import numpy as np
+
+from . import skeleton_gen
+
+# Name prefixes of the control bones created for each IK chain
+IK_PREFIX = "IK-"
+POLE_PREFIX = "POLE-"
+
+
+def _rest_matrices(armature_data):
+    bones = armature_data.bones
+    matrices = np.empty(len(bones) * 16, dtype=np.float32)
+    bones.foreach_get("matrix_local", matrices)
+    # foreach_get flattens matrices column by column, transpose to row-major
+    return matrices.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+
+def _normalized(vectors):
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(lengths, 1e-12), lengths[:, 0]
+
+def _angle(u, v):
+    u, _ = _normalized(u)
+    v, _ = _normalized(v)
+    return np.arccos(np.clip((u * v).sum(axis=1), -1.0, 1.0))
+
+def pole_angles(base_heads, base_tails, base_x_axes, ik_tails, poles):
+    """IK pole_angle values that keep chains in their rest pose with the pole bone at `poles`.
+
+    The pole axis is projected onto the plane of the chain base bone and measured against the
+    bone's X axis, signed around the bone's direction. All inputs are (N x 3) arrays.
+    """
+    base_directions = base_tails - base_heads
+    pole_normals = np.cross(ik_tails - base_heads, poles - base_heads)
+    projected_axes = np.cross(pole_normals, base_directions)
+    angles = _angle(base_x_axes, projected_axes)
+    # Negative when the rotation from the X axis to the pole axis points against the bone direction
+    flip = _angle(np.cross(base_x_axes, projected_axes), base_directions) < 1.0
+    return np.where(flip, -angles, angles)
+
+def chain_candidates(armature_data, topology, only_selected=False):
+    """Boolean array over the bones that may be part of a new IK chain: not IK/pole bones, optionally only selected."""
+    candidates = np.array([not name.startswith((IK_PREFIX, POLE_PREFIX)) for name in topology.names], dtype=bool)
+    if only_selected:
+        selected = np.empty(len(topology), dtype=bool)
+        armature_data.bones.foreach_get("select", selected)
+        candidates &= selected
+    return candidates
+
+def plan_ik_chains(topology, chains, skip_tip_bones=0, max_chain_count=0):
+    """Picks the IK bone and IK chain of every limb chain.
+
+    The IK bone is the chain's last bone, skipping skip_tip_bones at its end. The IK chain covers up
+    to max_chain_count bones ending at it (0: up to the chain start). Returns (IK bone, chain_count,
+    chain base bone) index triples.
+    """
+    plans = []
+    for chain in chains:
+        usable = chain[:len(chain) - skip_tip_bones]
+        if not usable:
+            continue
+        chain_count = len(usable) if max_chain_count <= 0 else min(max_chain_count, len(usable))
+        plans.append((usable[-1], chain_count, usable[-chain_count]))
+    return plans
+
+def add_ik_rigs(armature_obj, topology, plans, use_pole=True, view_layer=None):
+    """Creates IK control bones, pole bones and IK constraints for planned chains.
+
+    All control bones are created in one Edit Mode session. Chains whose IK bone already has an IK
+    constraint are skipped. Returns a list of (IK bone, control bone, pole bone or None) names.
+    """
+    pose_bones = armature_obj.pose.bones
+    plans = [plan for plan in plans if not any(c.type == 'IK' for c in pose_bones[topology.names[plan[0]]].constraints)]
+    if not plans:
+        return []
+
+    ik_bones = np.array([plan[0] for plan in plans])
+    base_bones = np.array([plan[2] for plan in plans])
+    ik_heads, ik_tails = topology.heads[ik_bones], topology.tails[ik_bones]
+    base_heads, base_tails = topology.heads[base_bones], topology.tails[base_bones]
+    matrices = _rest_matrices(armature_obj.data)
+    ik_directions, ik_lengths = _normalized(ik_tails - ik_heads)
+
+    # Pole side: the joint of each IK chain farthest from the line between chain start and end
+    middles = np.empty_like(ik_heads)
+    for i, (ik_bone, chain_count, _base) in enumerate(plans):
+        joints = [ik_bone]
+        while len(joints) < chain_count:
+            joints.append(topology.parents[joints[-1]])
+        heads = topology.heads[joints[:-1]] if chain_count > 1 else topology.heads[joints]
+        line, _ = _normalized((ik_tails[i] - base_heads[i])[None])
+        offsets = heads - base_heads[i]
+        distances = np.linalg.norm(offsets - (offsets @ line[0])[:, None] * line, axis=1)
+        middles[i] = heads[int(np.argmax(distances))]
+
+    chain_lines, chain_spans = _normalized(ik_tails - base_heads)
+    along = ((middles - base_heads) * chain_lines).sum(axis=1, keepdims=True)
+    pole_directions, bend = _normalized(middles - (base_heads + along * chain_lines))
+    # Straight chains have no bend to follow, use the base bone's Z axis
+    straight = bend < 1e-4 * np.maximum(chain_spans, 1e-9)
+    pole_directions[straight] = matrices[base_bones[straight], :3, 2]
+    poles = middles + pole_directions * (chain_spans * 0.5)[:, None]
+    with_pole = np.array([use_pole and plan[1] > 1 for plan in plans])
+
+    count = len(plans)
+    control_names = [IK_PREFIX + topology.names[i] for i in ik_bones]
+    pole_names = [POLE_PREFIX + topology.names[ik_bones[i]] for i in np.flatnonzero(with_pole)]
+    control_size = (ik_lengths * 0.5)[:, None]
+    heads = np.concatenate((ik_tails, poles[with_pole]))
+    tails = np.concatenate((ik_tails + ik_directions * control_size,
+                            poles[with_pole] + ik_directions[with_pole] * control_size[with_pole] * 0.5))
+    total = len(heads)
+    layout = skeleton_gen.BoneLayout(control_names + pole_names, heads, tails, np.zeros(total),
+                                     np.full(total, -1), np.zeros(total, dtype=bool), np.zeros(total, dtype=bool))
+    created = skeleton_gen.build_skeleton(armature_obj, layout, view_layer)
+    control_names, pole_names = created[:count], iter(created[count:])
+
+    angles = pole_angles(base_heads, base_tails, matrices[base_bones, :3, 0], ik_tails, poles)
+    rigs = []
+    for i, (ik_bone, chain_count, _base) in enumerate(plans):
+        ik_name = topology.names[ik_bone]
+        constraint = pose_bones[ik_name].constraints.new('IK')
+        constraint.target = armature_obj
+        constraint.subtarget = control_names[i]
+        constraint.chain_count = chain_count
+        constraint.use_tail = True
+        pole_name = None
+        if with_pole[i]:
+            pole_name = next(pole_names)
+            constraint.pole_target = armature_obj
+            constraint.pole_subtarget = pole_name
+            constraint.pole_angle = float(angles[i])
+        rigs.append((ik_name, control_names[i], pole_name))
+    return rigs
@@ -0,0 +1,191 @@
+import importlib.machinery
+import json
+import sys
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from functools import wraps
+
+import bpy
+
+# Every RigBot operator is registered through register_classes(), which wraps execute()
+# to record wall time and the counters reported by the engines (objects, bones, mode switches, ...).
+HISTORY_SIZE = 256 # Invocations kept per operator for the rolling statistics
+HISTOGRAM_EDGES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+_stats = {} # bl_idname -> OperatorStats
+_active_counters = [] # Counter dicts of the operators currently running (nested calls stack up)
+
+# Startup timing: module imports and register() steps, recorded while the add-on is enabled and when a
+# lazily imported core module is first used. self_ms excludes the time of nested steps (imports within imports).
+StartupStep = namedtuple("StartupStep", ("phase", "total_ms", "self_ms"))
+_startup = {} # module or step name -> StartupStep
+_startup_nested_ms = [] # Time spent in nested steps, one entry per running step
+_enabled = False # Set when register() finished, steps after that are first uses
+
+
+class OperatorStats:
+    """Rolling timing history, latency histogram and counter totals of one operator"""
+
+    def __init__(self):
+        self.calls = 0
+        self.durations_ms = deque(maxlen=HISTORY_SIZE)
+        self.histogram = [0] * (len(HISTOGRAM_EDGES_MS) + 1) # Last bucket is everything above the last edge
+        self.totals = {}
+        self.last_counters = {}
+
+    def add(self, duration_ms, counters):
+        self.calls += 1
+        self.durations_ms.append(duration_ms)
+        bucket = next((i for i, edge in enumerate(HISTOGRAM_EDGES_MS) if duration_ms <= edge), len(HISTOGRAM_EDGES_MS))
+        self.histogram[bucket] += 1
+        for name, value in counters.items():
+            self.totals[name] = self.totals.get(name, 0) + value
+        self.last_counters = counters
+
+    def percentile(self, fraction):
+        if not self.durations_ms:
+            return 0.0
+        ordered = sorted(self.durations_ms)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        durations = self.durations_ms
+        return {
+            "calls": self.calls,
+            "last_ms": durations[-1] if durations else 0.0,
+            "mean_ms": sum(durations) / len(durations) if durations else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": max(durations) if durations else 0.0,
+            "histogram_edges_ms": list(HISTOGRAM_EDGES_MS),
+            "histogram": list(self.histogram),
+            "totals": dict(self.totals),
+            "last_counters": dict(self.last_counters),
+        }
+
+def count(**counters):
+    """Adds to the counters of the running RigBot operator, does nothing outside of one."""
+    if not _active_counters:
+        return
+    current = _active_counters[-1]
+    for name, value in counters.items():
+        current[name] = current.get(name, 0) + value
+
+def record(bl_idname, duration_ms, counters=None):
+    """Records one invocation, for code paths that don't go through execute() (e.g. modal jobs)."""
+    _stats.setdefault(bl_idname, OperatorStats()).add(duration_ms, counters or {})
+
+@contextmanager
+def counting(counters):
+    """Collects the count() calls made within the block into the counters dict."""
+    _active_counters.append(counters)
+    try:
+        yield counters
+    finally:
+        _active_counters.pop()
+
+def _instrument(cls):
+    execute = cls.__dict__.get("execute")
+    if execute is None or getattr(execute, "_rigbot_instrumented", False):
+        return
+
+    @wraps(execute)
+    def instrumented_execute(self, context):
+        counters = {}
+        start = time.perf_counter()
+        try:
+            with counting(counters):
+                return execute(self, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000.0
+            record(cls.bl_idname, duration_ms, counters)
+
+    instrumented_execute._rigbot_instrumented = True
+    cls.execute = instrumented_execute
+
+def register_classes(classes):
+    """Registers RigBot classes, operators are instrumented first."""
+    for cls in classes:
+        if issubclass(cls, bpy.types.Operator):
+            _instrument(cls)
+        bpy.utils.register_class(cls)
+
+def unregister_classes(classes):
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+
+def operator_stats():
+    """Returns {bl_idname: OperatorStats} of every operator invoked this session."""
+    return _stats
+
+def reset():
+    _stats.clear()
+
+@contextmanager
+def startup_step(name):
+    """Times an import or register() step for the startup report."""
+    _startup_nested_ms.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        total_ms = (time.perf_counter() - start) * 1000.0
+        self_ms = total_ms - _startup_nested_ms.pop()
+        if _startup_nested_ms:
+            _startup_nested_ms[-1] += total_ms
+        _startup[name] = StartupStep("first use" if _enabled else "enable", total_ms, self_ms)
+
+def startup_finished():
+    """Marks the end of enabling the add-on, later steps are reported as first uses."""
+    global _enabled
+    _enabled = True
+
+class TimedLoader:
+    """Loader wrapper that times the execution of a module as a startup step"""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name) # get_source(), get_filename(), ... of the wrapped loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        with startup_step(module.__name__):
+            self.loader.exec_module(module)
+
+class _TimedImportFinder:
+    """Meta path finder that wraps the loaders of one package's modules in TimedLoader"""
+
+    def __init__(self, package):
+        self.package = package
+
+    def find_spec(self, fullname, path, target=None):
+        if not fullname.startswith(self.package + "."):
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path, target)
+        if spec is not None and spec.loader is not None:
+            spec.loader = TimedLoader(spec.loader)
+        return spec
+
+@contextmanager
+def timed_imports(package):
+    """Times every module of package imported within the block."""
+    finder = _TimedImportFinder(package)
+    sys.meta_path.insert(0, finder)
+    try:
+        yield
+    finally:
+        sys.meta_path.remove(finder)
+
+def startup_report():
+    """Returns [(name, StartupStep)] of every timed import and register() step, slowest (self time) first."""
+    return sorted(_startup.items(), key=lambda item: item[1].self_ms, reverse=True)
+
+def export_json(filepath):
+    """Writes the summary of every instrumented operator to a JSON file."""
+    with open(filepath, "w", encoding="utf-8") as stats_file:
+        json.dump({idname: stats.summary() for idname, stats in sorted(_stats.items())}, stats_file, indent=2)
@@ -0,0 +1,148 @@
+import time
+
+import bpy
+
+from . import instrumentation
+
+# Long-running operators split their work into a Job: a generator that yields after every unit of work
+# (one object, one bone, ...). Invoked from the UI, JobOperatorMixin runs the job in time slices from a
+# window manager timer, so the interface keeps drawing, shows progress in the status bar and Esc cancels
+# the job and rolls back what it already changed. execute() (scripts, redo panel, background mode) runs
+# the same job straight through.
+SLICE_MS = 16.0 # Work done per timer tick, about one frame at 60 fps
+TIMER_INTERVAL = 0.01 # Seconds between timer ticks, the UI handles its events in between
+
+# Events still handled by Blender while a job runs, so the view can be navigated
+_PASS_THROUGH_EVENTS = {'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+                        'TRACKPADPAN', 'TRACKPADZOOM'}
+
+
+class Job:
+    """Work split into steps: steps yields once per unit of work, rollback() undoes the finished units"""
+
+    def __init__(self, label, total, steps, rollback=None):
+        self.label = label
+        self.total = total
+        self.steps = iter(steps)
+        self.rollback = rollback
+        self.done = 0
+        self.results = [] # Values yielded by steps
+        self.finished = False
+        self.counters = {} # instrumentation counters of every slice
+        self.active_ms = 0.0 # Time spent running steps, without the pauses between slices
+
+    def run_slice(self, budget_ms=None):
+        """Runs steps for about budget_ms (all remaining steps with None), returns True when the job is finished."""
+        start = time.perf_counter()
+        deadline = None if budget_ms is None else start + budget_ms / 1000.0
+        with instrumentation.counting(self.counters):
+            for result in self.steps:
+                self.done += 1
+                self.results.append(result)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+            else:
+                self.finished = True
+        self.active_ms += (time.perf_counter() - start) * 1000.0
+        return self.finished
+
+    def progress_text(self):
+        percent = 100 * self.done // self.total if self.total else 100
+        return f"{self.label}: {self.done}/{self.total} ({percent}%), Esc to cancel"
+
+class JobOperatorMixin:
+    """Operator base that runs the Job returned by start_job() modally, in time-sliced chunks.
+
+    Operators must define start_job(context), returning a Job or None (after reporting why) to cancel,
+    an operator class without it raises TypeError when it is defined, i.e. when the add-on is loaded.
+    finish_job(context, job) reports the outcome and returns the operator result, {'FINISHED'} by default.
+    Statistics are recorded per job, with the time spent working and a ticks counter, as execute() isn't
+    instrumented for these operators.
+    """
+    job_slice_ms = SLICE_MS
+    job_errors = () # Exception types reported as a failed (and rolled back) job instead of raised
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "bl_idname" in cls.__dict__ and not callable(getattr(cls, "start_job", None)):
+            raise TypeError(f"{cls.__name__} is a job operator without a start_job(context) method")
+
+    def finish_job(self, context, job):
+        return {'FINISHED'}
+
+    def _start_job(self, context):
+        counters = {}
+        with instrumentation.counting(counters):
+            job = self.start_job(context)
+        if job is not None:
+            job.counters.update(counters)
+        return job
+
+    def _finish_job(self, context, job):
+        with instrumentation.counting(job.counters):
+            result = self.finish_job(context, job)
+        instrumentation.record(self.bl_idname, job.active_ms, job.counters)
+        return result
+
+    def _run_slice(self, job, budget_ms):
+        try:
+            return job.run_slice(budget_ms), None
+        except self.job_errors as e:
+            return False, self._abort_job(job, {'ERROR'}, f"{job.label} failed: {e}")
+
+    def _abort_job(self, job, level, message):
+        if job.rollback is not None:
+            job.rollback()
+        job.counters["cancelled"] = 1
+        instrumentation.record(self.bl_idname, job.active_ms, job.counters)
+        self.report(level, message)
+        return {'CANCELLED'}
+
+    def execute(self, context):
+        job = self._start_job(context)
+        if job is None:
+            return {'CANCELLED'}
+        _finished, failed = self._run_slice(job, None)
+        return failed or self._finish_job(context, job)
+
+    def invoke(self, context, event):
+        if bpy.app.background or context.window is None:
+            return self.execute(context)
+        job = self._start_job(context)
+        if job is None:
+            return {'CANCELLED'}
+        # Small jobs finish in their first slice, without a modal round trip
+        finished, failed = self._run_slice(job, self.job_slice_ms)
+        if failed or finished:
+            return failed or self._finish_job(context, job)
+
+        self._job = job
+        self._timer = context.window_manager.event_timer_add(TIMER_INTERVAL, window=context.window)
+        context.window_manager.modal_handler_add(self)
+        context.workspace.status_text_set(job.progress_text())
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        job = self._job
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self._end_modal(context)
+            return self._abort_job(job, {'WARNING'},
+                                   f"{job.label} cancelled after {job.done}/{job.total}, changes reverted.")
+        if event.type != 'TIMER' or event.timer != self._timer:
+            return {'PASS_THROUGH'} if event.type in _PASS_THROUGH_EVENTS else {'RUNNING_MODAL'}
+
+        job.counters["ticks"] = job.counters.get("ticks", 0) + 1
+        finished, failed = self._run_slice(job, self.job_slice_ms)
+        if not (finished or failed):
+            context.workspace.status_text_set(job.progress_text())
+            return {'RUNNING_MODAL'}
+        self._end_modal(context)
+        return failed or self._finish_job(context, job)
+
+    def cancel(self, context):
+        # Called by Blender when the job is aborted from outside (e.g. a file load), its data may be gone
+        self._end_modal(context)
+
+    def _end_modal(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        context.workspace.status_text_set(None)
@@ -0,0 +1,144 @@
+import re
+from collections import namedtuple
+
+from . import cache
+from . import topology
+
+# Rules applied to both object and bone names before they are compared.
+# strip_prefixes/strip_suffixes are tuples of strings, the longest match is removed first.
+# strip_duplicate_suffix only applies to object names, bones keep their numbers ("DEF-spine.003").
+NameMatchRules = namedtuple(
+    "NameMatchRules",
+    ("strip_prefixes", "strip_suffixes", "strip_duplicate_suffix", "ignore_case", "mirror_tokens"),
+    defaults=((), (), True, True, True),
+)
+
+# One of Blender's duplicate suffixes: "Bone.001", "Bone.012.003" has two
+_duplicate_suffix = re.compile(r"\.\d{3,}$")
+# Side tokens at the end ("arm.L", "arm_Left") or the start ("L_arm", "Right.arm") of a name
+_side_suffix = re.compile(r"^(.+?)[._\- ](l|r|left|right)$", re.IGNORECASE)
+_side_prefix = re.compile(r"^(l|r|left|right)[._\- ](.+)$", re.IGNORECASE)
+
+# Same tokens with the separator captured, for flipping sides while keeping the name's spelling
+_side_suffix_parts = re.compile(r"^(.+?)([._\- ])(l|r|left|right)$", re.IGNORECASE)
+_side_prefix_parts = re.compile(r"^(l|r|left|right)([._\- ])(.+)$", re.IGNORECASE)
+_opposite_side = {"l": "r", "r": "l", "left": "right", "right": "left"}
+# Number after the side token ("DEF-upper_arm.L.001"), kept as is when flipping like Blender does
+_number_suffix = re.compile(r"^(.+?)(\.\d+)$")
+
+
+def parse_name_list(text):
+    """Splits a comma separated string into a tuple of non-empty, stripped names."""
+    return tuple(part.strip() for part in text.split(",") if part.strip())
+
+def _strip_affix(name, affixes, ignore_case, from_start):
+    compare_name = name.casefold() if ignore_case else name
+    for affix in sorted(affixes, key=len, reverse=True):
+        compare_affix = affix.casefold() if ignore_case else affix
+        if from_start and compare_name.startswith(compare_affix) and len(name) > len(affix):
+            return name[len(affix):]
+        if not from_start and compare_name.endswith(compare_affix) and len(name) > len(affix):
+            return name[:-len(affix)]
+    return name
+
+def normalize_name(name, rules):
+    """Returns the comparison key of a name under the given NameMatchRules (duplicate suffixes are kept)."""
+    if rules.strip_prefixes:
+        name = _strip_affix(name, rules.strip_prefixes, rules.ignore_case, from_start=True)
+    if rules.strip_suffixes:
+        name = _strip_affix(name, rules.strip_suffixes, rules.ignore_case, from_start=False)
+
+    side = ""
+    if rules.mirror_tokens:
+        match = _side_suffix.match(name)
+        if match:
+            name, side = match.group(1), match.group(2)
+        else:
+            match = _side_prefix.match(name)
+            if match:
+                side, name = match.group(1), match.group(2)
+        # "L", "l", "Left" and "left" all map to the same side marker
+        side = side[:1].upper()
+
+    if rules.ignore_case:
+        name = name.casefold()
+    return f"{name}|{side}" if side else name
+
+def _flip_token(token):
+    opposite = _opposite_side[token.lower()]
+    if token.isupper():
+        return opposite.upper()
+    if token[0].isupper():
+        return opposite.capitalize()
+    return opposite
+
+def split_side(name):
+    """Splits a side token off a name: ("arm", ".L") for "arm.L", ("arm", "L_") for "L_arm", (name, "") without one."""
+    match = _side_suffix_parts.match(name)
+    if match:
+        return match.group(1), match.group(2) + match.group(3)
+    match = _side_prefix_parts.match(name)
+    if match:
+        return match.group(3), match.group(1) + match.group(2)
+    return name, ""
+
+def flip_side_name(name):
+    """Returns name with its side token swapped (arm.L -> arm.R, Left_leg -> Right_leg), unchanged without one.
+
+    A number after the side token stays: arm.L.001 -> arm.R.001.
+    """
+    number = ""
+    match = _number_suffix.match(name)
+    if match and _side_suffix_parts.match(match.group(1)):
+        name, number = match.group(1), match.group(2)
+    match = _side_suffix_parts.match(name)
+    if match:
+        return match.group(1) + match.group(2) + _flip_token(match.group(3)) + number
+    match = _side_prefix_parts.match(name)
+    if match:
+        return _flip_token(match.group(1)) + match.group(2) + match.group(3)
+    return name
+
+class BoneNameIndex:
+    """Maps object names to bone names of one armature under a set of NameMatchRules"""
+
+    def __init__(self, bone_names, rules, exact=None):
+        self.rules = rules
+        self.exact = exact if exact is not None else set(bone_names) # Anything supporting `in`
+        self.normalized = {} # normalized key -> bone name
+        self.ambiguous = set() # keys shared by several bones, never matched
+
+        for bone_name in bone_names:
+            key = normalize_name(bone_name, rules)
+            existing = self.normalized.setdefault(key, bone_name)
+            if existing != bone_name:
+                self.ambiguous.add(key)
+
+    def match(self, name):
+        """Returns the bone name matching name, or None. Exact matches always win.
+
+        With strip_duplicate_suffix, the name is tried as is first, then with one duplicate suffix less
+        at a time, so "spine.003.001" finds the bone "spine.003" before a bone "spine".
+        """
+        while True:
+            if name in self.exact:
+                return name
+            key = normalize_name(name, self.rules)
+            if key in self.ambiguous:
+                return None
+            bone_name = self.normalized.get(key)
+            if bone_name is not None or not self.rules.strip_duplicate_suffix:
+                return bone_name
+            stripped = _duplicate_suffix.sub("", name)
+            if stripped == name or not stripped:
+                return None
+            name = stripped
+
+def get_bone_name_index(armature_data, rules):
+    """Returns the cached BoneNameIndex of the armature data for the given rules."""
+    def build(data):
+        # Exact lookups share the topology's name -> index map
+        bone_topology = topology.get_topology(data)
+        return BoneNameIndex(bone_topology.names, rules, exact=bone_topology.index_of)
+
+    return cache.get(armature_data, ("bone_name_index", rules), build)
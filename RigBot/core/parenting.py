@@ -0,0 +1,80 @@
+from mathutils import Matrix
+
+from . import instrumentation
+
+
+def bone_parent_matrix(armature_obj, bone_name):
+    """Returns the world matrix a child parented to the bone is evaluated against."""
+    pose_bone = armature_obj.pose.bones.get(bone_name) if armature_obj.pose else None
+    if pose_bone is not None:
+        bone_matrix = pose_bone.matrix # Armature-space matrix of the posed bone
+        bone_length = pose_bone.length
+    else:
+        bone = armature_obj.data.bones[bone_name]
+        bone_matrix = bone.matrix_local # Rest matrix in armature space
+        bone_length = bone.length
+
+    # Bone parenting is relative to the bone's tail, not its head
+    return armature_obj.matrix_world @ bone_matrix @ Matrix.Translation((0.0, bone_length, 0.0))
+
+def save_parent_state(obj):
+    """The parent relation and local transform of an object, for restore_parent_states()."""
+    return (obj, obj.parent, obj.parent_type, obj.parent_bone,
+            obj.matrix_parent_inverse.copy(), obj.matrix_basis.copy())
+
+def restore_parent_states(states):
+    """Restores objects saved with save_parent_state(), latest first."""
+    for obj, parent, parent_type, parent_bone, parent_inverse, basis in reversed(states):
+        obj.parent = parent
+        obj.parent_type = parent_type
+        obj.parent_bone = parent_bone
+        obj.matrix_parent_inverse = parent_inverse
+        obj.matrix_basis = basis
+
+def iter_parent_objects_to_bones(armature_obj, assignments, keep_transform=False, saved_states=None):
+    """Generator form of parent_objects_to_bones(), yields True (parented) or False (skipped) per assignment.
+
+    When saved_states is a list, the state of every object is appended to it before it is changed.
+    """
+    parent_inverses = {} # bone_name -> inverted bone parent matrix
+
+    for child_obj, bone_name in assignments:
+        # Skip objects that are already parented correctly
+        if (child_obj.parent == armature_obj and
+                child_obj.parent_type == 'BONE' and
+                child_obj.parent_bone == bone_name):
+            yield False
+            continue
+
+        parent_inverse = parent_inverses.get(bone_name)
+        if parent_inverse is None:
+            parent_inverse = bone_parent_matrix(armature_obj, bone_name).inverted_safe()
+            parent_inverses[bone_name] = parent_inverse
+
+        if saved_states is not None:
+            saved_states.append(save_parent_state(child_obj))
+        if keep_transform:
+            world_matrix = child_obj.matrix_world.copy()
+
+        child_obj.parent = armature_obj
+        child_obj.parent_type = 'BONE'
+        child_obj.parent_bone = bone_name
+        child_obj.matrix_parent_inverse = parent_inverse
+
+        if keep_transform:
+            # With the inverse above, the world matrix equals the basis matrix
+            child_obj.matrix_basis = world_matrix
+
+        instrumentation.count(objects=1)
+        yield True
+
+def parent_objects_to_bones(armature_obj, assignments, keep_transform=False):
+    """Parents objects to armature bones through the data API, without mode switches or operators.
+
+    assignments is an iterable of (object, bone_name) pairs. The parent inverse matrix is
+    computed the same way as object.parent_set(type='BONE'), once per bone.
+    Returns a (parented, skipped) tuple of object counts.
+    """
+    results = list(iter_parent_objects_to_bones(armature_obj, assignments, keep_transform))
+    parented_count = sum(results)
+    return parented_count, len(results) - parented_count
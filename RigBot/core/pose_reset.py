@@ -0,0 +1,110 @@
+import numpy as np
+
+from . import instrumentation
+
+# Pose bone properties written per channel, with their component count and identity value
+CHANNEL_PROPERTIES = {
+    'LOCATION': (("location", 3, (0.0, 0.0, 0.0)),),
+    'ROTATION': (("rotation_quaternion", 4, (1.0, 0.0, 0.0, 0.0)),
+                 ("rotation_euler", 3, (0.0, 0.0, 0.0)),
+                 ("rotation_axis_angle", 4, (0.0, 0.0, 1.0, 0.0))),
+    'SCALE': (("scale", 3, (1.0, 1.0, 1.0)),),
+}
+# Per-component transform locks, respected like pose.loc_clear/rot_clear/scale_clear do
+_COMPONENT_LOCKS = {
+    "location": "lock_location",
+    "rotation_euler": "lock_rotation",
+    "scale": "lock_scale",
+}
+
+
+def bone_mask(pose_bones, bone_names=None):
+    """Boolean array over pose_bones, True for the named bones (all bones when bone_names is None)."""
+    count = len(pose_bones)
+    if bone_names is None:
+        return np.ones(count, dtype=bool)
+    index_of = {name: i for i, name in enumerate(pose_bones.keys())}
+    mask = np.zeros(count, dtype=bool)
+    mask[[index_of[name] for name in bone_names if name in index_of]] = True
+    return mask
+
+def selected_bone_names(armature_data):
+    """Names of the selected, visible bones, read with foreach_get."""
+    bones = armature_data.bones
+    count = len(bones)
+    selected = np.empty(count, dtype=bool)
+    hidden = np.empty(count, dtype=bool)
+    bones.foreach_get("select", selected)
+    bones.foreach_get("hide", hidden)
+    names = bones.keys()
+    return [names[i] for i in np.flatnonzero(selected & ~hidden)]
+
+def _read_locks(pose_bones, count):
+    locks = np.empty(count * 3, dtype=bool)
+    pose_bones.foreach_get("lock_rotation", locks)
+    locks_w = np.empty(count, dtype=bool)
+    pose_bones.foreach_get("lock_rotation_w", locks_w)
+    # 4D rotations are only cleared on bones without any rotation lock
+    return locks.reshape(count, 3).any(axis=1) | locks_w
+
+def reset_pose_bones(armature_obj, bone_names=None, channels=('LOCATION', 'ROTATION', 'SCALE'),
+                     respect_locks=True, keyframe=False, frame=None):
+    """Writes identity transforms to a set of pose bones with one foreach_get/foreach_set per property.
+
+    Works in any mode and without a context, bone_names=None resets every bone.
+    With keyframe=True the reset channels are keyed on frame (the current frame when None).
+    Returns the number of bones reset.
+    """
+    pose_bones = armature_obj.pose.bones
+    count = len(pose_bones)
+    mask = bone_mask(pose_bones, bone_names)
+    if not mask.any():
+        return 0
+
+    rotation_locked = _read_locks(pose_bones, count) if respect_locks and 'ROTATION' in channels else None
+
+    for channel in channels:
+        for property_name, size, identity in CHANNEL_PROPERTIES[channel]:
+            values = np.empty(count * size, dtype=np.float32)
+            pose_bones.foreach_get(property_name, values)
+            values = values.reshape(count, size)
+
+            write = np.repeat(mask[:, None], size, axis=1)
+            if respect_locks:
+                lock_name = _COMPONENT_LOCKS.get(property_name)
+                if lock_name is not None:
+                    locks = np.empty(count * 3, dtype=bool)
+                    pose_bones.foreach_get(lock_name, locks)
+                    write &= ~locks.reshape(count, 3)
+                elif rotation_locked is not None:
+                    write &= ~rotation_locked[:, None]
+
+            values[write] = np.broadcast_to(np.asarray(identity, dtype=np.float32), (count, size))[write]
+            pose_bones.foreach_set(property_name, values.ravel())
+
+    # foreach_set bypasses RNA updates, tag the object so the pose is re-evaluated
+    armature_obj.update_tag(refresh={'DATA'})
+
+    if keyframe:
+        _keyframe_channels(pose_bones, np.flatnonzero(mask), channels, frame)
+
+    reset_count = int(mask.sum())
+    instrumentation.count(objects=1, bones=reset_count)
+    return reset_count
+
+def _keyframe_channels(pose_bones, indices, channels, frame):
+    keyframe_options = {} if frame is None else {"frame": frame}
+    for i in indices:
+        pose_bone = pose_bones[i]
+        for channel in channels:
+            if channel == 'LOCATION':
+                data_path = "location"
+            elif channel == 'SCALE':
+                data_path = "scale"
+            elif pose_bone.rotation_mode == 'QUATERNION':
+                data_path = "rotation_quaternion"
+            elif pose_bone.rotation_mode == 'AXIS_ANGLE':
+                data_path = "rotation_axis_angle"
+            else:
+                data_path = "rotation_euler"
+            pose_bone.keyframe_insert(data_path, group=pose_bone.name, **keyframe_options)
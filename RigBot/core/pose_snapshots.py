@@ -0,0 +1,106 @@
+import base64
+
+import numpy as np
+
+from . import instrumentation
+from . import pose_reset
+
+# Pose snapshots are stored on the armature object (Object.rigbot_pose_snapshots, registered in
+# properties) and saved with the .blend. Each snapshot packs the loc/rot/scale of every pose bone into
+# one float32 array, kept as a base64 string next to the newline separated bone names. Every rotation
+# representation is stored, so a restore is exact whatever the bones' rotation modes are.
+SNAPSHOT_CHANNELS = (
+    ("location", 3),
+    ("rotation_quaternion", 4),
+    ("rotation_euler", 3),
+    ("rotation_axis_angle", 4),
+    ("scale", 3),
+)
+SNAPSHOT_WIDTH = sum(size for _name, size in SNAPSHOT_CHANNELS)
+
+
+def _channel_slices():
+    start = 0
+    for name, size in SNAPSHOT_CHANNELS:
+        yield name, slice(start, start + size)
+        start += size
+
+def read_pose(pose_bones):
+    """All snapshot channels of the pose bones as an (N x SNAPSHOT_WIDTH) float32 array, one foreach_get each."""
+    count = len(pose_bones)
+    values = np.empty((count, SNAPSHOT_WIDTH), dtype=np.float32)
+    for name, columns in _channel_slices():
+        channel = np.empty(count * (columns.stop - columns.start), dtype=np.float32)
+        pose_bones.foreach_get(name, channel)
+        values[:, columns] = channel.reshape(count, -1)
+    return values
+
+def write_pose(pose_bones, values, mask):
+    """Writes the rows of values selected by mask to the pose bones, one foreach_get/foreach_set per channel."""
+    current = read_pose(pose_bones)
+    current[mask] = values[mask]
+    for name, columns in _channel_slices():
+        pose_bones.foreach_set(name, np.ascontiguousarray(current[:, columns]).ravel())
+
+def blend_poses(start, end, factor):
+    """Interpolates two (N x SNAPSHOT_WIDTH) poses, quaternions along the shorter way and renormalized."""
+    if factor >= 1.0:
+        return end.copy()
+    result = start + (end - start) * factor
+    quaternions = dict(_channel_slices())["rotation_quaternion"]
+    start_q, end_q = start[:, quaternions], end[:, quaternions]
+    end_q = np.where((start_q * end_q).sum(axis=1, keepdims=True) < 0.0, -end_q, end_q)
+    blended = start_q + (end_q - start_q) * factor
+    result[:, quaternions] = blended / np.maximum(np.linalg.norm(blended, axis=1, keepdims=True), 1e-12)
+    return result
+
+def capture_snapshot(armature_obj, name, bone_names=None):
+    """Adds a snapshot of the current pose (of bone_names, or every bone) to the armature object."""
+    pose_bones = armature_obj.pose.bones
+    mask = pose_reset.bone_mask(pose_bones, bone_names)
+    values = read_pose(pose_bones)[mask]
+    snapshot = armature_obj.rigbot_pose_snapshots.add()
+    snapshot.name = name
+    snapshot.bone_names = "\n".join(bone_name for bone_name, captured in zip(pose_bones.keys(), mask) if captured)
+    snapshot.values = base64.b64encode(values.astype("<f4").tobytes()).decode("ascii")
+    snapshot.bone_count = len(values)
+    instrumentation.count(bones=len(values))
+    return snapshot
+
+def snapshot_pose(snapshot, pose_bones):
+    """The snapshot's values laid out like pose_bones, and the mask of the bones it contains."""
+    names = snapshot.bone_names.split("\n") if snapshot.bone_names else []
+    stored = np.frombuffer(base64.b64decode(snapshot.values), dtype="<f4").reshape(len(names), SNAPSHOT_WIDTH)
+    index_of = {name: i for i, name in enumerate(pose_bones.keys())}
+    # Bones renamed or removed since the capture are skipped
+    found = np.array([name in index_of for name in names], dtype=bool)
+    targets = np.array([index_of[name] for name, present in zip(names, found) if present], dtype=np.int64)
+    values = np.zeros((len(pose_bones), SNAPSHOT_WIDTH), dtype=np.float32)
+    mask = np.zeros(len(pose_bones), dtype=bool)
+    values[targets] = stored[found]
+    mask[targets] = True
+    return values, mask
+
+def apply_snapshot(armature_obj, snapshot, factor=1.0, bone_names=None, blend_with=None):
+    """Restores a snapshot, or blends towards it by factor.
+
+    Without blend_with the blend starts at the current pose, with it (another snapshot) the result is
+    the blend between the two snapshots. bone_names limits the bones written. Returns the bone count.
+    """
+    pose_bones = armature_obj.pose.bones
+    end, mask = snapshot_pose(snapshot, pose_bones)
+    if blend_with is not None:
+        start, start_mask = snapshot_pose(blend_with, pose_bones)
+        mask &= start_mask
+    else:
+        start = read_pose(pose_bones)
+    mask &= pose_reset.bone_mask(pose_bones, bone_names)
+    if not mask.any():
+        return 0
+
+    write_pose(pose_bones, blend_poses(start, end, factor), mask)
+    # foreach_set bypasses RNA updates, tag the object so the pose is re-evaluated
+    armature_obj.update_tag(refresh={'DATA'})
+    applied_count = int(mask.sum())
+    instrumentation.count(objects=1, bones=applied_count)
+    return applied_count
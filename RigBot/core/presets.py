@@ -0,0 +1,167 @@
+import json
+import re
+
+import bpy
+
+from . import instrumentation
+
+# Constraint presets are JSON documents of the form
+#
+# {
+#     "format": "rigbot.constraint_preset",
+#     "version": 1,
+#     "bones": [
+#         {"pattern": "^forearm\\.(L|R)$",
+#          "constraints": [{"type": "IK", "name": "IK", "properties": {"target": "@SELF", "subtarget": "hand_ik.\\1", ...}}]}
+#     ]
+# }
+#
+# Bone patterns are regular expressions matched against the full bone name, the first matching entry wins.
+# Object pointers are stored by name, "@SELF" is the armature the preset is applied to.
+# String values of subtarget properties may use the pattern's groups (\1, \g<name>).
+PRESET_FORMAT = "rigbot.constraint_preset"
+PRESET_VERSION = 1
+SELF_TARGET = "@SELF"
+
+# Properties that are set before everything else, subtargets need their target to be valid
+_POINTER_FIRST = ("target", "pole_target")
+_SUBTARGET_PROPERTIES = ("subtarget", "pole_subtarget")
+_SKIPPED_PROPERTIES = {"rna_type", "type"}
+
+
+def _serialize_value(value, armature_obj):
+    if isinstance(value, bpy.types.Object):
+        return SELF_TARGET if value == armature_obj else value.name
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, "__len__") and not isinstance(value, str):
+        return [_serialize_value(item, armature_obj) for item in value]
+    return value
+
+def serialize_constraint(constraint, armature_obj):
+    """Returns a JSON-compatible dict describing the constraint type, name and editable properties."""
+    properties = {}
+    for prop in constraint.bl_rna.properties:
+        identifier = prop.identifier
+        if prop.is_readonly or identifier in _SKIPPED_PROPERTIES or identifier == "name":
+            continue
+        if prop.type == 'COLLECTION':
+            continue
+        if prop.type == 'POINTER' and prop.fixed_type.identifier != 'Object':
+            continue # Only object pointers (targets) are portable by name
+        properties[identifier] = _serialize_value(getattr(constraint, identifier), armature_obj)
+    return {"type": constraint.type, "name": constraint.name, "properties": properties}
+
+def capture_preset(armature_obj, bone_names=None):
+    """Captures the constraint stacks of the armature's pose bones (all bones with constraints by default)."""
+    entries = []
+    for pose_bone in armature_obj.pose.bones:
+        if bone_names is not None and pose_bone.name not in bone_names:
+            continue
+        if not pose_bone.constraints:
+            continue
+        entries.append({
+            "pattern": f"^{re.escape(pose_bone.name)}$",
+            "constraints": [serialize_constraint(constraint, armature_obj) for constraint in pose_bone.constraints],
+        })
+    return {"format": PRESET_FORMAT, "version": PRESET_VERSION, "bones": entries}
+
+def validate_preset(preset):
+    """Raises ValueError if the dict is not a constraint preset this version can read."""
+    if not isinstance(preset, dict) or preset.get("format") != PRESET_FORMAT:
+        raise ValueError("Not a RigBot constraint preset")
+    if preset.get("version", 0) > PRESET_VERSION:
+        raise ValueError(f"Preset version {preset.get('version')} is newer than supported ({PRESET_VERSION})")
+    for entry in preset.get("bones", []):
+        if not isinstance(entry, dict) or "pattern" not in entry or not isinstance(entry.get("constraints"), list):
+            raise ValueError("Preset bone entries need a 'pattern' and a 'constraints' list")
+        for description in entry["constraints"]:
+            if not isinstance(description, dict) or not isinstance(description.get("type"), str):
+                raise ValueError(f"Constraint entries of '{entry['pattern']}' need a 'type' string")
+            if not isinstance(description.get("name", ""), str):
+                raise ValueError(f"Constraint 'name' of '{entry['pattern']}' must be a string")
+            if not isinstance(description.get("properties", {}), dict):
+                raise ValueError(f"Constraint 'properties' of '{entry['pattern']}' must be an object")
+
+def save_preset(filepath, preset):
+    with open(filepath, "w", encoding="utf-8") as preset_file:
+        json.dump(preset, preset_file, indent=2)
+
+def load_preset(filepath):
+    with open(filepath, "r", encoding="utf-8") as preset_file:
+        preset = json.load(preset_file)
+    validate_preset(preset)
+    return preset
+
+def _resolve_object(value, armature_obj):
+    if value is None:
+        return None
+    if value == SELF_TARGET:
+        return armature_obj
+    return bpy.data.objects.get(value)
+
+def _apply_constraint(pose_bone, description, armature_obj, match, errors):
+    try:
+        constraint = pose_bone.constraints.new(description["type"])
+    except TypeError as e: # Unknown constraint type
+        errors.append(f"{pose_bone.name}/{description.get('name', description['type'])}: {e}")
+        return None
+    constraint.name = description.get("name", constraint.name)
+    properties = description.get("properties", {})
+
+    ordered_names = [name for name in _POINTER_FIRST if name in properties]
+    ordered_names += [name for name in properties if name not in _POINTER_FIRST]
+    for name in ordered_names:
+        value = properties[name]
+        try:
+            prop = constraint.bl_rna.properties.get(name)
+            if prop is None:
+                continue
+            if prop.type == 'POINTER':
+                value = _resolve_object(value, armature_obj)
+            elif name in _SUBTARGET_PROPERTIES and value and match is not None:
+                value = match.expand(value)
+            elif prop.type == 'ENUM' and prop.is_enum_flag:
+                value = set(value)
+            setattr(constraint, name, value)
+        except (AttributeError, TypeError, ValueError, re.error) as e:
+            errors.append(f"{pose_bone.name}/{constraint.name}.{name}: {e}")
+    return constraint
+
+def add_constraints(pose_bone, descriptions, armature_obj, match=None, replace=True, errors=None):
+    """Adds a stack of serialized constraints to a pose bone, replacing its constraints by default.
+
+    Subtargets are expanded with the groups of match when one is given. Constraint and property errors
+    are appended to errors. Returns the number of constraints added.
+    """
+    errors = errors if errors is not None else []
+    if replace:
+        for constraint in list(pose_bone.constraints):
+            pose_bone.constraints.remove(constraint)
+    added_count = 0
+    for description in descriptions:
+        if _apply_constraint(pose_bone, description, armature_obj, match, errors) is not None:
+            added_count += 1
+    return added_count
+
+def apply_preset(preset, armature_objs, replace=True):
+    """Stamps a preset onto one or many armatures in a single pass over each armature's pose bones.
+
+    With replace=True, existing constraints on matched bones are removed first.
+    Returns (number of constraints added, list of constraint and property errors).
+    """
+    compiled = [(re.compile(entry["pattern"]), entry["constraints"]) for entry in preset.get("bones", [])]
+    added_count = 0
+    errors = []
+
+    for armature_obj in armature_objs:
+        for pose_bone in armature_obj.pose.bones:
+            for pattern, descriptions in compiled:
+                match = pattern.fullmatch(pose_bone.name)
+                if match is None:
+                    continue
+                added_count += add_constraints(pose_bone, descriptions, armature_obj, match, replace, errors)
+                break # First matching entry wins
+
+    instrumentation.count(objects=len(armature_objs), constraints=added_count)
+    return added_count, errors
@@ -0,0 +1,101 @@
+import math
+import time
+from collections import namedtuple
+
+import bpy
+from bpy.app.handlers import persistent
+
+from . import instrumentation
+
+# Constraint cost profiling: the scene is stepped through a set of frames with frame_set() and the
+# depsgraph evaluation is timed once with every constraint of a rig active and once per constraint
+# with that constraint muted. A constraint's cost is the evaluation time it adds per frame.
+# Results are kept per armature object until the next profile run or file load.
+ConstraintProfile = namedtuple("ConstraintProfile", ("frame_ms", "constraint_ms", "bone_ms", "frames", "repeats"))
+# frame_ms: evaluation time per frame with all constraints active
+# constraint_ms: {(bone name, constraint name): ms per frame}, bone_ms: {bone name: ms per frame}
+
+_profiles = {} # armature object pointer -> ConstraintProfile
+
+
+def sample_frames(scene, count):
+    """Up to count frames spread evenly over the scene's frame range."""
+    start, end = scene.frame_start, scene.frame_end
+    if count <= 1 or end <= start:
+        return [scene.frame_current]
+    step = (end - start) / (count - 1)
+    return sorted({int(round(start + i * step)) for i in range(count)})
+
+def time_evaluation(scene, armature_obj, frames, repeats=3):
+    """Evaluation time in ms per frame, the fastest of `repeats` passes over frames.
+
+    The armature is tagged before every frame, so its pose is evaluated even when nothing is animated.
+    """
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for frame in frames:
+            armature_obj.update_tag(refresh={'OBJECT', 'DATA'})
+            scene.frame_set(frame)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0 / len(frames)
+
+def profile_constraints(scene, armature_obj, frames, repeats=3):
+    """Measures the per-frame cost of every unmuted constraint on the armature's pose bones.
+
+    Constraints are muted one at a time and restored afterwards, as is the current frame.
+    Returns the ConstraintProfile, which is also kept for get_profile().
+    """
+    active = [(pose_bone.name, constraint) for pose_bone in armature_obj.pose.bones
+              for constraint in pose_bone.constraints if not constraint.mute]
+    frame, subframe = scene.frame_current, scene.frame_subframe
+    constraint_ms = {}
+    try:
+        time_evaluation(scene, armature_obj, frames[:1], repeats=1) # Warm up caches
+        frame_ms = time_evaluation(scene, armature_obj, frames, repeats)
+        for bone_name, constraint in active:
+            constraint.mute = True
+            try:
+                muted_ms = time_evaluation(scene, armature_obj, frames, repeats)
+            finally:
+                constraint.mute = False
+            # Timing noise can make a cheap constraint look negative
+            constraint_ms[(bone_name, constraint.name)] = max(0.0, frame_ms - muted_ms)
+    finally:
+        scene.frame_set(frame, subframe=subframe)
+
+    bone_ms = {}
+    for (bone_name, _constraint_name), cost in constraint_ms.items():
+        bone_ms[bone_name] = bone_ms.get(bone_name, 0.0) + cost
+    profile = ConstraintProfile(frame_ms, constraint_ms, bone_ms, tuple(frames), repeats)
+    _profiles[armature_obj.as_pointer()] = profile
+    instrumentation.count(constraints=len(active), frames=len(frames) * repeats * (len(active) + 1))
+    return profile
+
+def hottest(profile, limit=10):
+    """The most expensive constraints as ((bone name, constraint name), ms) pairs, most expensive first."""
+    return sorted(profile.constraint_ms.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+def get_profile(armature_obj):
+    """The last ConstraintProfile of the armature object, or None."""
+    return _profiles.get(armature_obj.as_pointer())
+
+def invalidate(armature_obj=None):
+    """Drops the profile of one armature object, or all profiles."""
+    if armature_obj is None:
+        _profiles.clear()
+    else:
+        _profiles.pop(armature_obj.as_pointer(), None)
+
+@persistent
+def _on_load_post(*_args):
+    # Loading a file reuses data pointers
+    invalidate()
+
+def register():
+    bpy.app.handlers.load_post.append(_on_load_post)
+
+def unregister():
+    if _on_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_on_load_post)
+    invalidate()
@@ -0,0 +1,37 @@
+import bpy
+
+# RNA properties RigBot stores in .blend files and defaults shared by operator properties and the core
+# modules. Both are needed when the add-on is enabled, so this module stays free of the heavy
+# implementation modules (see pose_snapshots for the snapshot data layout).
+
+# Upper bound of (vertices x bones) distances evaluated at once, keeps memory flat on 1M-vertex meshes
+DEFAULT_CHUNK_ELEMENTS = 1 << 20
+# Steps between 0 and 1 that weights are quantized to before they are written (see weights)
+WEIGHT_RESOLUTION = 1024
+
+
+class RigBotPoseSnapshot(bpy.types.PropertyGroup):
+    """A captured pose: bone names and their packed channel values"""
+    bone_names: bpy.props.StringProperty(
+            name="Bone Names",
+            description="Newline separated names of the captured bones",
+            options={'HIDDEN'})
+    values: bpy.props.StringProperty(
+            name="Values",
+            description="Base64 encoded float32 channel values, one row per captured bone",
+            options={'HIDDEN'})
+    bone_count: bpy.props.IntProperty(
+            name="Bones",
+            description="Number of captured bones")
+
+def register():
+    bpy.utils.register_class(RigBotPoseSnapshot)
+    bpy.types.Object.rigbot_pose_snapshots = bpy.props.CollectionProperty(type=RigBotPoseSnapshot)
+    bpy.types.Object.rigbot_pose_snapshot_index = bpy.props.IntProperty(
+            name="Active Pose Snapshot", default=0, min=0,
+            description="Active entry of the RigBot pose snapshot list")
+
+def unregister():
+    del bpy.types.Object.rigbot_pose_snapshot_index
+    del bpy.types.Object.rigbot_pose_snapshots
+    bpy.utils.unregister_class(RigBotPoseSnapshot)
@@ -0,0 +1,165 @@
+import re
+
+from . import cache
+from . import instrumentation
+from . import name_match
+from . import selection
+
+# Bulk bone renames: plan_renames builds an old -> new name map from a rule, apply_renames renames the
+# bones and rewrites every reference to them from that map in one pass.
+# Blender stores names in 64 byte buffers (63 bytes plus terminator) and truncates longer ones.
+MAX_NAME_BYTES = 63
+_trailing_number = re.compile(r"(\d+)$")
+
+
+def _template_fields(name, index):
+    base, side = name_match.split_side(name)
+    number = _trailing_number.search(base)
+    return {
+        "name": name,
+        "base": base,
+        "side": side,
+        "number": number.group(1) if number else "",
+        "index": index,
+    }
+
+def plan_renames(names, mode, pattern="", replacement="", template="", flags=0, only=None):
+    """Builds the old -> new name map of a bulk rename, leaving out names that don't change.
+
+    mode is 'REGEX' (pattern replaced by replacement, re.sub syntax), 'TEMPLATE' (str.format template
+    with the fields {name}, {base}, {side}, {number} and {index}) or 'MIRROR' (side tokens flipped).
+    With only (a set of names), other names are kept. Returns (mapping, conflicts): conflicts lists
+    the problems that make the map unusable, such as two bones ending up with the same name.
+    Raises re.error for invalid patterns and ValueError for invalid templates.
+    """
+    regex = re.compile(pattern, flags) if mode == 'REGEX' else None
+    mapping = {}
+    index = 0
+    for name in names:
+        if only is not None and name not in only:
+            continue
+        if mode == 'REGEX':
+            new_name = regex.sub(replacement, name)
+        elif mode == 'TEMPLATE':
+            try:
+                new_name = template.format(**_template_fields(name, index))
+            except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid template field {e}") from None
+            index += 1
+        else:
+            new_name = name_match.flip_side_name(name)
+        if new_name != name:
+            mapping[name] = new_name
+
+    conflicts = []
+    taken = {} # final name -> old name
+    for name in names:
+        final_name = mapping.get(name, name)
+        if not final_name:
+            conflicts.append(f"'{name}' would get an empty name")
+        elif len(final_name.encode("utf-8")) > MAX_NAME_BYTES:
+            conflicts.append(f"'{final_name}' is longer than {MAX_NAME_BYTES} bytes")
+        elif final_name in taken:
+            conflicts.append(f"'{taken[final_name]}' and '{name}' would both be named '{final_name}'")
+        else:
+            taken[final_name] = name
+    return mapping, conflicts
+
+def _bound_meshes(armature_obj, objects):
+    """Objects whose vertex groups belong to the armature: deformed by it or parented to it."""
+    return [obj for obj in objects if obj.type == 'MESH' and (
+            obj.parent == armature_obj or
+            any(modifier.type == 'ARMATURE' and modifier.object == armature_obj for modifier in obj.modifiers))]
+
+def _constraint_owners(objects):
+    for obj in objects:
+        yield obj.constraints
+        if obj.type == 'ARMATURE' and obj.pose:
+            for pose_bone in obj.pose.bones:
+                yield pose_bone.constraints
+
+def collect_references(armature_obj, mapping, objects, rename_objects=True, rules=None):
+    """Snapshots every reference to a bone in mapping as (kind, owner, attribute, old bone name) tuples.
+
+    Covers constraint subtarget/pole_subtarget strings targeting the armature, vertex groups of meshes
+    bound to it, parent_bone of objects parented to it and, with rename_objects, names of objects
+    matched to a bone by name (see parenting by name) that contain the bone name verbatim.
+    """
+    references = []
+    for constraints in _constraint_owners(objects):
+        for constraint in constraints:
+            if getattr(constraint, "target", None) == armature_obj and getattr(constraint, "subtarget", "") in mapping:
+                references.append(("constraints", constraint, "subtarget", constraint.subtarget))
+            if getattr(constraint, "pole_target", None) == armature_obj and constraint.pole_subtarget in mapping:
+                references.append(("constraints", constraint, "pole_subtarget", constraint.pole_subtarget))
+
+    for mesh_obj in _bound_meshes(armature_obj, objects):
+        references.extend(("vertex_groups", group, "name", group.name)
+                          for group in mesh_obj.vertex_groups if group.name in mapping)
+
+    for obj in objects:
+        if obj.parent == armature_obj and obj.parent_type == 'BONE' and obj.parent_bone in mapping:
+            references.append(("parents", obj, "parent_bone", obj.parent_bone))
+
+    if rename_objects:
+        name_index = name_match.get_bone_name_index(armature_obj.data, rules or name_match.NameMatchRules())
+        for obj in objects:
+            bone_name = name_index.match(obj.name)
+            if bone_name in mapping and obj != armature_obj and bone_name in obj.name:
+                references.append(("objects", obj, "name", bone_name))
+    return references
+
+def _rename_bones(bones, mapping):
+    # Bones whose new name is still taken by another bone of the map (swaps, shifts) go through a
+    # temporary name first, so Blender never appends a .001 suffix
+    names = set(bones.keys())
+    staged = []
+    for old_name, new_name in mapping.items():
+        bone = bones[old_name]
+        if new_name in names:
+            temporary = f"{old_name}~rename{len(staged)}"
+            while temporary in names:
+                temporary += "~"
+            bone.name = temporary
+            names.add(temporary)
+            staged.append((bone, new_name))
+        else:
+            bone.name = new_name
+            names.add(new_name)
+        names.discard(old_name)
+    for bone, new_name in staged:
+        bone.name = new_name
+
+def apply_renames(armature_obj, mapping, objects, rename_objects=True, rules=None):
+    """Renames bones of the armature after plan_renames() and rewrites the references to them.
+
+    References are collected once before renaming and rewritten from the map afterwards, values that
+    are already up to date are left alone. Returns a dict of counts per reference kind.
+    """
+    objects = list(objects)
+    references = collect_references(armature_obj, mapping, objects, rename_objects, rules)
+    _rename_bones(selection.mode_bones(armature_obj), mapping)
+
+    counts = {"bones": len(mapping), "constraints": 0, "vertex_groups": 0, "parents": 0, "objects": 0}
+    staged = [] # (owner, final name)
+    for kind, owner, attribute, old_name in references:
+        if kind == "objects":
+            value = owner.name.replace(old_name, mapping[old_name], 1)
+        else:
+            value = mapping[old_name]
+        # Blender's own rename handling may have updated the reference already
+        if getattr(owner, attribute) != value:
+            if attribute == "name":
+                # Object and vertex group names are unique too, like the bones they go through a
+                # temporary name so swaps (arm.L <-> arm.R) don't end up with a .001 suffix
+                owner.name = f"{owner.name}~rename{len(staged)}"
+                staged.append((owner, value))
+            else:
+                setattr(owner, attribute, value)
+        counts[kind] += 1
+    for owner, value in staged:
+        owner.name = value
+
+    cache.invalidate(armature_obj.data)
+    instrumentation.count(bones=len(mapping), objects=counts["objects"])
+    return counts
@@ -0,0 +1,99 @@
+import re
+
+from . import instrumentation
+from . import topology
+
+
+def mode_bones(armature_obj):
+    """Returns the bone collection that holds selection in the armature's current mode."""
+    armature_data = armature_obj.data
+    return armature_data.edit_bones if armature_obj.mode == 'EDIT' else armature_data.bones
+
+def mode_topology(armature_obj):
+    """The cached BoneTopology when its indices match mode_bones(), None in Edit Mode (edit bones differ)."""
+    return None if armature_obj.mode == 'EDIT' else topology.get_topology(armature_obj.data)
+
+def indices_from_names(bones, names, bone_topology=None):
+    """Indices of the given bone names, unknown names are ignored."""
+    index_of = bone_topology.index_of if bone_topology is not None else {name: i for i, name in enumerate(bones.keys())}
+    return [index_of[name] for name in names if name in index_of]
+
+def indices_from_pattern(bones, pattern, flags=0):
+    """Indices of the bones whose name matches the regular expression (re.search semantics)."""
+    regex = re.compile(pattern, flags)
+    return [i for i, name in enumerate(bones.keys()) if regex.search(name)]
+
+def indices_from_collection(bones, collection_name):
+    """Indices of the bones assigned to the named bone collection."""
+    # Works for edit bones too, BoneCollection.bones is empty in Edit Mode
+    return [i for i, bone in enumerate(bones)
+            if any(bone_collection.name == collection_name for bone_collection in bone.collections)]
+
+def indices_from_subtree(bones, root_name, bone_topology=None):
+    """Indices of the root bone and all of its descendants."""
+    if bone_topology is not None:
+        root_index = bone_topology.index(root_name)
+        return bone_topology.subtree(root_index).tolist() if root_index >= 0 else []
+    root = bones.get(root_name)
+    if root is None:
+        return []
+    return indices_from_names(bones, [root.name] + [bone.name for bone in root.children_recursive])
+
+def indices_from_chain(bones, root_name, bone_topology=None):
+    """Indices of the root bone and the run of single-child bones below it."""
+    if bone_topology is not None:
+        root_index = bone_topology.index(root_name)
+        return bone_topology.chain_from(root_index) if root_index >= 0 else []
+    bone = bones.get(root_name)
+    chain = []
+    while bone is not None:
+        chain.append(bone.name)
+        children = bone.children
+        bone = children[0] if len(children) == 1 else None
+    return indices_from_names(bones, chain)
+
+def select_bones(armature_obj, indices, extend=False, deselect=False, active_index=None):
+    """Sets the selection state of a set of bones with one foreach_set per flag, without mode switches.
+
+    indices refer to mode_bones(armature_obj). Without extend, every other bone is deselected.
+    Hidden bones are left untouched. Returns the number of bones whose state was written.
+    """
+    bones = mode_bones(armature_obj)
+    edit_mode = armature_obj.mode == 'EDIT'
+    bone_count = len(bones)
+    flag_names = ("select", "select_head", "select_tail") if edit_mode else ("select",)
+
+    hidden = [False] * bone_count
+    bones.foreach_get("hide", hidden)
+
+    value = not deselect
+    written = 0
+    for flag_name in flag_names:
+        state = [False] * bone_count
+        bones.foreach_get(flag_name, state)
+        if not (extend or deselect):
+            # Hidden bones keep their state when everything else is cleared
+            state = [selected and is_hidden for selected, is_hidden in zip(state, hidden)]
+        written = 0
+        for i in indices:
+            if not hidden[i]:
+                state[i] = value
+                written += 1
+        bones.foreach_set(flag_name, state)
+
+    if active_index is not None and not hidden[active_index]:
+        bones.active = bones[active_index]
+
+    # foreach_set bypasses RNA updates, tag the armature so the evaluated copy picks up the change
+    armature_obj.data.update_tag()
+    instrumentation.count(bones=written)
+    return written
+
+def tag_redraw(context):
+    """Redraws the areas showing bone selection. Does nothing without a screen (background mode)."""
+    screen = context.screen
+    if screen is None:
+        return
+    for area in screen.areas:
+        if area.type in {'VIEW_3D', 'OUTLINER', 'PROPERTIES'}:
+            area.tag_redraw()
@@ -0,0 +1,279 @@
+import json
+import math
+import os
+from collections import namedtuple
+
+import bpy
+import numpy as np
+
+from . import cache
+from . import instrumentation
+
+# Skeleton templates are JSON documents of the form
+#
+# {
+#     "format": "rigbot.skeleton_template",
+#     "version": 1,
+#     "name": "Humanoid",
+#     "mirror": true,
+#     "bones": [
+#         {"name": "upper_arm.L", "head": [0.18, 0, 1.45], "tail": [0.45, 0, 1.45], "roll": 0.0,
+#          "parent": "shoulder.L", "connect": false, "deform": true}
+#     ]
+# }
+#
+# Coordinates are in meters (Z up, facing -Y), roll is in degrees. "roll", "parent", "connect" and "deform"
+# are optional. With "mirror", every ".L" bone gets a ".R" copy mirrored on X.
+TEMPLATE_FORMAT = "rigbot.skeleton_template"
+TEMPLATE_VERSION = 1
+# Upper bound of procedurally generated bones, branching tentacles grow exponentially with their depth
+MAX_GENERATED_BONES = 50000
+TEMPLATE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+# Bone placement as parallel arrays: names (list), heads/tails (N x 3), rolls (N, radians),
+# parents (N, index or -1), connect/deform (N, bool). Parents always come before their children.
+BoneLayout = namedtuple("BoneLayout", ("names", "heads", "tails", "rolls", "parents", "connect", "deform"))
+
+
+def list_templates(directory=TEMPLATE_DIRECTORY):
+    """(identifier, display name, path) of the template files in a directory, sorted by name."""
+    templates = []
+    for filename in sorted(os.listdir(directory)) if os.path.isdir(directory) else ():
+        if not filename.endswith(".json"):
+            continue
+        path = os.path.join(directory, filename)
+        identifier = os.path.splitext(filename)[0]
+        try:
+            with open(path, "r", encoding="utf-8") as template_file:
+                name = json.load(template_file).get("name", identifier)
+        except (OSError, ValueError):
+            continue
+        templates.append((identifier, name, path))
+    return templates
+
+def load_template(filepath):
+    """Reads a template file and returns its BoneLayout."""
+    with open(filepath, "r", encoding="utf-8") as template_file:
+        template = json.load(template_file)
+    if not isinstance(template, dict) or template.get("format") != TEMPLATE_FORMAT:
+        raise ValueError("Not a RigBot skeleton template")
+    if template.get("version", 0) > TEMPLATE_VERSION:
+        raise ValueError(f"Template version {template.get('version')} is newer than supported ({TEMPLATE_VERSION})")
+    return template_layout(template)
+
+def template_layout(template):
+    """Converts a template dict to a BoneLayout, adding the mirrored side when requested."""
+    entries = template.get("bones", [])
+    names = [entry["name"] for entry in entries]
+    parent_names = [entry.get("parent") for entry in entries]
+    heads = np.array([entry["head"] for entry in entries], dtype=np.float64).reshape(-1, 3)
+    tails = np.array([entry["tail"] for entry in entries], dtype=np.float64).reshape(-1, 3)
+    rolls = np.radians(np.array([entry.get("roll", 0.0) for entry in entries], dtype=np.float64))
+    connect = np.array([entry.get("connect", False) for entry in entries], dtype=bool)
+    deform = np.array([entry.get("deform", True) for entry in entries], dtype=bool)
+
+    if template.get("mirror"):
+        left = np.flatnonzero([name.endswith(".L") for name in names])
+        mirror_x = np.array((-1.0, 1.0, 1.0))
+        names = names + [names[i][:-2] + ".R" for i in left]
+        parent_names = parent_names + [
+            parent_names[i][:-2] + ".R" if parent_names[i] and parent_names[i].endswith(".L") else parent_names[i]
+            for i in left]
+        heads = np.concatenate((heads, heads[left] * mirror_x))
+        tails = np.concatenate((tails, tails[left] * mirror_x))
+        rolls = np.concatenate((rolls, -rolls[left]))
+        connect = np.concatenate((connect, connect[left]))
+        deform = np.concatenate((deform, deform[left]))
+
+    index_of = {name: i for i, name in enumerate(names)}
+    if len(index_of) != len(names):
+        raise ValueError("Template bone names must be unique")
+    missing = sorted({name for name in parent_names if name and name not in index_of})
+    if missing:
+        raise ValueError(f"Template parent bone(s) not found: {', '.join(missing)}")
+    parents = np.array([index_of[name] if name else -1 for name in parent_names], dtype=np.int64)
+    return _parents_first(BoneLayout(names, heads, tails, rolls, parents, connect, deform))
+
+def _parents_first(layout):
+    """Reorders a layout so parents precede their children (templates may list bones in any order)."""
+    count = len(layout.names)
+    depth = np.zeros(count, dtype=np.int64)
+    current = layout.parents.copy()
+    for _ in range(count):
+        has_parent = current >= 0
+        if not has_parent.any():
+            break
+        depth[has_parent] += 1
+        current[has_parent] = layout.parents[current[has_parent]]
+    else:
+        if count and (current >= 0).any():
+            raise ValueError("Template parents form a cycle")
+    order = np.argsort(depth, kind="stable")
+    if (order == np.arange(count)).all():
+        return layout
+    new_index = np.empty(count, dtype=np.int64)
+    new_index[order] = np.arange(count)
+    parents = layout.parents[order]
+    return BoneLayout([layout.names[i] for i in order], layout.heads[order], layout.tails[order], layout.rolls[order],
+                      np.where(parents >= 0, new_index[np.maximum(parents, 0)], -1),
+                      layout.connect[order], layout.deform[order])
+
+def chain_layout(segments, length=1.0, direction=(0.0, 0.0, 1.0), taper=1.0, name="Chain"):
+    """A straight chain of connected bones, each segment `taper` times as long as the previous one."""
+    _check_bone_count(segments)
+    direction = np.asarray(direction, dtype=np.float64)
+    direction = direction / max(np.linalg.norm(direction), 1e-12)
+    scales = taper ** np.arange(segments, dtype=np.float64)
+    segment_lengths = length * scales / scales.sum()
+    ends = np.cumsum(segment_lengths)[:, None] * direction
+    heads = np.vstack((np.zeros((1, 3)), ends[:-1]))
+    parents = np.arange(segments) - 1
+    return BoneLayout([f"{name}.{i:03d}" for i in range(segments)], heads, ends, np.zeros(segments),
+                      parents, parents >= 0, np.ones(segments, dtype=bool))
+
+def _rotate(vectors, axes, angles):
+    """Rotates vectors (N x 3) around unit axes (N x 3) by angles (N), Rodrigues' formula."""
+    cos = np.cos(angles)[:, None]
+    sin = np.sin(angles)[:, None]
+    return (vectors * cos + np.cross(axes, vectors) * sin +
+            axes * (axes * vectors).sum(axis=1, keepdims=True) * (1.0 - cos))
+
+def _perpendicular(vectors):
+    """A unit vector perpendicular to each of the unit vectors (N x 3)."""
+    helper = np.where(np.abs(vectors[:, 2:3]) < 0.9, (0.0, 0.0, 1.0), (1.0, 0.0, 0.0))
+    perpendicular = np.cross(vectors, helper)
+    return perpendicular / np.linalg.norm(perpendicular, axis=1, keepdims=True)
+
+def _check_bone_count(bone_count):
+    if bone_count > MAX_GENERATED_BONES:
+        raise ValueError(f"{bone_count} bones requested, at most {MAX_GENERATED_BONES} can be generated")
+
+def tentacle_bone_count(segments, branches, depth):
+    """Number of bones of tentacle_layout(): every chain has `segments` bones, level n has branches**n chains."""
+    return segments * sum(branches ** level for level in range(depth))
+
+def tentacle_layout(segments=6, branches=2, depth=3, length=1.0, spread=35.0, taper=0.7, name="Tentacle"):
+    """A branching tentacle: a chain of `segments` bones that splits into `branches` chains, `depth` levels deep.
+
+    Every level is placed for all its chains at once. Child chains fan out by `spread` degrees around
+    their parent's direction and are `taper` times as long. Raises ValueError above MAX_GENERATED_BONES.
+    """
+    _check_bone_count(tentacle_bone_count(segments, branches, depth))
+    names = []
+    head_blocks, tail_blocks, parent_blocks = [], [], []
+    # Per chain of the current level: start point, unit direction, chain length, parent bone index, name
+    starts = np.zeros((1, 3))
+    directions = np.array([[0.0, 0.0, 1.0]])
+    chain_lengths = np.array([length])
+    chain_parents = np.array([-1])
+    chain_names = [name]
+    offset = 0
+
+    for level in range(depth):
+        chain_count = len(starts)
+        steps = np.arange(segments + 1, dtype=np.float64) / segments
+        # (chains, segments + 1, 3) joint positions along every chain of this level
+        joints = starts[:, None, :] + steps[None, :, None] * (directions * chain_lengths[:, None])[:, None, :]
+        head_blocks.append(joints[:, :-1].reshape(-1, 3))
+        tail_blocks.append(joints[:, 1:].reshape(-1, 3))
+
+        bone_index = offset + np.arange(chain_count * segments).reshape(chain_count, segments)
+        level_parents = np.empty((chain_count, segments), dtype=np.int64)
+        level_parents[:, 0] = chain_parents
+        level_parents[:, 1:] = bone_index[:, :-1]
+        parent_blocks.append(level_parents.ravel())
+        names.extend(f"{chain_name}.{i:03d}" for chain_name in chain_names for i in range(segments))
+        offset += chain_count * segments
+
+        if level == depth - 1:
+            break
+        # Children fan out around the parent direction, evenly distributed around it
+        repeated = np.repeat(directions, branches, axis=0)
+        twist = np.tile(np.arange(branches) * (2.0 * math.pi / branches), chain_count)
+        bend_axes = _rotate(_perpendicular(repeated), repeated, twist)
+        directions = _rotate(repeated, bend_axes, np.full(len(repeated), math.radians(spread)))
+        starts = np.repeat(joints[:, -1], branches, axis=0)
+        chain_lengths = np.repeat(chain_lengths * taper, branches)
+        chain_parents = np.repeat(bone_index[:, -1], branches)
+        chain_names = [f"{chain_name}_{branch}" for chain_name in chain_names for branch in range(branches)]
+
+    heads = np.concatenate(head_blocks)
+    parents = np.concatenate(parent_blocks)
+    count = len(names)
+    return BoneLayout(names, heads, np.concatenate(tail_blocks), np.zeros(count),
+                      parents, parents >= 0, np.ones(count, dtype=bool))
+
+def transform_layout(layout, scale=1.0, offset=(0.0, 0.0, 0.0)):
+    """Scales and moves all bone positions of a layout."""
+    offset = np.asarray(offset, dtype=np.float64)
+    return layout._replace(heads=layout.heads * scale + offset, tails=layout.tails * scale + offset)
+
+def make_layout(template, segments=6, branches=2, depth=3, length=1.0, spread=35.0, taper=0.8):
+    """BoneLayout for a template identifier: 'CHAIN', 'TENTACLE', a template file name or a path to a template."""
+    if template == 'CHAIN':
+        return chain_layout(segments, length, taper=taper)
+    if template == 'TENTACLE':
+        return tentacle_layout(segments, branches, depth, length, spread, taper)
+    if os.path.isfile(template):
+        return load_template(template)
+    for identifier, _name, path in list_templates():
+        if identifier == template:
+            return load_template(path)
+    raise ValueError(f"Skeleton template '{template}' not found")
+
+def new_armature_object(name, collection, location=(0.0, 0.0, 0.0)):
+    """Creates an armature object without operators, with axes/names/in-front display enabled."""
+    armature_data = bpy.data.armatures.new(name)
+    armature_data.show_axes = True
+    armature_data.show_names = True
+    armature_obj = bpy.data.objects.new(name, armature_data)
+    armature_obj.location = location
+    armature_obj.show_in_front = True
+    collection.objects.link(armature_obj)
+    return armature_obj
+
+def build_skeleton(armature_obj, layout, view_layer=None):
+    """Creates the bones of a layout in one Edit Mode session of armature_obj.
+
+    Bones are created with edit_bones.new(), their head/tail/roll and flags are written with foreach_set.
+    armature_obj becomes the active object of view_layer (the context's by default) and its previous mode
+    is restored afterwards, so this works headless too. Returns the names the new bones were given.
+    """
+    view_layer = view_layer or bpy.context.view_layer
+    view_layer.objects.active = armature_obj
+    previous_mode = armature_obj.mode
+    if previous_mode != 'EDIT':
+        bpy.ops.object.mode_set(mode='EDIT')
+        instrumentation.count(mode_switches=1)
+
+    try:
+        edit_bones = armature_obj.data.edit_bones
+        existing = len(edit_bones)
+        new_bones = [edit_bones.new(name) for name in layout.names]
+        total = len(edit_bones)
+
+        def write(property_name, values, size):
+            # foreach_set covers the whole collection, keep the values of pre-existing bones
+            current = np.empty(total * size, dtype=np.float32 if values.dtype.kind == 'f' else np.int32)
+            edit_bones.foreach_get(property_name, current)
+            current.reshape(total, size)[existing:] = values.reshape(-1, size)
+            edit_bones.foreach_set(property_name, current)
+
+        write("head", layout.heads.astype(np.float32), 3)
+        write("tail", layout.tails.astype(np.float32), 3)
+        write("roll", layout.rolls.astype(np.float32), 1)
+        write("use_deform", layout.deform.astype(np.int32), 1)
+        # Pointers have no foreach_set, parents are assigned one by one
+        for bone, parent_index in zip(new_bones, layout.parents.tolist()):
+            if parent_index >= 0:
+                bone.parent = new_bones[parent_index]
+        write("use_connect", layout.connect.astype(np.int32), 1)
+        names = [bone.name for bone in new_bones]
+    finally:
+        if previous_mode != 'EDIT':
+            bpy.ops.object.mode_set(mode=previous_mode)
+            instrumentation.count(mode_switches=1)
+
+    cache.invalidate(armature_obj.data)
+    instrumentation.count(bones=len(names))
+    return names
@@ -0,0 +1,256 @@
+from collections import deque
+
+import numpy as np
+
+from . import instrumentation
+from . import skeleton_gen
+
+# Quality presets: (vertex sample size, voxels along the largest bounding box side)
+QUALITY_SETTINGS = {
+    'FAST': (8000, 40),
+    'BALANCED': (25000, 72),
+    'HIGH': (80000, 128),
+}
+# The 26 neighbour offsets of a voxel
+_NEIGHBOUR_OFFSETS = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)
+                               if (x, y, z) != (0, 0, 0)], dtype=np.int64)
+
+
+def sample_points(points, sample_count, seed=0):
+    """A deterministic random subset of at most sample_count points."""
+    if len(points) <= sample_count:
+        return points
+    return points[np.random.default_rng(seed).choice(len(points), sample_count, replace=False)]
+
+def voxelize(points, resolution):
+    """Bins points into a voxel grid with `resolution` voxels along the largest bounding box side.
+
+    Returns (voxel integer coordinates (V x 3), voxel centroids (V x 3), points per voxel, voxel size).
+    """
+    low = points.min(axis=0)
+    voxel_size = max(float((points.max(axis=0) - low).max()) / resolution, 1e-9)
+    cells = np.floor((points - low) / voxel_size).astype(np.int64)
+    cells, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    centroids = np.stack([np.bincount(inverse, weights=points[:, axis], minlength=len(cells))
+                          for axis in range(3)], axis=1) / counts[:, None]
+    return cells, centroids, counts, voxel_size
+
+def voxel_adjacency(cells):
+    """Edges (E x 2, both directions) between voxels that touch, including diagonally."""
+    span = cells.max(axis=0) + 3
+    # Shift by one so neighbour offsets never leave the key space
+    keys = ((cells[:, 0] + 1) * span[1] + cells[:, 1] + 1) * span[2] + cells[:, 2] + 1
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    offset_keys = (_NEIGHBOUR_OFFSETS[:, 0] * span[1] + _NEIGHBOUR_OFFSETS[:, 1]) * span[2] + _NEIGHBOUR_OFFSETS[:, 2]
+
+    sources, targets = [], []
+    for offset_key in offset_keys:
+        wanted = keys + offset_key
+        found = np.minimum(np.searchsorted(sorted_keys, wanted), len(sorted_keys) - 1)
+        hit = sorted_keys[found] == wanted
+        sources.append(np.flatnonzero(hit))
+        targets.append(order[found[hit]])
+    return np.stack((np.concatenate(sources), np.concatenate(targets)), axis=1)
+
+def hop_distances(vertex_count, edges, seed):
+    """Breadth-first hop counts from seed over an edge list, -1 for unreachable vertices.
+
+    Expands whole frontiers at a time with NumPy.
+    """
+    order = np.argsort(edges[:, 0], kind="stable")
+    targets = edges[order, 1]
+    starts = np.searchsorted(edges[order, 0], np.arange(vertex_count + 1))
+    distance = np.full(vertex_count, -1, dtype=np.int64)
+    distance[seed] = 0
+    frontier = np.array([seed])
+    hops = 0
+    while len(frontier):
+        hops += 1
+        counts = starts[frontier + 1] - starts[frontier]
+        neighbours = targets[np.repeat(starts[frontier] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+        frontier = np.unique(neighbours[distance[neighbours] < 0])
+        distance[frontier] = hops
+    return distance
+
+def connected_labels(vertex_count, edges):
+    """Connected component label (smallest member index) per vertex, by label propagation with pointer jumping."""
+    labels = np.arange(vertex_count)
+    while True:
+        low = np.minimum(labels[edges[:, 0]], labels[edges[:, 1]])
+        previous = labels.copy()
+        np.minimum.at(labels, edges[:, 0], low)
+        np.minimum.at(labels, edges[:, 1], low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+def level_set_graph(centroids, counts, edges, seed, level_step=1):
+    """Curve skeleton nodes from level sets of the hop distance to seed.
+
+    Voxels are grouped into levels of `level_step` hops, every connected piece of a level becomes a node
+    at its centroid (on the medial axis of tube-like parts) and is linked to the piece of the previous
+    level it touches most. Returns (node positions, parent node per node, -1 for the seed's node).
+    """
+    distance = hop_distances(len(centroids), edges, seed)
+    reached = distance >= 0
+    level = np.where(reached, distance // level_step, -1)
+
+    same_level = edges[(level[edges[:, 0]] == level[edges[:, 1]]) & reached[edges[:, 0]]]
+    labels = connected_labels(len(centroids), same_level)
+    component_ids, component = np.unique(labels[reached], return_inverse=True)
+    node_of = np.full(len(centroids), -1, dtype=np.int64)
+    node_of[reached] = component.ravel()
+    node_count = len(component_ids)
+
+    weights = counts[reached].astype(np.float64)
+    positions = np.stack([np.bincount(node_of[reached], weights=centroids[reached, axis] * weights, minlength=node_count)
+                          for axis in range(3)], axis=1)
+    positions /= np.bincount(node_of[reached], weights=weights, minlength=node_count)[:, None]
+
+    # Links from each node to the previous level, the parent is the node with the most touching voxel pairs
+    up = edges[reached[edges[:, 0]] & (level[edges[:, 1]] == level[edges[:, 0]] - 1)]
+    pairs, pair_counts = np.unique(np.stack((node_of[up[:, 0]], node_of[up[:, 1]]), axis=1), axis=0, return_counts=True)
+    order = np.lexsort((-pair_counts, pairs[:, 0]))
+    pairs = pairs[order]
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = pairs[1:, 0] != pairs[:-1, 0]
+    parents = np.full(node_count, -1, dtype=np.int64)
+    parents[pairs[first, 0]] = pairs[first, 1]
+    return positions, parents
+
+def _undirected(parents):
+    neighbours = [set() for _ in range(len(parents))]
+    for child, parent in enumerate(parents.tolist()):
+        if parent >= 0:
+            neighbours[child].add(parent)
+            neighbours[parent].add(child)
+    return neighbours
+
+def prune_branches(positions, neighbours, min_length, keep):
+    """Removes leaf branches shorter than min_length (in place), never removing the node `keep`."""
+    removed = set()
+    for _ in range(3): # Removing twigs can expose new short ones, a few passes are enough
+        changed = False
+        for leaf in range(len(neighbours)):
+            if leaf == keep or leaf in removed or len(neighbours[leaf]) != 1:
+                continue
+            branch = [leaf]
+            length = 0.0
+            previous, node = leaf, next(iter(neighbours[leaf]))
+            while len(neighbours[node]) == 2 and node != keep:
+                length += float(np.linalg.norm(positions[node] - positions[previous]))
+                branch.append(node)
+                previous, node = node, next(n for n in neighbours[node] if n != previous)
+            length += float(np.linalg.norm(positions[node] - positions[previous]))
+            # Only twigs off a junction (or off the root) are removed, never the last remaining path
+            at_junction = len(neighbours[node]) >= 3 or (node == keep and len(neighbours[node]) >= 2)
+            if length >= min_length or not at_junction:
+                continue
+            for member in branch:
+                for other in neighbours[member]:
+                    neighbours[other].discard(member)
+                neighbours[member] = set()
+                removed.add(member)
+            changed = True
+        if not changed:
+            break
+    return removed
+
+def tree_chains(neighbours, root):
+    """Splits the tree reachable from root into chains of node indices between the root, junctions and leaves.
+
+    Returns [(node path starting at the chain's parent node, parent chain index or -1)], parents first.
+    """
+    chains = []
+    visited = {root}
+    pending = deque((root, child, -1) for child in sorted(neighbours[root]))
+    while pending:
+        start, node, parent_chain = pending.popleft()
+        path = [start, node]
+        visited.add(node)
+        while True:
+            children = [n for n in sorted(neighbours[node]) if n not in visited]
+            if len(children) != 1:
+                break
+            node = children[0]
+            visited.add(node)
+            path.append(node)
+        chains.append((path, parent_chain))
+        pending.extend((node, child, len(chains) - 1) for child in children)
+        visited.update(children)
+    return chains
+
+def _smooth_polyline(points, iterations=2):
+    for _ in range(iterations):
+        if len(points) < 3:
+            break
+        points = np.vstack((points[:1], (points[:-2] + 2.0 * points[1:-1] + points[2:]) * 0.25, points[-1:]))
+    return points
+
+def _resample_polyline(points, bone_length):
+    segment_lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    arc = np.concatenate(([0.0], np.cumsum(segment_lengths)))
+    count = max(1, int(round(arc[-1] / bone_length)))
+    targets = np.linspace(0.0, arc[-1], count + 1)
+    return np.stack([np.interp(targets, arc, points[:, axis]) for axis in range(3)], axis=1)
+
+def skeleton_from_points(points, quality='BALANCED', bone_length=None, min_branch_length=None, name="Limb"):
+    """Estimates a curve skeleton of a point cloud and returns it as a skeleton_gen.BoneLayout.
+
+    Pipeline: random sample, voxelization, level sets of the voxel hop distance from an extremity,
+    one node per connected level piece, twig pruning, then bone chains between junctions resampled
+    to about bone_length (default: 1/16 of the largest bounding box side). The hierarchy is rooted at
+    the node closest to the centroid of the points.
+    """
+    sample_count, resolution = QUALITY_SETTINGS[quality]
+    points = sample_points(np.asarray(points, dtype=np.float64), sample_count)
+    cells, centroids, counts, voxel_size = voxelize(points, resolution)
+    edges = voxel_adjacency(cells)
+    size = voxel_size * resolution
+    bone_length = bone_length or size / 16.0
+    min_branch_length = min_branch_length or size / 12.0
+
+    # Seed the level sets at an extremity: the voxel farthest (in hops) from the one nearest the centroid
+    center_voxel = int(np.argmin(np.linalg.norm(centroids - points.mean(axis=0), axis=1)))
+    from_center = hop_distances(len(centroids), edges, center_voxel)
+    seed = int(np.argmax(from_center))
+    positions, parents = level_set_graph(centroids, counts, edges, seed, level_step=max(1, resolution // 64))
+
+    neighbours = _undirected(parents)
+    root = int(np.argmin(np.linalg.norm(positions - points.mean(axis=0), axis=1)))
+    prune_branches(positions, neighbours, min_branch_length, keep=root)
+
+    names, heads, tails, bone_parents = [], [], [], []
+    chain_last_bone = []
+    for chain_index, (path, parent_chain) in enumerate(tree_chains(neighbours, root)):
+        joints = _resample_polyline(_smooth_polyline(positions[path]), bone_length)
+        first = len(names)
+        names.extend(f"{name}{chain_index:02d}_{i:02d}" for i in range(len(joints) - 1))
+        heads.append(joints[:-1])
+        tails.append(joints[1:])
+        bone_parents.append(np.arange(first - 1, len(names) - 1))
+        bone_parents[-1][0] = chain_last_bone[parent_chain] if parent_chain >= 0 else -1
+        chain_last_bone.append(len(names) - 1)
+
+    count = len(names)
+    if not count:
+        raise ValueError("No skeleton could be estimated from the points")
+    parents = np.concatenate(bone_parents)
+    instrumentation.count(bones=count)
+    return skeleton_gen.BoneLayout(names, np.concatenate(heads), np.concatenate(tails), np.zeros(count),
+                                   parents, parents >= 0, np.ones(count, dtype=bool))
+
+def read_world_points(mesh_obj):
+    """World-space vertex positions of a mesh object, read with one foreach_get."""
+    vertices = mesh_obj.data.vertices
+    coords = np.empty(len(vertices) * 3, dtype=np.float32)
+    vertices.foreach_get("co", coords)
+    matrix = np.array(mesh_obj.matrix_world, dtype=np.float64)
+    instrumentation.count(vertices=len(vertices))
+    return coords.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
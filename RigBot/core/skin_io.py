@@ -0,0 +1,171 @@
+import json
+import struct
+
+import numpy as np
+
+from . import instrumentation
+from . import weights
+
+# Skin weight files (.rbsw) are columnar and little-endian:
+#
+#   8 bytes   magic b"RBSKINW\0"
+#   8 bytes   uint64 length of the JSON header
+#   n bytes   JSON header, padded with spaces so the first array starts 16-byte aligned
+#   ...       raw arrays, each 16-byte aligned, at the offsets listed in the header
+#
+# {
+#     "format": "rigbot.skin_weights",
+#     "version": 1,
+#     "armature": "Rig",
+#     "bones": ["root", "spine", ...],
+#     "arrays": {"bone_parents": {"dtype": "<i4", "shape": [B], "offset": 256}, "bone_matrices": ...},
+#     "meshes": [{"name": "Body", "vertex_count": N, "slots": K,
+#                 "arrays": {"indices": {"dtype": "<u2", "shape": [K, N], ...}, "weights": ...}}]
+# }
+#
+# Influence slot k of every vertex is one contiguous row of "indices" (bone table index) and "weights",
+# slot 0 holding the strongest influence. Unused slots have weight 0.
+# Weights are float32 or, with UINT16 precision, integers in 0..65535 mapping to 0..1.
+SKIN_FORMAT = "rigbot.skin_weights"
+SKIN_VERSION = 1
+MAGIC = b"RBSKINW\0"
+ALIGNMENT = 16
+_PREFIX = struct.Struct("<8sQ")
+_UINT16_SCALE = 65535.0
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def read_bone_table(armature_data):
+    """Bone names, parent indices and rest matrices (armature space) of an armature, read with foreach_get."""
+    bones = armature_data.bones
+    count = len(bones)
+    names = bones.keys()
+    index_of = {name: i for i, name in enumerate(names)}
+    parents = np.array([index_of[bone.parent.name] if bone.parent else -1 for bone in bones], dtype=np.int32)
+    matrices = np.empty(count * 16, dtype=np.float32)
+    bones.foreach_get("matrix_local", matrices)
+    # foreach_get flattens matrices column by column, transpose to row-major
+    matrices = matrices.reshape(count, 4, 4).transpose(0, 2, 1)
+    return names, parents, matrices
+
+def export_skin_weights(filepath, armature_obj, mesh_objs, max_influences=4, precision='FLOAT32'):
+    """Writes the bone table of armature_obj and the bone weights of mesh_objs to a skin weight file.
+
+    Vertex groups that don't name a bone are ignored. Returns the number of meshes written.
+    """
+    bone_names, parents, matrices = read_bone_table(armature_obj.data)
+    bone_index = {name: i for i, name in enumerate(bone_names)}
+    index_dtype = np.dtype("<u2") if len(bone_names) <= 0xFFFF else np.dtype("<u4")
+    weight_dtype = np.dtype("<u2") if precision == 'UINT16' else np.dtype("<f4")
+
+    blocks = [] # (array description, array) in file order
+    header = {
+        "format": SKIN_FORMAT,
+        "version": SKIN_VERSION,
+        "armature": armature_obj.name,
+        "bones": list(bone_names),
+        "arrays": {
+            "bone_parents": {"dtype": "<i4", "shape": [len(bone_names)]},
+            "bone_matrices": {"dtype": "<f4", "shape": [len(bone_names), 4, 4]},
+        },
+        "meshes": [],
+    }
+    blocks.append((header["arrays"]["bone_parents"], parents.astype("<i4")))
+    blocks.append((header["arrays"]["bone_matrices"], matrices.astype("<f4")))
+
+    for mesh_obj in mesh_objs:
+        matrix = weights.read_weight_matrix(mesh_obj)
+        # Group index -> bone table index, groups without a bone are left out of the slots
+        to_bone = np.array([bone_index.get(name, -1) for name in matrix.group_names] or [-1], dtype=np.int64)
+        slot_count = max(1, min(max_influences, int(matrix.influence_counts(to_bone >= 0).max(initial=0))))
+        slot_groups, slot_weights = matrix.to_slots(slot_count, to_bone >= 0)
+
+        slot_bones = np.where(slot_weights > 0.0, to_bone[slot_groups], 0)
+        if weight_dtype.kind == 'u':
+            slot_weights = np.rint(np.clip(slot_weights, 0.0, 1.0) * _UINT16_SCALE)
+
+        entry = {
+            "name": mesh_obj.name,
+            "vertex_count": matrix.vertex_count,
+            "slots": slot_count,
+            "arrays": {
+                "indices": {"dtype": index_dtype.str, "shape": [slot_count, matrix.vertex_count]},
+                "weights": {"dtype": weight_dtype.str, "shape": [slot_count, matrix.vertex_count]},
+            },
+        }
+        header["meshes"].append(entry)
+        blocks.append((entry["arrays"]["indices"], slot_bones.astype(index_dtype)))
+        blocks.append((entry["arrays"]["weights"], slot_weights.astype(weight_dtype)))
+
+    # Offsets depend on the header length and the header holds the offsets: lay out with placeholders
+    # of the final width first, then fill them in
+    for description, _array in blocks:
+        description["offset"] = 0
+    header_size = len(json.dumps(header).encode("utf-8")) + 20 * len(blocks)
+    offset = _aligned(_PREFIX.size + header_size)
+    for description, array in blocks:
+        description["offset"] = offset
+        offset = _aligned(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * (_aligned(_PREFIX.size + header_size) - _PREFIX.size - len(header_bytes))
+
+    with open(filepath, "wb") as skin_file:
+        skin_file.write(_PREFIX.pack(MAGIC, len(header_bytes)))
+        skin_file.write(header_bytes)
+        for description, array in blocks:
+            skin_file.write(b"\0" * (description["offset"] - skin_file.tell()))
+            skin_file.write(np.ascontiguousarray(array).tobytes())
+
+    instrumentation.count(objects=len(header["meshes"]), bones=len(bone_names))
+    return len(header["meshes"])
+
+def load_skin_weights(filepath):
+    """Reads the header of a skin weight file and maps its arrays without copying them.
+
+    Returns (header, arrays): every "arrays" description in the header maps to a read-only np.memmap.
+    """
+    with open(filepath, "rb") as skin_file:
+        prefix = skin_file.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError("Not a RigBot skin weight file")
+        magic, header_length = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError("Not a RigBot skin weight file")
+        header = json.loads(skin_file.read(header_length).decode("utf-8"))
+    if header.get("format") != SKIN_FORMAT:
+        raise ValueError("Not a RigBot skin weight file")
+    if header.get("version", 0) > SKIN_VERSION:
+        raise ValueError(f"Skin weight file version {header.get('version')} is newer than supported ({SKIN_VERSION})")
+
+    def mapped(description):
+        return np.memmap(filepath, dtype=np.dtype(description["dtype"]), mode="r",
+                         offset=description["offset"], shape=tuple(description["shape"]))
+
+    arrays = {name: mapped(description) for name, description in header["arrays"].items()}
+    for entry in header["meshes"]:
+        entry["mapped"] = {name: mapped(description) for name, description in entry["arrays"].items()}
+    return header, arrays
+
+def apply_skin_weights(mesh_obj, header, entry, resolution=weights.WEIGHT_RESOLUTION):
+    """Writes the weights of one mesh entry of a loaded skin weight file to the vertex groups of mesh_obj.
+
+    Groups of the bones in the file are replaced, those of bones without weights in the file are removed.
+    Returns the number of vertex groups written.
+    """
+    if entry["vertex_count"] != len(mesh_obj.data.vertices):
+        raise ValueError(f"'{mesh_obj.name}' has {len(mesh_obj.data.vertices)} vertices, "
+                         f"the file has {entry['vertex_count']} for '{entry['name']}'")
+
+    slot_weights = entry["mapped"]["weights"]
+    if slot_weights.dtype.kind == 'u':
+        slot_weights = slot_weights / _UINT16_SCALE
+    matrix = weights.WeightMatrix.from_slots(entry["mapped"]["indices"], slot_weights, header["bones"])
+
+    columns = list(zip(matrix.group_names, matrix.group_columns()))
+    used = [(name, indices, values) for name, (indices, values) in columns if len(indices)]
+    weights.remove_vertex_groups(mesh_obj, [name for name, (indices, _values) in columns if not len(indices)])
+    weights.write_sparse_weights(mesh_obj, [name for name, _i, _v in used], [indices for _n, indices, _v in used],
+                                 [values for _n, _i, values in used], clear=True, resolution=resolution)
+    return len(used)
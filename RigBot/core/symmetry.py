@@ -0,0 +1,159 @@
+import math
+
+import bpy
+import numpy as np
+from mathutils import Matrix
+
+from . import cache
+from . import instrumentation
+from . import name_match
+from . import presets
+
+# Rig symmetrize: bones on one side of an axis are mirrored onto their L/R counterparts (created when
+# missing) together with their constraint stacks. Counterparts come from one mirror-pair index built
+# from the side tokens of the bone names (see name_match.flip_side_name).
+AXES = {'X': 0, 'Y': 1, 'Z': 2}
+
+# Edit bone settings copied from the source bone as they are
+_BOOLEAN_SETTINGS = ("use_deform", "use_inherit_rotation", "use_local_location", "use_relative_parent",
+                     "use_envelope_multiply")
+_FLOAT_SETTINGS = ("head_radius", "tail_radius", "envelope_distance", "envelope_weight", "bbone_x", "bbone_z")
+
+
+def mirror_pair_index(names):
+    """Maps every name with a side token to its counterpart name, whether that exists or not."""
+    pairs = {}
+    for name in names:
+        flipped = name_match.flip_side_name(name)
+        if flipped != name:
+            pairs[name] = flipped
+    return pairs
+
+def source_bones(topology, pairs, axis='X', positive=True, only=None):
+    """Indices of the bones to mirror: bones with a side token whose center lies on the source side.
+
+    Bones whose counterpart is a source bone too (both on the same side) are left out.
+    """
+    axis_index = AXES[axis]
+    centers = (topology.heads[:, axis_index] + topology.tails[:, axis_index]) * 0.5
+    on_side = centers > 1e-6 if positive else centers < -1e-6
+    sources = [i for i, name in enumerate(topology.names)
+               if name in pairs and on_side[i] and (only is None or name in only)]
+    source_names = {topology.names[i] for i in sources}
+    return [i for i in sources if pairs[topology.names[i]] not in source_names]
+
+def mirror_matrices(matrices, axis='X'):
+    """Mirrors (N x 4 x 4) bone matrices across the plane normal to axis.
+
+    The world reflection is followed by flipping the bone's local X axis, which keeps the matrices
+    right-handed and the bone direction mirrored (for X this is Blender's negated roll).
+    """
+    world = np.eye(4)
+    world[AXES[axis], AXES[axis]] = -1.0
+    local = np.diag((-1.0, 1.0, 1.0, 1.0))
+    return world @ matrices @ local
+
+def symmetrize_bones(armature_obj, source_names, pairs, axis='X', view_layer=None):
+    """Creates or updates the counterparts of source_names as mirrored copies in one Edit Mode session.
+
+    Head/tail and settings are written with foreach_set, the orientation (roll) per counterpart through
+    its matrix. Counterpart parents are the counterparts of the source parents where they exist.
+    Returns the names of the counterpart bones, in source order.
+    """
+    view_layer = view_layer or bpy.context.view_layer
+    view_layer.objects.active = armature_obj
+    previous_mode = armature_obj.mode
+    if previous_mode != 'EDIT':
+        bpy.ops.object.mode_set(mode='EDIT')
+        instrumentation.count(mode_switches=1)
+
+    try:
+        edit_bones = armature_obj.data.edit_bones
+        targets = [edit_bones.get(pairs[name]) or edit_bones.new(pairs[name]) for name in source_names]
+        index_of = {name: i for i, name in enumerate(edit_bones.keys())}
+        total = len(edit_bones)
+        source_indices = np.array([index_of[name] for name in source_names], dtype=np.int64)
+        target_indices = np.array([index_of[bone.name] for bone in targets], dtype=np.int64)
+        mirror = np.ones(3, dtype=np.float32)
+        mirror[AXES[axis]] = -1.0
+
+        def copy(property_name, size, dtype, scale=None):
+            values = np.empty(total * size, dtype=dtype)
+            edit_bones.foreach_get(property_name, values)
+            values = values.reshape(total, size)
+            values[target_indices] = values[source_indices] * scale if scale is not None else values[source_indices]
+            edit_bones.foreach_set(property_name, values.ravel())
+
+        copy("head", 3, np.float32, mirror)
+        copy("tail", 3, np.float32, mirror)
+        for property_name in _BOOLEAN_SETTINGS:
+            copy(property_name, 1, np.int32)
+        for property_name in _FLOAT_SETTINGS:
+            copy(property_name, 1, np.float32)
+
+        matrices = np.empty(total * 16, dtype=np.float32)
+        edit_bones.foreach_get("matrix", matrices)
+        # foreach_get flattens matrices column by column, transpose to row-major
+        matrices = matrices.reshape(total, 4, 4).transpose(0, 2, 1)[source_indices].astype(np.float64)
+        # The matrix setter keeps the length from head/tail and derives the roll, which has no closed form here
+        for bone, matrix in zip(targets, mirror_matrices(matrices, axis)):
+            bone.matrix = Matrix(matrix.tolist())
+
+        # Pointers have no foreach_set, parents are assigned one by one
+        for name, bone in zip(source_names, targets):
+            source_parent = edit_bones[name].parent
+            if source_parent is None:
+                bone.parent = None
+                continue
+            bone.parent = edit_bones.get(pairs.get(source_parent.name, source_parent.name)) or source_parent
+        copy("use_connect", 1, np.int32)
+        names = [bone.name for bone in targets]
+    finally:
+        if previous_mode != 'EDIT':
+            bpy.ops.object.mode_set(mode=previous_mode)
+            instrumentation.count(mode_switches=1)
+
+    cache.invalidate(armature_obj.data)
+    instrumentation.count(bones=len(names))
+    return names
+
+def mirror_constraint(description, pairs, bone_names):
+    """A serialized constraint (see presets.serialize_constraint) with its targets swapped to the other side.
+
+    Subtargets and target objects are replaced by their counterparts where those exist, IK pole angles
+    are mirrored the way Blender's own symmetrize does.
+    """
+    properties = dict(description["properties"])
+    for name in ("subtarget", "pole_subtarget"):
+        value = properties.get(name)
+        if value and pairs.get(value) in bone_names:
+            properties[name] = pairs[value]
+    for name in ("target", "pole_target"):
+        value = properties.get(name)
+        if value and value != presets.SELF_TARGET:
+            flipped = name_match.flip_side_name(value)
+            if flipped in bpy.data.objects:
+                properties[name] = flipped
+    if description["type"] == 'IK' and "pole_angle" in properties:
+        angle = -math.pi - properties["pole_angle"]
+        properties["pole_angle"] = (angle + math.pi) % (2.0 * math.pi) - math.pi
+    return {"type": description["type"], "name": name_match.flip_side_name(description["name"]),
+            "properties": properties}
+
+def symmetrize_constraints(armature_obj, source_names, target_names, pairs):
+    """Replaces the constraint stacks of target_names with mirrored copies of the source stacks.
+
+    Returns (number of constraints added, list of property errors).
+    """
+    pose_bones = armature_obj.pose.bones
+    bone_names = set(pose_bones.keys())
+    added_count = 0
+    errors = []
+    for source_name, target_name in zip(source_names, target_names):
+        descriptions = [mirror_constraint(presets.serialize_constraint(constraint, armature_obj), pairs, bone_names)
+                        for constraint in pose_bones[source_name].constraints]
+        target = pose_bones[target_name]
+        if descriptions or target.constraints:
+            added_count += presets.add_constraints(target, descriptions, armature_obj, errors=errors)
+    instrumentation.count(constraints=added_count)
+    return added_count, errors
@@ -0,0 +1,134 @@
+import numpy as np
+
+from . import cache
+from . import instrumentation
+
+# Hierarchy of an armature's bones as index arrays, built in bulk and cached per armature (see get_topology).
+# Parents are pointers, which foreach_get can't read, so they take one Python pass over the bones;
+# everything else is derived with NumPy. Indices refer to armature.bones, not to edit_bones.
+
+
+class BoneTopology:
+    """Parent index, children (CSR layout), depth, name lookup, depth-first order and chain segments
+    of an armature's bones"""
+
+    def __init__(self, names, parents, heads, tails):
+        self.names = names
+        self.parents = parents
+        self.heads = heads
+        self.tails = tails
+        self.index_of = {name: i for i, name in enumerate(names)}
+        count = len(names)
+
+        # Children of bone i are children[children_ptr[i]:children_ptr[i + 1]], in collection order
+        has_parent = np.flatnonzero(parents >= 0)
+        order = np.argsort(parents[has_parent], kind="stable")
+        self.children = has_parent[order]
+        self.children_ptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parents[has_parent], minlength=count), out=self.children_ptr[1:])
+        self.child_counts = np.diff(self.children_ptr)
+
+        self.depths = np.zeros(count, dtype=np.int64)
+        ancestor = parents.copy()
+        while (ancestor >= 0).any():
+            climbing = ancestor >= 0
+            self.depths[climbing] += 1
+            ancestor[climbing] = parents[ancestor[climbing]]
+
+        # Depth-first order, roots and children in collection order. Every subtree is a contiguous
+        # run of subtree_sizes[i] bones starting at position[i].
+        children = self.children.tolist()
+        children_ptr = self.children_ptr.tolist()
+        depth_first = []
+        stack = np.flatnonzero(parents < 0)[::-1].tolist()
+        while stack:
+            bone = stack.pop()
+            depth_first.append(bone)
+            stack.extend(reversed(children[children_ptr[bone]:children_ptr[bone + 1]]))
+        self.order = np.array(depth_first, dtype=np.int64)
+        self.position = np.empty(count, dtype=np.int64)
+        self.position[self.order] = np.arange(count)
+        self.subtree_sizes = np.ones(count, dtype=np.int64)
+        for depth in range(int(self.depths.max(initial=0)), 0, -1):
+            level = np.flatnonzero(self.depths == depth)
+            np.add.at(self.subtree_sizes, parents[level], self.subtree_sizes[level])
+
+        # Chain segments: every bone belongs to exactly one run of single-child bones
+        self.segments = limb_chains(self, min_length=1, include_roots=True)
+        self.segment_of = np.empty(count, dtype=np.int64)
+        for segment_index, segment in enumerate(self.segments):
+            self.segment_of[segment] = segment_index
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, name):
+        """Index of the named bone, -1 when there is none."""
+        return self.index_of.get(name, -1)
+
+    def parent_name(self, index):
+        parent = self.parents[index]
+        return self.names[parent] if parent >= 0 else None
+
+    def children_of(self, index):
+        return self.children[self.children_ptr[index]:self.children_ptr[index + 1]]
+
+    def subtree(self, index):
+        """Indices of the bone and all of its descendants, depth-first."""
+        start = self.position[index]
+        return self.order[start:start + self.subtree_sizes[index]]
+
+    def chain_from(self, index):
+        """Indices of the bone and the run of single-child bones below it."""
+        segment = self.segments[self.segment_of[index]]
+        return segment[segment.index(index):]
+
+def build_topology(armature_data):
+    """Reads the bone hierarchy and rest heads/tails (armature space) of an armature."""
+    bones = armature_data.bones
+    count = len(bones)
+    names = bones.keys()
+    index_of = {name: i for i, name in enumerate(names)}
+    parents = np.array([index_of[bone.parent.name] if bone.parent else -1 for bone in bones], dtype=np.int64)
+    heads = np.empty(count * 3, dtype=np.float32)
+    tails = np.empty(count * 3, dtype=np.float32)
+    bones.foreach_get("head_local", heads)
+    bones.foreach_get("tail_local", tails)
+    instrumentation.count(bones=count)
+    return BoneTopology(names, parents, heads.reshape(count, 3).astype(np.float64), tails.reshape(count, 3).astype(np.float64))
+
+def get_topology(armature_data):
+    """Returns the cached BoneTopology of the armature data, rebuilt after renames and Edit Mode exits."""
+    return cache.get(armature_data, "topology", build_topology)
+
+def limb_chains(topology, min_length=2, candidates=None, include_roots=False):
+    """Runs of single-child bones, each ending at a leaf or at a bone with several children.
+
+    A chain starts at a bone whose parent is missing or has other children too. Chains shorter than
+    min_length bones are left out, as are chains starting at a root bone unless include_roots is set.
+    With candidates (a boolean mask over the bones), chains are cut down to their candidate bones.
+    Returns lists of bone indices, from the chain start to its end.
+    """
+    parents = topology.parents
+    child_counts = topology.child_counts
+    # Bone i continues its parent's chain when the parent has exactly one child (i)
+    continues = np.zeros(len(topology), dtype=bool)
+    has_parent = parents >= 0
+    continues[has_parent] = child_counts[parents[has_parent]] == 1
+    if candidates is not None:
+        continues[has_parent] &= candidates[parents[has_parent]]
+
+    chains = []
+    single_child = child_counts == 1
+    for start in np.flatnonzero(~continues if candidates is None else ~continues & candidates):
+        chain = [int(start)]
+        bone = start
+        while single_child[bone]:
+            child = topology.children[topology.children_ptr[bone]]
+            if candidates is not None and not candidates[child]:
+                break
+            chain.append(int(child))
+            bone = child
+        if len(chain) >= min_length and (include_roots or parents[start] >= 0):
+            chains.append(chain)
+    return chains
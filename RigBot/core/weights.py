@@ -0,0 +1,305 @@
+import numpy as np
+
+from . import instrumentation
+from . import properties
+
+# Vertex groups have no foreach_set, the fastest bulk write is VertexGroup.add() with one list of
+# vertex indices per distinct weight. Weights are quantized to WEIGHT_RESOLUTION steps first,
+# which bounds the number of add() calls per group (1/1024 is well below what skinning can show).
+WEIGHT_RESOLUTION = properties.WEIGHT_RESOLUTION
+
+
+def write_group_weights(vertex_group, indices, weights, resolution=WEIGHT_RESOLUTION):
+    """Writes per-vertex weights to a vertex group with one add() call per distinct quantized weight.
+
+    Weights that quantize to zero are skipped. Returns the number of vertices written.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    levels = np.rint(np.clip(np.asarray(weights, dtype=np.float64), 0.0, 1.0) * resolution).astype(np.int64)
+    keep = levels > 0
+    indices, levels = indices[keep], levels[keep]
+    if not len(indices):
+        return 0
+
+    order = np.argsort(levels, kind="stable")
+    indices, levels = indices[order], levels[order]
+    unique_levels, starts = np.unique(levels, return_index=True)
+    ends = np.append(starts[1:], len(levels))
+    for level, start, end in zip(unique_levels, starts, ends):
+        vertex_group.add(indices[start:end].tolist(), float(level) / resolution, 'REPLACE')
+    return len(indices)
+
+def ensure_vertex_group(obj, name, clear=True):
+    """Returns the named vertex group of obj, created if missing. With clear=True it starts out empty."""
+    vertex_group = obj.vertex_groups.get(name)
+    if vertex_group is not None and clear:
+        obj.vertex_groups.remove(vertex_group)
+        vertex_group = None
+    if vertex_group is None:
+        vertex_group = obj.vertex_groups.new(name=name)
+    return vertex_group
+
+def remove_vertex_groups(obj, names):
+    """Removes the named vertex groups of obj that exist. Returns the number of groups removed."""
+    removed = 0
+    for name in names:
+        vertex_group = obj.vertex_groups.get(name)
+        if vertex_group is not None:
+            obj.vertex_groups.remove(vertex_group)
+            removed += 1
+    return removed
+
+def ensure_armature_modifier(obj, armature_obj):
+    """Returns the Armature modifier of obj deforming with armature_obj, adding one if needed."""
+    for modifier in obj.modifiers:
+        if modifier.type == 'ARMATURE' and modifier.object == armature_obj:
+            return modifier
+    modifier = obj.modifiers.new(name="Armature", type='ARMATURE')
+    modifier.object = armature_obj
+    modifier.use_vertex_groups = True
+    modifier.use_bone_envelopes = False
+    return modifier
+
+def write_sparse_weights(obj, group_names, group_indices, group_weights, clear=True, resolution=WEIGHT_RESOLUTION):
+    """Writes per-group (vertex indices, weights) arrays to the named vertex groups of obj in bulk."""
+    written = 0
+    for name, indices, weights in zip(group_names, group_indices, group_weights):
+        vertex_group = ensure_vertex_group(obj, name, clear=clear)
+        written += write_group_weights(vertex_group, indices, weights, resolution)
+    instrumentation.count(objects=1, weights=written)
+    return written
+
+class WeightMatrix:
+    """Vertex-group weights of a mesh in CSR layout.
+
+    The influences of vertex i are columns[indptr[i]:indptr[i + 1]] (vertex group indices, ascending)
+    with their values. Operations return new matrices and leave groups outside group_mask untouched.
+    """
+
+    def __init__(self, indptr, columns, values, group_names):
+        self.indptr = indptr
+        self.columns = columns
+        self.values = values
+        self.group_names = list(group_names)
+
+    @classmethod
+    def from_coo(cls, rows, columns, values, vertex_count, group_names):
+        """Builds a matrix from (row, column, value) triplets, summing duplicates and dropping zeros."""
+        group_count = max(1, len(group_names))
+        keys = np.asarray(rows, dtype=np.int64) * group_count + np.asarray(columns, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        if len(keys):
+            starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+            keys, values = keys[starts], np.add.reduceat(values, starts)
+        keep = values > 0.0
+        keys, values = keys[keep], values[keep]
+
+        indptr = np.zeros(vertex_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // group_count, minlength=vertex_count), out=indptr[1:])
+        return cls(indptr, keys % group_count, values, group_names)
+
+    @property
+    def vertex_count(self):
+        return len(self.indptr) - 1
+
+    def rows(self):
+        """Vertex index of every stored weight."""
+        return np.repeat(np.arange(self.vertex_count), np.diff(self.indptr))
+
+    def influence_counts(self, group_mask=None):
+        """Number of influences per vertex, counting only groups in group_mask when given."""
+        if group_mask is None:
+            return np.diff(self.indptr)
+        return np.bincount(self.rows()[group_mask[self.columns]], minlength=self.vertex_count)
+
+    def _selected(self, group_mask):
+        if group_mask is None:
+            return np.ones(len(self.columns), dtype=bool)
+        return np.asarray(group_mask, dtype=bool)[self.columns]
+
+    def _with_values(self, values):
+        # Same sparsity pattern minus the zeroed weights, CSR order is preserved so no re-sort is needed
+        keep = values > 0.0
+        indptr = np.zeros(self.vertex_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.rows()[keep], minlength=self.vertex_count), out=indptr[1:])
+        return WeightMatrix(indptr, self.columns[keep], values[keep], self.group_names)
+
+    def normalize(self, group_mask=None):
+        """Scales the selected weights of every vertex to add up to 1."""
+        selected = self._selected(group_mask)
+        rows = self.rows()
+        totals = np.bincount(rows[selected], weights=self.values[selected], minlength=self.vertex_count)
+        values = self.values.copy()
+        scale = totals[rows[selected]]
+        values[selected] = np.divide(values[selected], scale, out=values[selected], where=scale > 0.0)
+        return self._with_values(values)
+
+    def limit_influences(self, limit, group_mask=None):
+        """Keeps the `limit` largest selected weights per vertex, the others are removed."""
+        selected = np.flatnonzero(self._selected(group_mask))
+        order, _rows, rank = _rank_within_rows(self.rows()[selected], self.values[selected])
+        values = self.values.copy()
+        values[selected[order[rank >= limit]]] = 0.0
+        return self._with_values(values)
+
+    def prune(self, threshold, group_mask=None):
+        """Removes selected weights below threshold."""
+        values = self.values.copy()
+        values[self._selected(group_mask) & (values < threshold)] = 0.0
+        return self._with_values(values)
+
+    def smooth(self, edges, factor=0.5, iterations=1, group_mask=None):
+        """Blends each selected weight towards the average of the vertex's edge neighbours.
+
+        edges is an (E, 2) array of vertex indices. Weights may spread to neighbouring vertices.
+        """
+        vertex_count = self.vertex_count
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        # Symmetric adjacency in CSR layout
+        sources = np.concatenate((edges[:, 0], edges[:, 1]))
+        targets = np.concatenate((edges[:, 1], edges[:, 0]))
+        order = np.argsort(sources, kind="stable")
+        targets = targets[order]
+        degree = np.bincount(sources, minlength=vertex_count)
+        adjacency_ptr = np.concatenate(([0], np.cumsum(degree)))
+
+        matrix = self
+        for _ in range(iterations):
+            selected = matrix._selected(group_mask)
+            rows = matrix.rows()
+            own_rows, own_columns, own_values = rows[selected], matrix.columns[selected], matrix.values[selected]
+            # Vertices without neighbours keep their weights
+            keep = np.where(degree[own_rows] > 0, 1.0 - factor, 1.0)
+
+            # Every selected weight is handed to each neighbour of its vertex, divided by that neighbour's degree
+            spread = degree[own_rows]
+            neighbours = targets[_expand_ranges(adjacency_ptr[own_rows], spread)]
+            spread_columns = np.repeat(own_columns, spread)
+            spread_values = np.repeat(own_values, spread) * factor / degree[neighbours]
+
+            matrix = WeightMatrix.from_coo(
+                    np.concatenate((rows[~selected], own_rows, neighbours)),
+                    np.concatenate((matrix.columns[~selected], own_columns, spread_columns)),
+                    np.concatenate((matrix.values[~selected], own_values * keep, spread_values)),
+                    vertex_count, matrix.group_names)
+        return matrix
+
+    def to_slots(self, slot_count, group_mask=None):
+        """Dense (slot_count, vertex_count) arrays of group indices and weights, strongest influence in slot 0.
+
+        Unused slots have index 0 and weight 0, influences beyond slot_count are dropped.
+        """
+        selected = np.flatnonzero(self._selected(group_mask))
+        order, rows, rank = _rank_within_rows(self.rows()[selected], self.values[selected])
+        keep = rank < slot_count
+        slot_indices = np.zeros((slot_count, self.vertex_count), dtype=np.int64)
+        slot_weights = np.zeros((slot_count, self.vertex_count), dtype=np.float64)
+        slot_indices[rank[keep], rows[keep]] = self.columns[selected[order[keep]]]
+        slot_weights[rank[keep], rows[keep]] = self.values[selected[order[keep]]]
+        return slot_indices, slot_weights
+
+    @classmethod
+    def from_slots(cls, slot_indices, slot_weights, group_names):
+        """Inverse of to_slots(), slots with a zero weight are skipped."""
+        slot_count, vertex_count = np.shape(slot_weights)
+        rows = np.broadcast_to(np.arange(vertex_count), (slot_count, vertex_count))
+        return cls.from_coo(rows.ravel(), np.asarray(slot_indices).ravel(), np.asarray(slot_weights).ravel(),
+                            vertex_count, group_names)
+
+    def group_columns(self):
+        """Per group (vertex indices, weights), the column-wise view used to write vertex groups."""
+        order = np.argsort(self.columns, kind="stable")
+        rows, columns, values = self.rows()[order], self.columns[order], self.values[order]
+        bounds = np.searchsorted(columns, np.arange(len(self.group_names) + 1))
+        return [(rows[bounds[i]:bounds[i + 1]], values[bounds[i]:bounds[i + 1]]) for i in range(len(self.group_names))]
+
+def _rank_within_rows(rows, values):
+    """Sorts weights per vertex, strongest first, and ranks them within their vertex.
+
+    Returns (order, rows in that order, rank of each ordered weight).
+    """
+    # Weights are within 0..1, so one float key sorts by vertex and weight at once
+    order = np.argsort(rows + (1.0 - np.clip(values, 0.0, 1.0)) * 0.5)
+    ranked_rows = rows[order]
+    positions = np.arange(len(order))
+    run_starts = np.ones(len(order), dtype=bool)
+    run_starts[1:] = ranked_rows[1:] != ranked_rows[:-1]
+    rank = positions - np.maximum.accumulate(np.where(run_starts, positions, 0))
+    return order, ranked_rows, rank
+
+def _expand_ranges(starts, counts):
+    """Concatenation of range(start, start + count) for every pair, vectorized."""
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(total)
+
+def read_weight_matrix(obj):
+    """Reads all vertex-group weights of a mesh object into a WeightMatrix.
+
+    Vertex group memberships have no foreach_get, this is a single pass over vertex.groups.
+    """
+    vertices = obj.data.vertices
+    group_names = obj.vertex_groups.keys()
+    counts = np.empty(len(vertices), dtype=np.int64)
+    columns = []
+    values = []
+    add_column = columns.append
+    add_value = values.append
+    for i, vertex in enumerate(vertices):
+        groups = vertex.groups
+        counts[i] = len(groups)
+        for element in groups:
+            add_column(element.group)
+            add_value(element.weight)
+
+    rows = np.repeat(np.arange(len(vertices)), counts)
+    instrumentation.count(vertices=len(vertices))
+    return WeightMatrix.from_coo(rows, columns, values, len(vertices), group_names)
+
+def write_weight_matrix(obj, matrix, previous=None, resolution=WEIGHT_RESOLUTION):
+    """Writes a WeightMatrix back to the vertex groups of obj.
+
+    With the matrix it was derived from as previous, only groups whose quantized weights changed are
+    rewritten and stale memberships are removed. Returns the number of groups written.
+    """
+    old_columns = previous.group_columns() if previous is not None else None
+    written_groups = 0
+    written = 0
+    for group_index, (indices, values) in enumerate(matrix.group_columns()):
+        vertex_group = obj.vertex_groups[matrix.group_names[group_index]]
+        if old_columns is not None:
+            old_indices, old_values = old_columns[group_index]
+            if (np.array_equal(old_indices, indices) and
+                    np.array_equal(np.rint(old_values * resolution), np.rint(values * resolution))):
+                continue
+            stale = np.setdiff1d(old_indices, indices, assume_unique=True)
+            if len(stale):
+                vertex_group.remove(stale.tolist())
+        written += write_group_weights(vertex_group, indices, values, resolution)
+        written_groups += 1
+    instrumentation.count(objects=1, weights=written)
+    return written_groups
+
+def read_mesh_edges(mesh):
+    """(E, 2) array of edge vertex indices, read with one foreach_get."""
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    return edges.reshape(-1, 2)
+
+def editable_group_mask(obj, group_names, deform_only=True):
+    """Boolean mask over group_names, True for unlocked groups.
+
+    With deform_only, groups must also be named after deforming bones of the armatures in obj's
+    Armature modifiers (without such modifiers every unlocked group counts).
+    """
+    mask = np.array([not obj.vertex_groups[name].lock_weight for name in group_names], dtype=bool)
+    armatures = [modifier.object for modifier in obj.modifiers
+                 if modifier.type == 'ARMATURE' and modifier.object is not None and modifier.object.type == 'ARMATURE']
+    if deform_only and armatures:
+        deform_names = {bone.name for armature_obj in armatures for bone in armature_obj.data.bones if bone.use_deform}
+        mask &= np.array([name in deform_names for name in group_names], dtype=bool)
+    return mask
@@ -3,6 +3,8 @@ from . import bone
 from . import pose
 from . import skinning
 from . import constraint
+from . import bake
+from . import stats
 
 def register():
     skeleton.register()
@@ -10,8 +12,12 @@ def register():
     pose.register()
     skinning.register()
     constraint.register()
+    bake.register()
+    stats.register()
 
 def unregister():
+    stats.unregister()
+    bake.unregister()
     constraint.unregister()
     skinning.unregister()
     pose.unregister()
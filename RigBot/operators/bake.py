@@ -0,0 +1,83 @@
+import bpy
+
+from ..core import bake
+from ..core import instrumentation
+from ..core import pose_reset
+
+class RIGBOT_OT_bake_pose(bpy.types.Operator):
+    """Bakes the evaluated pose of the active armature into keyframes"""
+    bl_idname = "rigbot.bake_pose"
+    bl_label = "Bake Pose"
+    bl_description = "Evaluate every frame of the range once and key the resulting local location, rotation and scale of the bones, so constraints and drivers can be removed before export"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    frame_start: bpy.props.IntProperty(
+            name="Start Frame",
+            description="First frame to bake",
+            default=1, min=0)
+    frame_end: bpy.props.IntProperty(
+            name="End Frame",
+            description="Last frame to bake",
+            default=250, min=0)
+    only_selected: bpy.props.BoolProperty(
+            name="Only Selected",
+            description="Only bake the selected bones, otherwise bake every bone",
+            default=False)
+    clean: bpy.props.BoolProperty(
+            name="Drop Redundant Keys",
+            description="Only keep the keys where a channel starts or stops changing",
+            default=True)
+    tolerance: bpy.props.FloatProperty(
+            name="Tolerance",
+            description="Changes smaller than this count as no change when dropping keys",
+            default=1e-5, min=0.0, precision=6)
+    remove_constraints: bpy.props.BoolProperty(
+            name="Remove Constraints",
+            description="Remove the constraints of the baked bones afterwards",
+            default=False)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'ARMATURE' and obj.mode in {'OBJECT', 'POSE'}
+
+    def invoke(self, context, event):
+        self.frame_start = context.scene.frame_start
+        self.frame_end = context.scene.frame_end
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        armature_obj = context.active_object
+        if self.frame_end < self.frame_start:
+            self.report({'WARNING'}, "The end frame is before the start frame.")
+            return {'CANCELLED'}
+        bone_names = pose_reset.selected_bone_names(armature_obj.data) if self.only_selected else None
+        if bone_names == []:
+            self.report({'WARNING'}, "No bones selected.")
+            return {'CANCELLED'}
+
+        animation_data = armature_obj.animation_data or armature_obj.animation_data_create()
+        if animation_data.action is None:
+            animation_data.action = bpy.data.actions.new(f"{armature_obj.name}Action")
+
+        try:
+            result = bake.bake_pose(context.scene, armature_obj, animation_data.action, bone_names,
+                                    self.frame_start, self.frame_end, tolerance=self.tolerance, clean=self.clean,
+                                    remove_constraints=self.remove_constraints)
+        except (RuntimeError, ValueError) as e:
+            self.report({'ERROR'}, f"Failed to bake pose: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Baked {result['bones']} bone(s) over {result['frames']} frame(s) "
+                              f"into {result['keys']} key(s) on '{animation_data.action.name}'.")
+        return {'FINISHED'}
+
+classes = (
+    RIGBOT_OT_bake_pose,
+)
+
+def register():
+    instrumentation.register_classes(classes)
+
+def unregister():
+    instrumentation.unregister_classes(classes)
@@ -1,5 +1,14 @@
+import re
+
 import bpy
 
+from ..core import cache
+from ..core import instrumentation
+from ..core import name_match
+from ..core import rename
+from ..core import selection
+from ..core import topology
+
 class OBJECT_OT_select_bone(bpy.types.Operator):
     bl_idname = "object.select_bone"
     bl_label = "Select Bone"
@@ -15,66 +24,92 @@ class OBJECT_OT_select_bone(bpy.types.Operator):
             return {'CANCELLED'}
 
         armature = obj.data
-        if self.bone_name not in armature.bones:
+        # Index in armature.bones, used by the UI list
+        list_index = topology.get_topology(armature).index(self.bone_name)
+        # Index in the bone collection of the current mode (edit_bones in Edit Mode)
+        target_index = list_index if obj.mode != 'EDIT' else armature.edit_bones.find(self.bone_name)
+        if list_index == -1 or target_index == -1:
             self.report({'WARNING'}, f"Bone '{self.bone_name}' not found in armature '{armature.name}'.")
             scene.rigbot_bone_index = -1 # Reset index if bone not found
             return {'CANCELLED'}
-        
-        target_bone = armature.bones[self.bone_name]
-        target_index = -1
+
+        # Deselect all, select and activate the target bone in one pass, without switching modes
+        selection.select_bones(obj, [target_index], active_index=target_index)
+        selection.tag_redraw(context)
+
+        # Update the scene property for UI list highlighting *AFTER* selection
+        scene.rigbot_bone_index = list_index
+        return {'FINISHED'}
+
+class OBJECT_OT_select_bones_by_pattern(bpy.types.Operator):
+    """Selects bones of the active armature by regex, name list, bone collection, hierarchy or chain"""
+    bl_idname = "object.select_bones_by_pattern"
+    bl_label = "Select Bones by Pattern"
+    bl_description = "Select bones by regular expression, name list, bone collection, hierarchy or chain"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    match_type: bpy.props.EnumProperty(
+            name="Match",
+            items=(
+                ('REGEX', "Regular Expression", "Bones whose name matches the regular expression"),
+                ('NAMES', "Name List", "Comma separated list of bone names"),
+                ('COLLECTION', "Bone Collection", "Bones assigned to the named bone collection"),
+                ('SUBTREE', "Hierarchy", "The named bone (or the active bone) and all its descendants"),
+                ('CHAIN', "Chain", "The named bone (or the active bone) and the single-child chain below it"),
+            ),
+            default='REGEX')
+    pattern: bpy.props.StringProperty(
+            name="Pattern",
+            description="Regular expression, names, bone collection or root bone, depending on the match type")
+    ignore_case: bpy.props.BoolProperty(
+            name="Ignore Case",
+            description="Case insensitive regular expression matching",
+            default=True)
+    extend: bpy.props.BoolProperty(
+            name="Extend",
+            description="Add to the current selection instead of replacing it",
+            default=False)
+    deselect: bpy.props.BoolProperty(
+            name="Deselect",
+            description="Remove the matched bones from the selection",
+            default=False)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'ARMATURE'
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        obj = context.active_object
+        bones = selection.mode_bones(obj)
+        bone_topology = selection.mode_topology(obj)
+
+        root_name = self.pattern
+        if self.match_type in {'SUBTREE', 'CHAIN'} and not root_name:
+            active_bone = bones.active
+            root_name = active_bone.name if active_bone else ""
+
         try:
-            # Find the index of the bone in the collection
-            target_index = armature.bones.find(self.bone_name)
-        except ValueError:
-            self.report({'WARNING'}, f"Could not find index for bone '{self.bone_name}'.")
-            scene.rigbot_bone_index = -1 # Reset index if finding fails
+            if self.match_type == 'REGEX':
+                indices = selection.indices_from_pattern(bones, self.pattern, re.IGNORECASE if self.ignore_case else 0)
+            elif self.match_type == 'NAMES':
+                indices = selection.indices_from_names(bones, name_match.parse_name_list(self.pattern), bone_topology)
+            elif self.match_type == 'COLLECTION':
+                indices = selection.indices_from_collection(bones, self.pattern)
+            elif self.match_type == 'SUBTREE':
+                indices = selection.indices_from_subtree(bones, root_name, bone_topology)
+            else:
+                indices = selection.indices_from_chain(bones, root_name, bone_topology)
+        except re.error as e:
+            self.report({'ERROR'}, f"Invalid regular expression: {e}")
             return {'CANCELLED'}
 
-        current_mode = obj.mode
-        
-        # 1. Deselect all bones in the current mode
-        try:
-            if current_mode == 'EDIT':
-                # Ensure we are in edit mode before calling edit mode operator
-                if obj.mode != 'EDIT': bpy.ops.object.mode_set(mode='EDIT')
-                bpy.ops.armature.select_all(action='DESELECT')
-            elif current_mode == 'POSE':
-                if obj.mode != 'POSE': bpy.ops.object.mode_set(mode='POSE')
-                bpy.ops.pose.select_all(action='DESELECT')
-            else: # Object mode - deselect base bones
-                for bone in armature.bones:
-                    bone.select = False
-        except RuntimeError as e:
-            print(f"Note: Could not deselect all bones ({e})")
-            
-        # 2. Select the target bone
-        target_bone.select = True
-        
-        # 3. Set the active bone
-        armature.bones.active = target_bone
-        
-        # 4. Ensure visual selection in Pose Mode
-        if current_mode == 'EDIT':
-            # Ensure we are back in edit mode if we switched
-            if obj.mode != 'EDIT': bpy.ops.object.mode_set(mode='EDIT')
-            edit_bone = armature.edit_bones.get(self.bone_name)
-            if edit_bone:
-                armature.edit_bones.active = edit_bone # Set active EditBone
-                edit_bone.select = True # Ensure selection in edit mode
-
-        elif current_mode == 'POSE':
-            if obj.mode != 'POSE': bpy.ops.object.mode_set(mode='POSE')
-            pose_bone = obj.pose.bones.get(self.bone_name)
-            if pose_bone:
-
-                pose_bone.bone.select = True 
-                pass
-
-        # 5. Update the scene property for UI list highlighting *AFTER* selection
-        if target_index != -1:
-            scene.rigbot_bone_index = target_index
-        else:
-            scene.rigbot_bone_index = -1 # Safety reset
+        count = selection.select_bones(obj, indices, extend=self.extend, deselect=self.deselect)
+        selection.tag_redraw(context)
+        self.report({'INFO'}, f"{'Deselected' if self.deselect else 'Selected'} {count} bone(s).")
         return {'FINISHED'}
 
 class OBJECT_OT_rename_bone(bpy.types.Operator):
@@ -152,6 +187,8 @@ class OBJECT_OT_rename_bone(bpy.types.Operator):
         try:
             original_name = active_bone_to_rename.name
             active_bone_to_rename.name = self.new_name
+            cache.invalidate(obj.data) # Name indices of this armature are stale now
+            instrumentation.count(bones=1)
             self.report({'INFO'}, f"Bone '{original_name}' renamed to '{self.new_name}'.")
             context.scene.rigbot_bone_index = obj.data.bones.find(self.new_name) # Update index to renamed bone
 
@@ -161,15 +198,137 @@ class OBJECT_OT_rename_bone(bpy.types.Operator):
 
         return {'FINISHED'}
 
+class OBJECT_OT_rename_bones_bulk(bpy.types.Operator):
+    """Renames many bones at once by regular expression, template or side flip"""
+    bl_idname = "object.rename_bones_bulk"
+    bl_label = "Rename Bones"
+    bl_description = "Rename bones of the active armature by regular expression, template or L/R flip, updating constraint targets, vertex groups, bone parents and objects named after the bones"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Lines of the old -> new preview shown in the dialog
+    preview_lines = 12
+
+    mode: bpy.props.EnumProperty(
+            name="Rule",
+            items=(
+                ('REGEX', "Regular Expression", "Replace matches of a regular expression"),
+                ('TEMPLATE', "Template", "Build names from a template with {name}, {base}, {side}, {number} and {index}"),
+                ('MIRROR', "Flip Sides", "Swap side tokens such as .L/.R, _Left/_Right and L_/R_"),
+            ),
+            default='REGEX')
+    pattern: bpy.props.StringProperty(
+            name="Find",
+            description="Regular expression to replace in bone names")
+    replacement: bpy.props.StringProperty(
+            name="Replace",
+            description="Replacement text, \\1 or \\g<name> insert groups of the match")
+    template: bpy.props.StringProperty(
+            name="Template",
+            description="New name, e.g. DEF-{base}{side} or Spine_{index:03d}",
+            default="{name}")
+    ignore_case: bpy.props.BoolProperty(
+            name="Ignore Case",
+            description="Case insensitive regular expression matching",
+            default=False)
+    only_selected: bpy.props.BoolProperty(
+            name="Only Selected",
+            description="Only rename selected bones",
+            default=False)
+    rename_objects: bpy.props.BoolProperty(
+            name="Rename Matching Objects",
+            description="Also rename objects whose name contains the name of a renamed bone, as matched by Parent Objects to Bones by Name",
+            default=True)
+    dry_run: bpy.props.BoolProperty(
+            name="Preview Only",
+            description="Show the new names without renaming anything",
+            default=False)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'ARMATURE'
+
+    def _plan(self, obj):
+        bones = selection.mode_bones(obj)
+        names = bones.keys()
+        only = None
+        if self.only_selected:
+            selected = [False] * len(bones)
+            bones.foreach_get("select", selected)
+            only = {name for name, is_selected in zip(names, selected) if is_selected}
+        return rename.plan_renames(names, self.mode, self.pattern, self.replacement, self.template,
+                                   re.IGNORECASE if self.ignore_case else 0, only)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self, width=420)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "mode")
+        if self.mode == 'REGEX':
+            layout.prop(self, "pattern")
+            layout.prop(self, "replacement")
+            layout.prop(self, "ignore_case")
+        elif self.mode == 'TEMPLATE':
+            layout.prop(self, "template")
+        layout.prop(self, "only_selected")
+        layout.prop(self, "rename_objects")
+        layout.prop(self, "dry_run")
+
+        box = layout.box()
+        try:
+            mapping, conflicts = self._plan(context.active_object)
+        except (re.error, ValueError) as e:
+            box.label(text=str(e), icon='ERROR')
+            return
+        for conflict in conflicts[:self.preview_lines]:
+            box.label(text=conflict, icon='ERROR')
+        for old_name, new_name in list(mapping.items())[:self.preview_lines]:
+            box.label(text=f"{old_name}  \u2192  {new_name}")
+        box.label(text=f"{len(mapping)} bone(s) renamed" if mapping else "No bone names change")
+
+    def execute(self, context):
+        obj = context.active_object
+        try:
+            mapping, conflicts = self._plan(obj)
+        except re.error as e:
+            self.report({'ERROR'}, f"Invalid regular expression: {e}")
+            return {'CANCELLED'}
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        if conflicts:
+            self.report({'ERROR'}, f"Cannot rename: {conflicts[0]}" +
+                        (f" (and {len(conflicts) - 1} more)" if len(conflicts) > 1 else ""))
+            return {'CANCELLED'}
+        if not mapping:
+            self.report({'INFO'}, "No bone names change.")
+            return {'CANCELLED'}
+        if self.dry_run:
+            self.report({'INFO'}, f"Would rename {len(mapping)} bone(s).")
+            return {'FINISHED'}
+
+        try:
+            counts = rename.apply_renames(obj, mapping, context.scene.objects, rename_objects=self.rename_objects)
+        except (RuntimeError, TypeError, ValueError) as e:
+            self.report({'ERROR'}, f"Failed to rename bones: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Renamed {counts['bones']} bone(s), updated {counts['constraints']} constraint target(s), "
+                              f"{counts['vertex_groups']} vertex group(s), {counts['parents']} bone parent(s) "
+                              f"and {counts['objects']} object name(s).")
+        return {'FINISHED'}
+
 classes = (
     OBJECT_OT_select_bone,
+    OBJECT_OT_select_bones_by_pattern,
     OBJECT_OT_rename_bone,
+    OBJECT_OT_rename_bones_bulk,
 )
 
 def register():
-    for cls in classes:
-        bpy.utils.register_class(cls)
+    instrumentation.register_classes(classes)
 
 def unregister():
-    for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
\ No newline at end of file
+    instrumentation.unregister_classes(classes)
\ No newline at end of file
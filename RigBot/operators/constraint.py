@@ -1,4 +1,16 @@
+import re
+
 import bpy
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from ..core import constraints
+from ..core import ik_rig
+from ..core import instrumentation
+from ..core import presets
+from ..core import profiler
+from ..core import selection
+from ..core import symmetry
+from ..core import topology
 
 class RIGBOT_OT_pose_add_damped_track_self(bpy.types.Operator):
     """Adds a Damped Track constraint to the active pose bone, targeting the armature itself"""
@@ -157,16 +169,345 @@ class RIGBOT_OT_pose_add_ik(bpy.types.Operator):
             self.report({'ERROR'}, f"Failed to add IK constraint: {e}")
             return {'CANCELLED'}
         
+class RIGBOT_OT_pose_batch_add_constraint(bpy.types.Operator):
+    """Adds and configures a constraint on many pose bones in one step"""
+    bl_idname = "rigbot.pose_batch_add_constraint"
+    bl_label = "Batch Add Constraint"
+    bl_description = "Add a constraint to all selected bones, a chain or bones matching a pattern, in one undo step"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    constraint_type: bpy.props.EnumProperty(
+            name="Constraint",
+            items=(
+                ('DAMPED_TRACK', "Damped Track", "", 'CON_TRACKTO', 0),
+                ('STRETCH_TO', "Stretch To", "", 'CON_STRETCHTO', 1),
+                ('IK', "Inverse Kinematics", "", 'CON_KINEMATIC', 2),
+            ),
+            default='STRETCH_TO')
+    bone_scope: bpy.props.EnumProperty(
+            name="Bones",
+            items=(
+                ('SELECTED', "Selected", "All selected pose bones"),
+                ('CHAIN', "Chain", "The active bone and the single-child chain below it"),
+                ('PATTERN', "Pattern", "Bones of the active armature matching a regular expression"),
+            ),
+            default='SELECTED')
+    pattern: bpy.props.StringProperty(
+            name="Pattern",
+            description="Regular expression used with the Pattern scope")
+    subtarget_rule: bpy.props.EnumProperty(
+            name="Subtarget",
+            items=(
+                ('NONE', "Armature", "Target the armature object without a subtarget bone"),
+                ('CHILD', "Child Bone", "Target each bone's child (connected child first)"),
+                ('PARENT', "Parent Bone", "Target each bone's parent"),
+                ('ACTIVE', "Active Bone", "Target the active bone"),
+            ),
+            default='CHILD')
+    chain_count: bpy.props.IntProperty(
+            name="Chain Length",
+            description="IK chain length, 0 uses the full chain",
+            default=0, min=0, max=255)
+
+    @classmethod
+    def poll(cls, context):
+        return (context.mode == 'POSE' and
+                context.object and
+                context.object.type == 'ARMATURE')
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        armature_obj = context.object
+        active_pose_bone = context.active_pose_bone
+        active_name = active_pose_bone.name if active_pose_bone else ""
+
+        # Group the target pose bones per armature
+        bones_per_armature = {}
+        if self.bone_scope == 'SELECTED':
+            for pose_bone in context.selected_pose_bones or []:
+                bones_per_armature.setdefault(pose_bone.id_data, []).append(pose_bone)
+        else:
+            bones = armature_obj.data.bones
+            try:
+                if self.bone_scope == 'CHAIN':
+                    indices = selection.indices_from_chain(bones, active_name, topology.get_topology(armature_obj.data))
+                else:
+                    indices = selection.indices_from_pattern(bones, self.pattern)
+            except re.error as e:
+                self.report({'ERROR'}, f"Invalid regular expression: {e}")
+                return {'CANCELLED'}
+            bone_names = topology.get_topology(armature_obj.data).names
+            pose_bones = armature_obj.pose.bones
+            bones_per_armature[armature_obj] = [pose_bones[bone_names[i]] for i in indices]
+
+        if not any(bones_per_armature.values()):
+            self.report({'WARNING'}, "No pose bones to add constraints to.")
+            return {'CANCELLED'}
+
+        settings = {"chain_count": self.chain_count} if self.constraint_type == 'IK' else {}
+        added_count = 0
+        skipped = []
+        for target_obj, pose_bones in bones_per_armature.items():
+            added, skipped_names = constraints.add_constraints(
+                    target_obj, pose_bones, self.constraint_type,
+                    subtarget_rule=self.subtarget_rule, settings=settings,
+                    active_name=active_name if target_obj == armature_obj else "")
+            added_count += len(added)
+            skipped.extend(skipped_names)
+
+        report_message = f"Added {added_count} constraint(s)."
+        if skipped:
+            report_message += f" Skipped {len(skipped)} bone(s) without a subtarget."
+        self.report({'INFO'}, report_message)
+        return {'FINISHED'}
+
+class RIGBOT_OT_auto_ik_chains(bpy.types.Operator):
+    """Detects limb chains and sets up IK controls, poles and IK constraints for all of them"""
+    bl_idname = "rigbot.auto_ik_chains"
+    bl_label = "Auto IK Limbs"
+    bl_description = "Find every limb chain (run of single-child bones) of the active armature and add an IK control, a pole bone and an IK constraint with the matching chain length to each"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    min_length: bpy.props.IntProperty(
+            name="Min Chain Length",
+            description="Chains with fewer bones are ignored",
+            default=2, min=1, max=255)
+    skip_tip_bones: bpy.props.IntProperty(
+            name="Skip Tip Bones",
+            description="Bones at the end of each chain left out of the IK chain (e.g. 1 for hands or toes)",
+            default=0, min=0, max=16)
+    max_chain_count: bpy.props.IntProperty(
+            name="Max IK Length",
+            description="Longest IK chain to create, 0 covers each detected chain fully",
+            default=0, min=0, max=255)
+    use_pole: bpy.props.BoolProperty(
+            name="Pole Targets",
+            description="Create a pole bone for every IK chain of two or more bones",
+            default=True)
+    only_selected: bpy.props.BoolProperty(
+            name="Only Selected Bones",
+            description="Only detect chains among selected bones",
+            default=False)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'ARMATURE' and obj.mode in {'OBJECT', 'POSE'}
+
+    def execute(self, context):
+        armature_obj = context.active_object
+        topology_data = topology.get_topology(armature_obj.data)
+
+        candidates = ik_rig.chain_candidates(armature_obj.data, topology_data, self.only_selected)
+
+        chains = topology.limb_chains(topology_data, self.min_length, candidates)
+        plans = ik_rig.plan_ik_chains(topology_data, chains, self.skip_tip_bones, self.max_chain_count)
+        if not plans:
+            self.report({'WARNING'}, "No limb chains found.")
+            return {'CANCELLED'}
+
+        try:
+            rigs = ik_rig.add_ik_rigs(armature_obj, topology_data, plans, use_pole=self.use_pole,
+                                      view_layer=context.view_layer)
+        except (RuntimeError, ValueError) as e:
+            self.report({'ERROR'}, f"Failed to set up IK chains: {e}")
+            return {'CANCELLED'}
+
+        report_message = f"Set up IK on {len(rigs)} of {len(plans)} limb chain(s)."
+        if len(rigs) < len(plans):
+            report_message += f" {len(plans) - len(rigs)} already had an IK constraint."
+        self.report({'INFO'}, report_message)
+        return {'FINISHED'}
+
+class RIGBOT_OT_symmetrize_rig(bpy.types.Operator):
+    """Mirrors bones and their constraint stacks onto the other side of the rig"""
+    bl_idname = "rigbot.symmetrize_rig"
+    bl_label = "Symmetrize Rig"
+    bl_description = "Mirror the bones on one side of the active armature onto their L/R counterparts (creating missing ones) together with their constraint stacks, swapping targets and subtargets to the other side"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    axis: bpy.props.EnumProperty(
+            name="Axis",
+            description="Axis to mirror across",
+            items=(
+                ('X', "X", "Mirror across the YZ plane"),
+                ('Y', "Y", "Mirror across the XZ plane"),
+                ('Z', "Z", "Mirror across the XY plane"),
+            ),
+            default='X')
+    direction: bpy.props.EnumProperty(
+            name="Direction",
+            description="Side of the axis holding the source bones",
+            items=(
+                ('POSITIVE', "Positive to Negative", "Copy bones on the positive side onto the negative side"),
+                ('NEGATIVE', "Negative to Positive", "Copy bones on the negative side onto the positive side"),
+            ),
+            default='POSITIVE')
+    mirror_constraints: bpy.props.BoolProperty(
+            name="Mirror Constraints",
+            description="Replace the constraint stacks of the counterparts with mirrored copies",
+            default=True)
+    only_selected: bpy.props.BoolProperty(
+            name="Only Selected Bones",
+            description="Only mirror selected bones",
+            default=False)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'ARMATURE' and obj.mode in {'OBJECT', 'POSE'}
+
+    def execute(self, context):
+        armature_obj = context.active_object
+        topology_data = topology.get_topology(armature_obj.data)
+        # One mirror-pair index for the whole rig
+        pairs = symmetry.mirror_pair_index(topology_data.names)
+
+        only = None
+        if self.only_selected:
+            only = {bone.name for bone in armature_obj.data.bones if bone.select}
+        sources = symmetry.source_bones(topology_data, pairs, self.axis, self.direction == 'POSITIVE', only)
+        if not sources:
+            self.report({'WARNING'}, "No bones with side tokens (.L/.R, _Left/_Right, ...) on the source side.")
+            return {'CANCELLED'}
+
+        source_names = [topology_data.names[i] for i in sources]
+        try:
+            target_names = symmetry.symmetrize_bones(armature_obj, source_names, pairs, self.axis, context.view_layer)
+        except (RuntimeError, ValueError) as e:
+            self.report({'ERROR'}, f"Failed to mirror bones: {e}")
+            return {'CANCELLED'}
+
+        added_count = 0
+        if self.mirror_constraints:
+            added_count, errors = symmetry.symmetrize_constraints(armature_obj, source_names, target_names, pairs)
+            for error in errors[:10]: # Don't flood the info log
+                self.report({'WARNING'}, f"Could not set {error}")
+        self.report({'INFO'}, f"Mirrored {len(target_names)} bone(s) and {added_count} constraint(s).")
+        return {'FINISHED'}
+
+class RIGBOT_OT_profile_constraints(bpy.types.Operator):
+    """Measures how much evaluation time each constraint of the active armature adds per frame"""
+    bl_idname = "rigbot.profile_constraints"
+    bl_label = "Profile Constraints"
+    bl_description = "Step through frames of the scene and time the evaluation with each constraint of the active armature muted in turn, ranking the most expensive constraints and bones"
+
+    frame_count: bpy.props.IntProperty(
+            name="Frames",
+            description="Number of frames sampled across the scene's frame range",
+            default=5, min=1, max=250)
+    repeats: bpy.props.IntProperty(
+            name="Repeats",
+            description="Timing passes per measurement, the fastest one is kept",
+            default=3, min=1, max=20)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'ARMATURE' and obj.mode in {'OBJECT', 'POSE'}
+
+    def execute(self, context):
+        armature_obj = context.active_object
+        if not any(pose_bone.constraints for pose_bone in armature_obj.pose.bones):
+            self.report({'WARNING'}, "The active armature has no bone constraints.")
+            return {'CANCELLED'}
+
+        frames = profiler.sample_frames(context.scene, self.frame_count)
+        profile = profiler.profile_constraints(context.scene, armature_obj, frames, self.repeats)
+        ranking = profiler.hottest(profile, 3)
+        report_message = f"Profiled {len(profile.constraint_ms)} constraint(s), {profile.frame_ms:.2f} ms per frame."
+        if ranking:
+            report_message += " Hottest: " + ", ".join(f"{bone_name}/{constraint_name} {cost:.2f} ms"
+                                                       for (bone_name, constraint_name), cost in ranking)
+        self.report({'INFO'}, report_message)
+        return {'FINISHED'}
+
+class RIGBOT_OT_constraint_preset_save(bpy.types.Operator, ExportHelper):
+    """Saves the constraint stacks of the active armature as a JSON preset"""
+    bl_idname = "rigbot.constraint_preset_save"
+    bl_label = "Save Constraint Preset"
+    bl_description = "Save the constraint stacks of the active armature's bones to a JSON preset file"
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+    only_selected: bpy.props.BoolProperty(
+            name="Only Selected Bones",
+            description="Only save the constraint stacks of selected bones",
+            default=False)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'ARMATURE'
+
+    def execute(self, context):
+        armature_obj = context.active_object
+        bone_names = None
+        if self.only_selected:
+            bone_names = {bone.name for bone in armature_obj.data.bones if bone.select}
+
+        preset = presets.capture_preset(armature_obj, bone_names)
+        if not preset["bones"]:
+            self.report({'WARNING'}, "No bones with constraints to save.")
+            return {'CANCELLED'}
+
+        try:
+            presets.save_preset(self.filepath, preset)
+        except OSError as e:
+            self.report({'ERROR'}, f"Failed to save constraint preset: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Saved constraint stacks of {len(preset['bones'])} bone(s).")
+        return {'FINISHED'}
+
+class RIGBOT_OT_constraint_preset_apply(bpy.types.Operator, ImportHelper):
+    """Applies a JSON constraint preset to all selected armatures"""
+    bl_idname = "rigbot.constraint_preset_apply"
+    bl_label = "Apply Constraint Preset"
+    bl_description = "Apply a JSON constraint preset to every selected armature in one step"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+    replace: bpy.props.BoolProperty(
+            name="Replace Existing",
+            description="Remove existing constraints on matched bones before applying the preset",
+            default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'ARMATURE' for obj in context.selected_objects)
+
+    def execute(self, context):
+        armature_objs = [obj for obj in context.selected_objects if obj.type == 'ARMATURE']
+        try:
+            preset = presets.load_preset(self.filepath)
+            added_count, errors = presets.apply_preset(preset, armature_objs, replace=self.replace)
+        except (OSError, ValueError, re.error) as e:
+            self.report({'ERROR'}, f"Failed to apply constraint preset: {e}")
+            return {'CANCELLED'}
+
+        for error in errors[:10]: # Don't flood the info log
+            self.report({'WARNING'}, f"Could not set {error}")
+        self.report({'INFO'}, f"Added {added_count} constraint(s) to {len(armature_objs)} armature(s).")
+        return {'FINISHED'}
+
 classes = (
     RIGBOT_OT_pose_add_damped_track_self,
     RIGBOT_OT_pose_add_stretch_to,
     RIGBOT_OT_pose_add_ik,
+    RIGBOT_OT_pose_batch_add_constraint,
+    RIGBOT_OT_auto_ik_chains,
+    RIGBOT_OT_symmetrize_rig,
+    RIGBOT_OT_profile_constraints,
+    RIGBOT_OT_constraint_preset_save,
+    RIGBOT_OT_constraint_preset_apply,
 )
 
 def register():
-    for cls in classes:
-        bpy.utils.register_class(cls)
+    instrumentation.register_classes(classes)
 
 def unregister():
-    for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
+    instrumentation.unregister_classes(classes)
@@ -1,102 +1,214 @@
 import bpy
 
+from ..core import instrumentation
+from ..core import pose_reset
+from ..core import pose_snapshots
+
+
+def target_armatures(context):
+    """Armatures a pose operator acts on: all armatures in Pose Mode, otherwise the selected and active armatures."""
+    # Read from the view layer, so this also works without a screen (background mode)
+    view_layer_objects = context.view_layer.objects
+    if context.mode == 'POSE':
+        return [obj for obj in view_layer_objects if obj.type == 'ARMATURE' and obj.mode == 'POSE']
+    armatures = [obj for obj in view_layer_objects.selected if obj.type == 'ARMATURE']
+    active_obj = context.active_object
+    if active_obj is not None and active_obj.type == 'ARMATURE' and active_obj not in armatures:
+        armatures.append(active_obj)
+    return armatures
 
 def poll_pose_mode(context):
-    """Checks if context is valid for pose operators (Pose Mode, Armature, Selected Bones)."""
-    return (context.active_object is not None and
-            context.active_object.type == 'ARMATURE' and
-            context.mode == 'POSE' and
-            context.selected_pose_bones is not None) # Check for selected pose bones
-
-class POSE_OT_reset_location(bpy.types.Operator):
-    """Clears Location for all selected pose bones"""
-    bl_idname = "pose.reset_location"
-    bl_label = "Reset Pose Location"
-    bl_options = {'REGISTER', 'UNDO'}
+    """Checks if context is valid for pose operators (at least one armature to act on)."""
+    return bool(target_armatures(context))
+
+class PoseResetMixin:
+    # Channels passed to pose_reset.reset_pose_bones, set by the operators below
+    reset_channels = ()
+    reset_label = ""
+
+    only_selected: bpy.props.BoolProperty(
+            name="Only Selected",
+            description="Only reset the selected bones, otherwise reset every bone",
+            default=True)
+    insert_keyframe: bpy.props.BoolProperty(
+            name="Insert Keyframe",
+            description="Key the reset channels on the current frame",
+            default=False)
 
     @classmethod
     def poll(cls, context):
         return poll_pose_mode(context)
 
     def execute(self, context):
-        if not self.poll(context):
+        armatures = target_armatures(context)
+        if not armatures:
             self.report({'WARNING'}, "Operator cannot run in current context.")
             return {'CANCELLED'}
+
+        reset_count = 0
         try:
-            bpy.ops.pose.loc_clear()
-            self.report({'INFO'}, "Selected pose bone locations reset.")
+            for armature_obj in armatures:
+                bone_names = pose_reset.selected_bone_names(armature_obj.data) if self.only_selected else None
+                reset_count += pose_reset.reset_pose_bones(
+                        armature_obj, bone_names, channels=self.reset_channels,
+                        keyframe=self.insert_keyframe, frame=context.scene.frame_current)
         except RuntimeError as e:
-            self.report({'ERROR'}, f"Failed to reset location: {e}")
+            self.report({'ERROR'}, f"Failed to reset {self.reset_label}: {e}")
             return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Reset {self.reset_label} of {reset_count} pose bone(s).")
         return {'FINISHED'}
 
-class POSE_OT_reset_rotation(bpy.types.Operator):
+class POSE_OT_reset_location(PoseResetMixin, bpy.types.Operator):
+    """Clears Location for all selected pose bones"""
+    bl_idname = "pose.reset_location"
+    bl_label = "Reset Pose Location"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    reset_channels = ('LOCATION',)
+    reset_label = "location"
+
+class POSE_OT_reset_rotation(PoseResetMixin, bpy.types.Operator):
     """Clears Rotation for all selected pose bones"""
     bl_idname = "pose.reset_rotation"
     bl_label = "Reset Pose Rotation"
     bl_options = {'REGISTER', 'UNDO'}
 
+    reset_channels = ('ROTATION',)
+    reset_label = "rotation"
+
+class POSE_OT_reset_scale(PoseResetMixin, bpy.types.Operator):
+    """Clears Scale for all selected pose bones"""
+    bl_idname = "pose.reset_scale"
+    bl_label = "Reset Pose Scale"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    reset_channels = ('SCALE',)
+    reset_label = "scale"
+
+class POSE_OT_reset_transforms(PoseResetMixin, bpy.types.Operator):
+    """Clears Location, Rotation, and Scale for all selected pose bones"""
+    bl_idname = "pose.reset_transforms"
+    bl_label = "Reset All Pose Transforms"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # All channels in one pass, a single depsgraph update
+    reset_channels = ('LOCATION', 'ROTATION', 'SCALE')
+    reset_label = "transforms"
+
+def poll_snapshot_armature(context):
+    """Checks for an active armature object to keep pose snapshots on."""
+    obj = context.active_object
+    return obj is not None and obj.type == 'ARMATURE' and obj.mode != 'EDIT'
+
+class POSE_OT_snapshot_capture(bpy.types.Operator):
+    """Stores the current pose of the active armature as a pose snapshot"""
+    bl_idname = "pose.snapshot_capture"
+    bl_label = "Capture Pose Snapshot"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    name: bpy.props.StringProperty(
+            name="Name",
+            description="Name of the new snapshot, numbered automatically when empty",
+            default="")
+    only_selected: bpy.props.BoolProperty(
+            name="Only Selected",
+            description="Only capture the selected bones, otherwise capture every bone",
+            default=False)
+
     @classmethod
     def poll(cls, context):
-        return poll_pose_mode(context)
+        return poll_snapshot_armature(context)
 
     def execute(self, context):
-        if not self.poll(context):
-            self.report({'WARNING'}, "Operator cannot run in current context.")
-            return {'CANCELLED'}
-        try:
-            bpy.ops.pose.rot_clear()
-            self.report({'INFO'}, "Selected pose bone rotations reset.")
-        except RuntimeError as e:
-            self.report({'ERROR'}, f"Failed to reset rotation: {e}")
+        armature_obj = context.active_object
+        bone_names = pose_reset.selected_bone_names(armature_obj.data) if self.only_selected else None
+        if bone_names == []:
+            self.report({'WARNING'}, "No bones selected.")
             return {'CANCELLED'}
+
+        snapshots = armature_obj.rigbot_pose_snapshots
+        name = self.name or f"Pose {len(snapshots) + 1:02d}"
+        snapshot = pose_snapshots.capture_snapshot(armature_obj, name, bone_names)
+        armature_obj.rigbot_pose_snapshot_index = len(snapshots) - 1
+        self.report({'INFO'}, f"Captured {snapshot.bone_count} bone(s) as '{snapshot.name}'.")
         return {'FINISHED'}
 
-class POSE_OT_reset_scale(bpy.types.Operator):
-    """Clears Scale for all selected pose bones"""
-    bl_idname = "pose.reset_scale"
-    bl_label = "Reset Pose Scale"
+class POSE_OT_snapshot_apply(bpy.types.Operator):
+    """Restores a pose snapshot, or blends the pose towards it"""
+    bl_idname = "pose.snapshot_apply"
+    bl_label = "Apply Pose Snapshot"
     bl_options = {'REGISTER', 'UNDO'}
 
+    index: bpy.props.IntProperty(
+            name="Snapshot",
+            description="Index of the snapshot to apply, -1 for the active one",
+            default=-1, min=-1)
+    factor: bpy.props.FloatProperty(
+            name="Factor",
+            description="Blend from the current pose (0) to the snapshot (1)",
+            default=1.0, min=0.0, max=1.0, subtype='FACTOR')
+    blend_with: bpy.props.StringProperty(
+            name="Blend From",
+            description="Name of a snapshot to blend from instead of the current pose")
+    only_selected: bpy.props.BoolProperty(
+            name="Only Selected",
+            description="Only apply to the selected bones, otherwise to every captured bone",
+            default=False)
+
     @classmethod
     def poll(cls, context):
-        return poll_pose_mode(context)
+        return poll_snapshot_armature(context) and len(context.active_object.rigbot_pose_snapshots) > 0
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "factor", slider=True)
+        layout.prop_search(self, "blend_with", context.active_object, "rigbot_pose_snapshots")
+        layout.prop(self, "only_selected")
 
     def execute(self, context):
-        if not self.poll(context):
-            self.report({'WARNING'}, "Operator cannot run in current context.")
+        armature_obj = context.active_object
+        snapshots = armature_obj.rigbot_pose_snapshots
+        index = armature_obj.rigbot_pose_snapshot_index if self.index < 0 else self.index
+        if not 0 <= index < len(snapshots):
+            self.report({'WARNING'}, "No pose snapshot to apply.")
             return {'CANCELLED'}
+        blend_with = None
+        if self.blend_with:
+            blend_with = snapshots.get(self.blend_with)
+            if blend_with is None:
+                self.report({'WARNING'}, f"Pose snapshot '{self.blend_with}' not found.")
+                return {'CANCELLED'}
+
+        bone_names = pose_reset.selected_bone_names(armature_obj.data) if self.only_selected else None
         try:
-            bpy.ops.pose.scale_clear()
-            self.report({'INFO'}, "Selected pose bone scales reset.")
-        except RuntimeError as e:
-            self.report({'ERROR'}, f"Failed to reset scale: {e}")
+            applied_count = pose_snapshots.apply_snapshot(armature_obj, snapshots[index], self.factor,
+                                                          bone_names, blend_with)
+        except ValueError as e: # Corrupted snapshot data
+            self.report({'ERROR'}, f"Failed to apply pose snapshot: {e}")
             return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Applied '{snapshots[index].name}' to {applied_count} pose bone(s).")
         return {'FINISHED'}
 
-class POSE_OT_reset_transforms(bpy.types.Operator):
-    """Clears Location, Rotation, and Scale for all selected pose bones"""
-    bl_idname = "pose.reset_transforms"
-    bl_label = "Reset All Pose Transforms"
+class POSE_OT_snapshot_remove(bpy.types.Operator):
+    """Deletes the active pose snapshot"""
+    bl_idname = "pose.snapshot_remove"
+    bl_label = "Remove Pose Snapshot"
     bl_options = {'REGISTER', 'UNDO'}
 
     @classmethod
     def poll(cls, context):
-        return poll_pose_mode(context)
+        return poll_snapshot_armature(context) and len(context.active_object.rigbot_pose_snapshots) > 0
 
     def execute(self, context):
-        if not self.poll(context):
-            self.report({'WARNING'}, "Operator cannot run in current context.")
-            return {'CANCELLED'}
-        try:
-            # Call the individual clear operators for clarity and potential robustness
-            bpy.ops.pose.loc_clear()
-            bpy.ops.pose.rot_clear()
-            bpy.ops.pose.scale_clear()
-            self.report({'INFO'}, "Selected pose bone transforms reset.")
-        except RuntimeError as e:
-            self.report({'ERROR'}, f"Failed to reset transforms: {e}")
-            return {'CANCELLED'}
+        armature_obj = context.active_object
+        snapshots = armature_obj.rigbot_pose_snapshots
+        index = min(armature_obj.rigbot_pose_snapshot_index, len(snapshots) - 1)
+        name = snapshots[index].name
+        snapshots.remove(index)
+        armature_obj.rigbot_pose_snapshot_index = max(0, index - 1)
+        self.report({'INFO'}, f"Removed pose snapshot '{name}'.")
         return {'FINISHED'}
 
 # List of classes to register
@@ -105,12 +217,13 @@ classes = (
     POSE_OT_reset_rotation,
     POSE_OT_reset_scale,
     POSE_OT_reset_transforms,
+    POSE_OT_snapshot_capture,
+    POSE_OT_snapshot_apply,
+    POSE_OT_snapshot_remove,
 )
 
 def register():
-    for cls in classes:
-        bpy.utils.register_class(cls)
+    instrumentation.register_classes(classes)
 
 def unregister():
-    for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
\ No newline at end of file
+    instrumentation.unregister_classes(classes)
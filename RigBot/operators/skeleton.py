@@ -1,5 +1,9 @@
 import bpy
 
+from ..core import instrumentation
+from ..core import skeleton_gen
+from ..core import skeletonize
+
 class OBJECT_OT_add_initial_bone(bpy.types.Operator):
     bl_idname = "object.add_initial_bone"
     bl_label = "Add Initial Bone"
@@ -11,6 +15,7 @@ class OBJECT_OT_add_initial_bone(bpy.types.Operator):
             return {'CANCELLED'}
 
         bpy.ops.object.armature_add(enter_editmode=True, location=(0, 0, 0))
+        instrumentation.count(objects=1, bones=1, mode_switches=1)
         obj = context.active_object
         if obj and obj.type == 'ARMATURE':
             obj.data.show_axes = True
@@ -20,8 +25,183 @@ class OBJECT_OT_add_initial_bone(bpy.types.Operator):
         self.report({'INFO'}, "Initial bone added with viewport display options enabled.")
         return {'FINISHED'}
 
+# Enum items of dynamic EnumProperties must stay referenced while Blender uses them
+_template_items = []
+
+def _template_enum_items(self, context):
+    _template_items[:] = [(identifier, name, f"Skeleton template '{name}'")
+                          for identifier, name, _path in skeleton_gen.list_templates()]
+    _template_items.extend([
+        ('CHAIN', "Chain", "A chain of connected bones"),
+        ('TENTACLE', "Branching Tentacle", "A chain that keeps splitting into smaller chains"),
+    ])
+    return _template_items
+
+class OBJECT_OT_generate_skeleton(bpy.types.Operator):
+    """Generates a skeleton from a template or a procedural chain/tentacle"""
+    bl_idname = "object.generate_skeleton"
+    bl_label = "Generate Skeleton"
+    bl_description = "Creates a new armature from a skeleton template (humanoid, quadruped, ...) or a procedural chain or tentacle, building all bones in one Edit Mode session"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    template: bpy.props.EnumProperty(
+            name="Template",
+            description="Skeleton template or procedural generator",
+            items=_template_enum_items)
+    segments: bpy.props.IntProperty(
+            name="Segments",
+            description="Bones per chain",
+            default=6, min=1, max=1000)
+    branches: bpy.props.IntProperty(
+            name="Branches",
+            description="Chains each tentacle chain splits into",
+            default=2, min=1, max=6)
+    depth: bpy.props.IntProperty(
+            name="Depth",
+            description="Levels of tentacle branching",
+            default=3, min=1, max=8)
+    length: bpy.props.FloatProperty(
+            name="Length",
+            description="Length of the (first) chain",
+            default=1.0, min=0.001, subtype='DISTANCE')
+    spread: bpy.props.FloatProperty(
+            name="Spread",
+            description="Angle between a tentacle chain and its branches, in degrees",
+            default=35.0, min=0.0, max=180.0)
+    taper: bpy.props.FloatProperty(
+            name="Taper",
+            description="Length of each segment (chain) relative to the previous one",
+            default=0.8, min=0.05, max=2.0)
+    scale: bpy.props.FloatProperty(
+            name="Scale",
+            description="Uniform scale applied to the generated bones",
+            default=1.0, min=0.001)
+    add_to_active: bpy.props.BoolProperty(
+            name="Add to Active Armature",
+            description="Add the bones to the active armature instead of creating a new one",
+            default=False)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "template")
+        if self.template in {'CHAIN', 'TENTACLE'}:
+            col = layout.column(align=True)
+            col.prop(self, "segments")
+            if self.template == 'TENTACLE':
+                col.prop(self, "branches")
+                col.prop(self, "depth")
+                col.prop(self, "spread")
+            col.prop(self, "length")
+            col.prop(self, "taper")
+        layout.prop(self, "scale")
+        layout.prop(self, "add_to_active")
+
+    def execute(self, context):
+        try:
+            bone_layout = skeleton_gen.make_layout(
+                    self.template, segments=self.segments, branches=self.branches, depth=self.depth,
+                    length=self.length, spread=self.spread, taper=self.taper)
+        except (OSError, ValueError) as e: # Unreadable template or too many bones
+            self.report({'ERROR'}, f"Failed to generate skeleton: {e}")
+            return {'CANCELLED'}
+        bone_layout = skeleton_gen.transform_layout(bone_layout, scale=self.scale)
+
+        active_obj = context.active_object
+        if self.add_to_active and active_obj and active_obj.type == 'ARMATURE':
+            armature_obj = active_obj
+        else:
+            if active_obj and active_obj.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
+            name = dict((item[0], item[1]) for item in _template_items).get(self.template, "Skeleton")
+            armature_obj = skeleton_gen.new_armature_object(name, context.collection, context.scene.cursor.location)
+            for obj in context.selected_objects:
+                obj.select_set(False)
+            armature_obj.select_set(True)
+            instrumentation.count(objects=1)
+
+        try:
+            bone_names = skeleton_gen.build_skeleton(armature_obj, bone_layout, context.view_layer)
+        except RuntimeError as e:
+            self.report({'ERROR'}, f"Failed to build skeleton: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Generated {len(bone_names)} bone(s) in '{armature_obj.name}'.")
+        return {'FINISHED'}
+
+class OBJECT_OT_skeleton_from_mesh(bpy.types.Operator):
+    """Estimates a skeleton from the active mesh and builds it in a new armature"""
+    bl_idname = "object.skeleton_from_mesh"
+    bl_label = "Skeleton from Mesh"
+    bl_description = "Estimates a curve skeleton of the active mesh from a voxelized vertex sample and creates it as bone chains in a new armature"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    quality: bpy.props.EnumProperty(
+            name="Quality",
+            description="Vertex sample size and voxel resolution, higher quality follows thin parts better but takes longer",
+            items=[
+                ('FAST', "Fast", "Small sample and coarse voxels"),
+                ('BALANCED', "Balanced", "Medium sample and voxel resolution"),
+                ('HIGH', "High", "Large sample and fine voxels"),
+            ],
+            default='BALANCED')
+    bone_length: bpy.props.FloatProperty(
+            name="Bone Length",
+            description="Approximate length of the generated bones, 0 uses 1/16 of the mesh size",
+            default=0.0, min=0.0, subtype='DISTANCE')
+    min_branch_length: bpy.props.FloatProperty(
+            name="Min Branch Length",
+            description="Shorter side branches are discarded as noise, 0 uses 1/12 of the mesh size",
+            default=0.0, min=0.0, subtype='DISTANCE')
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        mesh_obj = context.active_object
+        if mesh_obj.mode == 'EDIT':
+            mesh_obj.update_from_editmode()
+        if len(mesh_obj.data.vertices) < 4:
+            self.report({'WARNING'}, "The mesh has too few vertices to estimate a skeleton.")
+            return {'CANCELLED'}
+
+        try:
+            bone_layout = skeletonize.skeleton_from_points(
+                    skeletonize.read_world_points(mesh_obj), quality=self.quality,
+                    bone_length=self.bone_length or None, min_branch_length=self.min_branch_length or None)
+        except (MemoryError, ValueError) as e:
+            self.report({'ERROR'}, f"Failed to estimate a skeleton: {e}")
+            return {'CANCELLED'}
+
+        if mesh_obj.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        # The armature sits at the mesh origin, bone positions are relative to it
+        location = mesh_obj.matrix_world.translation.copy()
+        bone_layout = skeleton_gen.transform_layout(bone_layout, offset=tuple(-location))
+        armature_obj = skeleton_gen.new_armature_object(f"{mesh_obj.name}_Rig", context.collection, location)
+        for obj in context.selected_objects:
+            obj.select_set(False)
+        armature_obj.select_set(True)
+        instrumentation.count(objects=1)
+
+        try:
+            bone_names = skeleton_gen.build_skeleton(armature_obj, bone_layout, context.view_layer)
+        except RuntimeError as e:
+            self.report({'ERROR'}, f"Failed to build skeleton: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Estimated {len(bone_names)} bone(s) from '{mesh_obj.name}' in '{armature_obj.name}'.")
+        return {'FINISHED'}
+
+classes = (
+    OBJECT_OT_add_initial_bone,
+    OBJECT_OT_generate_skeleton,
+    OBJECT_OT_skeleton_from_mesh,
+)
+
 def register():
-    bpy.utils.register_class(OBJECT_OT_add_initial_bone)
+    instrumentation.register_classes(classes)
 
 def unregister():
-    bpy.utils.unregister_class(OBJECT_OT_add_initial_bone)
+    instrumentation.unregister_classes(classes)
@@ -1,12 +1,49 @@
 import bpy
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 
-class OBJECT_OT_parent_by_name(bpy.types.Operator):
+from ..core import envelope
+from ..core import instrumentation
+from ..core import jobs
+from ..core import name_match
+from ..core import parenting
+from ..core import properties
+from ..core import skin_io
+from ..core import weights
+
+class OBJECT_OT_parent_by_name(jobs.JobOperatorMixin, bpy.types.Operator):
     """Parents selected objects to bones of the active armature if names match"""
     bl_idname = "object.parent_by_name"
     bl_label = "Parent Objects to Bones by Name"
-    bl_description = "Parents selected objects to bones in the active armature where object name matches bone name"
+    bl_description = "Parents selected objects to bones in the active armature where the object name matches a bone name, ignoring configured prefixes, suffixes and side tokens"
     bl_options = {'REGISTER', 'UNDO'}
 
+    keep_transform: bpy.props.BoolProperty(
+            name="Keep Transform",
+            description="Keep the current world transform of the parented objects",
+            default=False)
+    strip_prefixes: bpy.props.StringProperty(
+            name="Strip Prefixes",
+            description="Comma separated prefixes ignored on object and bone names (e.g. MESH_, DEF-)",
+            default="")
+    strip_suffixes: bpy.props.StringProperty(
+            name="Strip Suffixes",
+            description="Comma separated suffixes ignored on object and bone names (e.g. _geo)",
+            default="")
+    ignore_duplicate_suffix: bpy.props.BoolProperty(
+            name="Ignore .001 Suffixes",
+            description="Ignore Blender's numeric duplicate suffixes such as .001",
+            default=True)
+    ignore_case: bpy.props.BoolProperty(
+            name="Ignore Case",
+            description="Match names regardless of upper/lower case",
+            default=True)
+    match_mirror_tokens: bpy.props.BoolProperty(
+            name="Match Side Tokens",
+            description="Treat side tokens such as .L, _L, _Left and L_ as equivalent",
+            default=True)
+
+    job_errors = (RuntimeError, TypeError, ValueError)
+
     @classmethod
     def poll(cls, context):
         # Requires an active object that is an armature, and at least one other selected object
@@ -15,119 +52,345 @@ class OBJECT_OT_parent_by_name(bpy.types.Operator):
                 active_obj.type == 'ARMATURE' and
                 len(context.selected_objects) > 1) # Need armature + at least one child
 
-    def execute(self, context):
+    def start_job(self, context):
         armature_obj = context.active_object
         if not (armature_obj and armature_obj.type == 'ARMATURE'):
             # Poll should prevent this, but double-check
             self.report({'WARNING'}, "Active object must be an Armature.")
-            return {'CANCELLED'}
-
-        # Store original context
-        original_mode = armature_obj.mode
-        original_active = context.view_layer.objects.active
-        original_selection = context.selected_objects[:] # Make a copy
+            return None
 
         # Get potential children (all selected objects EXCEPT the armature)
         selected_children = [obj for obj in context.selected_objects if obj != armature_obj]
 
         if not selected_children:
             self.report({'INFO'}, "No other objects selected besides the armature to parent.")
-            return {'CANCELLED'}
+            return None
+
+        rules = name_match.NameMatchRules(
+                strip_prefixes=name_match.parse_name_list(self.strip_prefixes),
+                strip_suffixes=name_match.parse_name_list(self.strip_suffixes),
+                strip_duplicate_suffix=self.ignore_duplicate_suffix,
+                ignore_case=self.ignore_case,
+                mirror_tokens=self.match_mirror_tokens)
+        # Built once per armature and rule set, reused until bones are renamed or added
+        name_index = name_match.get_bone_name_index(armature_obj.data, rules)
+
+        # Collect all (object, bone) matches first, then parent them one object per job step.
+        # Parenting goes through the data API, so no mode switches or selection changes are needed.
+        assignments = []
+        for child_obj in selected_children:
+            bone_name = name_index.match(child_obj.name)
+            if bone_name is not None:
+                assignments.append((child_obj, bone_name))
+        self._unmatched_count = len(selected_children) - len(assignments)
 
-        armature_data = armature_obj.data
-        parented_count = 0
-        failed_parents = []
+        # Objects are saved right before they change, a cancelled job restores them
+        saved_states = []
+        steps = parenting.iter_parent_objects_to_bones(armature_obj, assignments, self.keep_transform, saved_states)
+        return jobs.Job("Parenting by name", len(assignments), steps,
+                        rollback=lambda: parenting.restore_parent_states(saved_states))
 
-        # Create a dictionary of bones for faster lookup
-        bones_dict = {bone.name: bone for bone in armature_data.bones}
+    def finish_job(self, context, job):
+        parented_count = sum(job.results)
+        skipped_count = len(job.results) - parented_count
+        unmatched_count = self._unmatched_count
+        # Counters instead of per-object debug output
+        instrumentation.count(matched=job.total, skipped=skipped_count, unmatched=unmatched_count)
 
-        # Ensure Object Mode for parenting operations
-        if original_mode != 'OBJECT':
+        # Final report
+        report_message = f"Parented {parented_count} object(s) by name."
+        if skipped_count:
+            report_message += f" {skipped_count} already parented correctly."
+        if unmatched_count:
+            report_message += f" {unmatched_count} without a matching bone."
+        self.report({'INFO'}, report_message)
+        return {'FINISHED'}
+
+class OBJECT_OT_skin_envelope(bpy.types.Operator):
+    """Weights selected meshes to the active armature from bone envelopes"""
+    bl_idname = "object.skin_envelope"
+    bl_label = "Skin Meshes with Envelopes"
+    bl_description = "Computes vertex group weights for the selected meshes from the bone envelopes (head/tail radius and envelope distance) of the active armature and adds an Armature modifier"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    only_deform: bpy.props.BoolProperty(
+            name="Only Deform Bones",
+            description="Only create vertex groups for bones with Deform enabled",
+            default=True)
+    normalize: bpy.props.BoolProperty(
+            name="Normalize",
+            description="Scale the weights of every vertex to add up to 1",
+            default=True)
+    fill_unweighted: bpy.props.BoolProperty(
+            name="Fill Unweighted",
+            description="Assign vertices outside every envelope fully to the nearest bone",
+            default=True)
+    chunk_size: bpy.props.IntProperty(
+            name="Chunk Size",
+            description="Vertex-bone distances evaluated at once, lower values use less memory",
+            default=properties.DEFAULT_CHUNK_ELEMENTS, min=1024)
+    resolution: bpy.props.IntProperty(
+            name="Weight Steps",
+            description="Weights are rounded to this many steps between 0 and 1 before they are written",
+            default=properties.WEIGHT_RESOLUTION, min=16, max=65536)
+
+    @classmethod
+    def poll(cls, context):
+        active_obj = context.active_object
+        return (active_obj is not None and
+                active_obj.type == 'ARMATURE' and
+                any(obj.type == 'MESH' for obj in context.selected_objects))
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "only_deform")
+        layout.prop(self, "normalize")
+        layout.prop(self, "fill_unweighted")
+        col = layout.column(align=True)
+        col.label(text="Advanced:")
+        col.prop(self, "chunk_size")
+        col.prop(self, "resolution")
+
+    def execute(self, context):
+        armature_obj = context.active_object
+        if not (armature_obj and armature_obj.type == 'ARMATURE'):
+            self.report({'WARNING'}, "Active object must be an Armature.")
+            return {'CANCELLED'}
+
+        meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        # Edit Mode keeps its own copy of the mesh, vertex groups written now would be overwritten on exit
+        editing = [obj for obj in meshes if obj.mode == 'EDIT']
+        meshes = [obj for obj in meshes if obj.mode != 'EDIT']
+        if not meshes:
+            self.report({'WARNING'}, "No selected meshes outside Edit Mode to skin.")
+            return {'CANCELLED'}
+
+        skinned_count = 0
+        group_count = 0
+        for mesh_obj in meshes:
             try:
-                bpy.ops.object.mode_set(mode='OBJECT')
-            except RuntimeError as e:
-                self.report({'ERROR'}, f"Could not switch to Object Mode: {e}")
+                groups = envelope.skin_mesh_with_envelopes(
+                        mesh_obj, armature_obj,
+                        only_deform=self.only_deform,
+                        normalize=self.normalize,
+                        fill_unweighted=self.fill_unweighted,
+                        chunk_elements=self.chunk_size,
+                        resolution=self.resolution)
+            except (MemoryError, RuntimeError, ValueError) as e:
+                self.report({'ERROR'}, f"Failed to skin '{mesh_obj.name}': {e}")
                 return {'CANCELLED'}
+            if groups:
+                skinned_count += 1
+                group_count = max(group_count, groups)
 
-        # --- Iterate and Parent ---
-        for child_obj in selected_children:
-            if child_obj.name in bones_dict:
-                bone_name = child_obj.name
-                target_bone = bones_dict[bone_name]
-                print(f"Match found: Object '{child_obj.name}' and Bone '{bone_name}'") # Debug info
-
-                # --- Parenting Process ---
-                try:
-                    # 1. Deselect all first for clean state
-                    bpy.ops.object.select_all(action='DESELECT')
-
-                    # 2. Select child and armature, make armature active
-                    child_obj.select_set(True)
-                    armature_obj.select_set(True)
-                    context.view_layer.objects.active = armature_obj # Essential for parenting context
-
-                    # 3. Set the target bone as the armature's active bone
-                    #    Needs to be done *before* potentially switching mode
-                    armature_data.bones.active = target_bone
-
-                    # 4. Switch to Pose Mode - Required for 'BONE' type parenting
-                    bpy.ops.object.mode_set(mode='POSE')
-
-                    # 5. Parent to the active bone (set in step 3)
-                    #    Check if already parented to avoid errors (optional but good)
-                    if child_obj.parent != armature_obj or child_obj.parent_bone != bone_name:
-                        bpy.ops.object.parent_set(type='BONE')
-                        parented_count += 1
-                        print(f"Successfully parented '{child_obj.name}' to bone '{bone_name}'") # Debug
-                    else:
-                        print(f"'{child_obj.name}' already parented correctly to bone '{bone_name}'. Skipping.") # Debug
-
-
-                    # 6. Switch back to Object mode for the next object
-                    bpy.ops.object.mode_set(mode='OBJECT')
-
-                except Exception as e:
-                    failed_parents.append(child_obj.name)
-                    self.report({'WARNING'}, f"Failed parenting '{child_obj.name}' to bone '{bone_name}': {e}")
-                    # Attempt to return to object mode if error occurred mid-process
-                    if context.object and context.object.mode != 'OBJECT':
-                        try:
-                            bpy.ops.object.mode_set(mode='OBJECT')
-                        except RuntimeError: pass # Ignore if fails
-
-
-        # --- Cleanup ---
-        # Deselect all
-        bpy.ops.object.select_all(action='DESELECT')
-        # Restore original selection
-        for obj in original_selection:
-            try:
-                obj.select_set(True)
-            except ReferenceError:
-                pass # Object might have been deleted or is invalid
-        # Restore original active object
-        try:
-            context.view_layer.objects.active = original_active
-        except ReferenceError:
-            pass # Original active might be invalid
-        # Restore original mode if it changed and possible
-        if context.object and context.object.mode != original_mode:
+        if not skinned_count:
+            self.report({'WARNING'}, "The armature has no bones to skin with.")
+            return {'CANCELLED'}
+
+        report_message = f"Skinned {skinned_count} mesh(es) to up to {group_count} bone(s)."
+        if editing:
+            report_message += f" Skipped {len(editing)} mesh(es) in Edit Mode."
+        self.report({'INFO'}, report_message)
+        return {'FINISHED'}
+
+class OBJECT_OT_clean_weights(bpy.types.Operator):
+    """Smooths, prunes, limits and normalizes the vertex weights of the selected meshes"""
+    bl_idname = "object.clean_weights"
+    bl_label = "Clean Up Weights"
+    bl_description = "Smooths, prunes, limits to N influences and normalizes the vertex group weights of the selected meshes in one bulk pass"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    group_filter: bpy.props.EnumProperty(
+            name="Groups",
+            description="Vertex groups to process, locked groups are always left untouched",
+            items=[
+                ('DEFORM', "Deform Bones", "Groups of deforming bones in the mesh's Armature modifiers (all groups without one)"),
+                ('ALL', "All Groups", "Every vertex group"),
+            ],
+            default='DEFORM')
+    smooth_iterations: bpy.props.IntProperty(
+            name="Smooth Iterations",
+            description="Times the weights are blended with their edge neighbours, 0 disables smoothing",
+            default=0, min=0, max=100)
+    smooth_factor: bpy.props.FloatProperty(
+            name="Smooth Factor",
+            description="Blend towards the neighbour average per iteration",
+            default=0.5, min=0.0, max=1.0)
+    prune_threshold: bpy.props.FloatProperty(
+            name="Prune Below",
+            description="Remove weights below this value, 0 disables pruning",
+            default=0.01, min=0.0, max=1.0)
+    limit: bpy.props.IntProperty(
+            name="Max Influences",
+            description="Keep only the strongest influences per vertex, 0 disables the limit",
+            default=4, min=0, max=32)
+    normalize: bpy.props.BoolProperty(
+            name="Normalize",
+            description="Scale the weights of every vertex to add up to 1",
+            default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+
+    def execute(self, context):
+        meshes = [obj for obj in context.selected_objects if obj.type == 'MESH' and obj.vertex_groups]
+        # Edit Mode keeps its own copy of the mesh, vertex groups written now would be overwritten on exit
+        editing = [obj for obj in meshes if obj.mode == 'EDIT']
+        meshes = [obj for obj in meshes if obj.mode != 'EDIT']
+        if not meshes:
+            self.report({'WARNING'}, "No selected meshes with vertex groups outside Edit Mode.")
+            return {'CANCELLED'}
+
+        updated_groups = 0
+        over_limit = 0
+        for mesh_obj in meshes:
             try:
-                bpy.ops.object.mode_set(mode=original_mode)
-            except RuntimeError: pass # Ignore if fails
+                original = weights.read_weight_matrix(mesh_obj)
+                group_mask = weights.editable_group_mask(mesh_obj, original.group_names,
+                                                         deform_only=self.group_filter == 'DEFORM')
 
+                matrix = original
+                if self.smooth_iterations:
+                    matrix = matrix.smooth(weights.read_mesh_edges(mesh_obj.data), self.smooth_factor,
+                                           self.smooth_iterations, group_mask)
+                if self.prune_threshold > 0.0:
+                    matrix = matrix.prune(self.prune_threshold, group_mask)
+                if self.limit:
+                    over_limit += int((matrix.influence_counts(group_mask) > self.limit).sum())
+                    matrix = matrix.limit_influences(self.limit, group_mask)
+                if self.normalize:
+                    matrix = matrix.normalize(group_mask)
 
-        # Final report
-        report_message = f"Parented {parented_count} object(s) by name."
-        if failed_parents:
-            report_message += f" Failed to parent: {', '.join(failed_parents)}."
+                updated_groups += weights.write_weight_matrix(mesh_obj, matrix, previous=original)
+            except (MemoryError, RuntimeError, ValueError) as e:
+                self.report({'ERROR'}, f"Failed to clean up weights of '{mesh_obj.name}': {e}")
+                return {'CANCELLED'}
+
+        report_message = f"Updated {updated_groups} vertex group(s) on {len(meshes)} mesh(es)."
+        if over_limit:
+            report_message += f" Limited {over_limit} vertices to {self.limit} influences."
+        if editing:
+            report_message += f" Skipped {len(editing)} mesh(es) in Edit Mode."
         self.report({'INFO'}, report_message)
+        return {'FINISHED'}
+
+class OBJECT_OT_skin_weights_export(bpy.types.Operator, ExportHelper):
+    """Exports the bones of the active armature and the skin weights of the selected meshes"""
+    bl_idname = "object.skin_weights_export"
+    bl_label = "Export Skin Weights"
+    bl_description = "Write the bone table of the active armature and the bone weights of the selected meshes to a compact binary skin weight file"
+
+    filename_ext = ".rbsw"
+    filter_glob: bpy.props.StringProperty(default="*.rbsw", options={'HIDDEN'})
+    max_influences: bpy.props.IntProperty(
+            name="Max Influences",
+            description="Influence slots stored per vertex, the strongest weights are kept",
+            default=4, min=1, max=32)
+    precision: bpy.props.EnumProperty(
+            name="Precision",
+            description="Storage type of the weights",
+            items=[
+                ('FLOAT32', "Float (32 bit)", "Store weights as 32 bit floats"),
+                ('UINT16', "Integer (16 bit)", "Store weights as 16 bit integers, half the size"),
+            ],
+            default='FLOAT32')
 
+    @classmethod
+    def poll(cls, context):
+        active_obj = context.active_object
+        return (active_obj is not None and
+                active_obj.type == 'ARMATURE' and
+                any(obj.type == 'MESH' for obj in context.selected_objects))
+
+    def execute(self, context):
+        armature_obj = context.active_object
+        meshes = [obj for obj in context.selected_objects if obj.type == 'MESH' and obj.mode != 'EDIT']
+        if not meshes:
+            self.report({'WARNING'}, "No selected meshes outside Edit Mode to export.")
+            return {'CANCELLED'}
+
+        try:
+            mesh_count = skin_io.export_skin_weights(self.filepath, armature_obj, meshes,
+                                                     max_influences=self.max_influences, precision=self.precision)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, f"Failed to export skin weights: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Exported skin weights of {mesh_count} mesh(es) for {len(armature_obj.data.bones)} bone(s).")
         return {'FINISHED'}
 
+class OBJECT_OT_skin_weights_import(bpy.types.Operator, ImportHelper):
+    """Imports skin weights from a binary skin weight file onto the selected meshes"""
+    bl_idname = "object.skin_weights_import"
+    bl_label = "Import Skin Weights"
+    bl_description = "Replace the bone vertex groups of the selected meshes with the weights of a binary skin weight file, matching meshes by name"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".rbsw"
+    filter_glob: bpy.props.StringProperty(default="*.rbsw", options={'HIDDEN'})
+    add_modifier: bpy.props.BoolProperty(
+            name="Add Armature Modifier",
+            description="Add an Armature modifier for the active armature to meshes that have none",
+            default=True)
+
+    @classmethod
+    def poll(cls, context):
+        return any(obj.type == 'MESH' for obj in context.selected_objects)
+
+    def execute(self, context):
+        meshes = [obj for obj in context.selected_objects if obj.type == 'MESH' and obj.mode != 'EDIT']
+        if not meshes:
+            self.report({'WARNING'}, "No selected meshes outside Edit Mode to import onto.")
+            return {'CANCELLED'}
+        active_obj = context.active_object
+        armature_obj = active_obj if active_obj is not None and active_obj.type == 'ARMATURE' else None
+
+        try:
+            header, _arrays = skin_io.load_skin_weights(self.filepath)
+        except (OSError, ValueError, KeyError) as e:
+            self.report({'ERROR'}, f"Failed to read skin weights: {e}")
+            return {'CANCELLED'}
+
+        entries = {entry["name"]: entry for entry in header["meshes"]}
+        if len(meshes) == 1 and len(header["meshes"]) == 1:
+            # A single mesh on both sides is matched regardless of its name
+            assignments = [(meshes[0], header["meshes"][0])]
+        else:
+            assignments = [(mesh_obj, entries[mesh_obj.name]) for mesh_obj in meshes if mesh_obj.name in entries]
+        if not assignments:
+            self.report({'WARNING'}, "No selected mesh matches a mesh in the skin weight file.")
+            return {'CANCELLED'}
+
+        imported_count = 0
+        for mesh_obj, entry in assignments:
+            try:
+                skin_io.apply_skin_weights(mesh_obj, header, entry)
+            except ValueError as e:
+                self.report({'WARNING'}, str(e))
+                continue
+            if self.add_modifier and armature_obj is not None:
+                weights.ensure_armature_modifier(mesh_obj, armature_obj)
+            imported_count += 1
+
+        report_message = f"Imported skin weights onto {imported_count} mesh(es)."
+        unmatched_count = len(meshes) - len(assignments)
+        if unmatched_count:
+            report_message += f" {unmatched_count} without a matching mesh in the file."
+        self.report({'INFO'}, report_message)
+        return {'FINISHED'} if imported_count else {'CANCELLED'}
+
+
+classes = (
+    OBJECT_OT_parent_by_name,
+    OBJECT_OT_skin_envelope,
+    OBJECT_OT_clean_weights,
+    OBJECT_OT_skin_weights_export,
+    OBJECT_OT_skin_weights_import,
+)
 
 def register():
-    bpy.utils.register_class(OBJECT_OT_parent_by_name)
+    instrumentation.register_classes(classes)
 
 def unregister():
-    bpy.utils.unregister_class(OBJECT_OT_parent_by_name)
\ No newline at end of file
+    instrumentation.unregister_classes(classes)
\ No newline at end of file
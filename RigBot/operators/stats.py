@@ -0,0 +1,43 @@
+import bpy
+from bpy_extras.io_utils import ExportHelper
+
+from ..core import instrumentation
+
+class RIGBOT_OT_stats_export(bpy.types.Operator, ExportHelper):
+    """Exports the RigBot operator timing statistics to a JSON file"""
+    bl_idname = "rigbot.stats_export"
+    bl_label = "Export RigBot Stats"
+    bl_description = "Export per-operator timings, histograms and counters to a JSON file"
+
+    filename_ext = ".json"
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+
+    def execute(self, context):
+        try:
+            instrumentation.export_json(self.filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"Failed to export stats: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported stats of {len(instrumentation.operator_stats())} operator(s).")
+        return {'FINISHED'}
+
+class RIGBOT_OT_stats_reset(bpy.types.Operator):
+    """Clears the RigBot operator timing statistics"""
+    bl_idname = "rigbot.stats_reset"
+    bl_label = "Reset RigBot Stats"
+    bl_description = "Clear the recorded operator timings"
+
+    def execute(self, context):
+        instrumentation.reset()
+        return {'FINISHED'}
+
+classes = (
+    RIGBOT_OT_stats_export,
+    RIGBOT_OT_stats_reset,
+)
+
+def register():
+    instrumentation.register_classes(classes)
+
+def unregister():
+    instrumentation.unregister_classes(classes)
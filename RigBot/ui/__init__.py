@@ -1,13 +1,19 @@
+from . import constraint_model
 from . import rigbot_panel
 from . import viewport_panel
 from . import pie_menu
+from . import stats_panel
 
 def register():
+    constraint_model.register()
     rigbot_panel.register()
     viewport_panel.register()
     pie_menu.register()
+    stats_panel.register()
 
 def unregister():
+    stats_panel.unregister()
     rigbot_panel.unregister()
     viewport_panel.unregister()
-    pie_menu.unregister()
\ No newline at end of file
+    pie_menu.unregister()
+    constraint_model.unregister()
\ No newline at end of file
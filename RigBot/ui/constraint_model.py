@@ -0,0 +1,115 @@
+from collections import namedtuple
+
+import bpy
+from bpy.app.handlers import persistent
+
+from ..core import profiler
+
+# View-model of the active bone's constraint stack for VIEW3D_PT_RigBotPanel.
+# Rows are built once per (armature object, bone) and reused across redraws. They are
+# dropped through the message bus when a constraint property changes and through a
+# depsgraph handler when the armature object is updated (constraints added, removed, moved).
+# Frame changes during playback don't invalidate anything. A new constraint profile of the armature
+# (see core.profiler) rebuilds its rows too, cost_ms is None for constraints that weren't profiled.
+ConstraintRow = namedtuple("ConstraintRow", ("index", "name", "icon", "show_head_tail", "search_bones", "properties",
+                                             "cost_ms"))
+
+# Properties drawn per constraint type, after name/target/subtarget
+TYPE_PROPERTIES = {
+    'DAMPED_TRACK': ("track_axis", "influence"),
+    'STRETCH_TO': ("rest_length", "bulge", "volume", "keep_axis", "influence"),
+    'IK': ("chain_count", "influence"),
+}
+# Labels overriding the RNA property names
+PROPERTY_LABELS = {
+    "chain_count": "Chain Length",
+}
+TYPE_ICONS = {
+    'DAMPED_TRACK': 'CON_TRACKTO',
+    'STRETCH_TO': 'CON_STRETCHTO',
+    'IK': 'CON_KINEMATIC',
+}
+
+_rows = {} # (object pointer, bone name) -> (ConstraintProfile or None, tuple of ConstraintRow)
+_msgbus_owner = object()
+
+
+def _build_rows(pose_bone, profile):
+    costs = profile.constraint_ms if profile is not None else {}
+    rows = []
+    for index, constraint in enumerate(pose_bone.constraints):
+        target = getattr(constraint, "target", None)
+        rows.append(ConstraintRow(
+                index=index,
+                name=constraint.name,
+                icon=TYPE_ICONS.get(constraint.type, 'CONSTRAINT_BONE'),
+                show_head_tail=hasattr(constraint, "head_tail"),
+                # Bone search only makes sense for constraints with a subtarget on an armature target
+                search_bones=hasattr(constraint, "subtarget") and target is not None and target.type == 'ARMATURE',
+                properties=TYPE_PROPERTIES.get(constraint.type, ("influence",)),
+                cost_ms=costs.get((pose_bone.name, constraint.name)),
+        ))
+    return tuple(rows)
+
+def get_rows(armature_obj, pose_bone):
+    """Returns the cached rows describing the pose bone's constraint stack."""
+    key = (armature_obj.as_pointer(), pose_bone.name)
+    profile = profiler.get_profile(armature_obj)
+    built_profile, rows = _rows.get(key, (None, None))
+    # The length check catches stack changes that didn't reach the handlers yet
+    if rows is None or len(rows) != len(pose_bone.constraints) or built_profile is not profile:
+        rows = _build_rows(pose_bone, profile)
+        _rows[key] = (profile, rows)
+    return rows
+
+def invalidate(armature_obj=None):
+    """Drops the rows of one armature object, or all rows."""
+    if armature_obj is None:
+        _rows.clear()
+        return
+    pointer = armature_obj.as_pointer()
+    for key in [key for key in _rows if key[0] == pointer]:
+        del _rows[key]
+
+def _on_constraint_changed(*_args):
+    invalidate()
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    if not _rows:
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object) and update.id.type == 'ARMATURE':
+            invalidate(update.id.original)
+
+def _subscribe():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    # Any property of any constraint (name, target, subtarget, ...)
+    bpy.msgbus.subscribe_rna(key=bpy.types.Constraint, owner=_msgbus_owner, args=(), notify=_on_constraint_changed)
+
+@persistent
+def _on_load_post(*_args):
+    # Loading a file clears message bus subscriptions and reuses data pointers
+    invalidate()
+    _subscribe()
+
+@persistent
+def _on_undo_redo(*_args):
+    invalidate()
+
+def register():
+    _subscribe()
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    bpy.app.handlers.load_post.append(_on_load_post)
+    bpy.app.handlers.undo_post.append(_on_undo_redo)
+    bpy.app.handlers.redo_post.append(_on_undo_redo)
+
+def unregister():
+    for handlers, handler in ((bpy.app.handlers.redo_post, _on_undo_redo),
+                              (bpy.app.handlers.undo_post, _on_undo_redo),
+                              (bpy.app.handlers.load_post, _on_load_post),
+                              (bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update)):
+        if handler in handlers:
+            handlers.remove(handler)
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    invalidate()
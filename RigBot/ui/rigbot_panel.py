@@ -1,5 +1,12 @@
+import fnmatch
+
 import bpy
 
+from ..core import cache
+from ..core import profiler
+from ..core import topology
+from . import constraint_model
+
 class VIEW3D_PT_RigBotPanel(bpy.types.Panel):
     bl_label = "RigBot"
     bl_idname = "VIEW3D_PT_RigBotPanel"
@@ -27,6 +34,8 @@ class VIEW3D_PT_RigBotPanel(bpy.types.Panel):
                 box.label(text="Bone Creation", icon='OUTLINER_OB_ARMATURE')
                 col = box.column(align=True)
                 col.operator("object.add_initial_bone", text="Add Initial Bone", icon='BONE_DATA')
+                col.operator("object.generate_skeleton", text="Generate Skeleton", icon='OUTLINER_OB_ARMATURE')
+                col.operator("object.skeleton_from_mesh", text="Skeleton from Mesh", icon='MESH_DATA')
 
             # Section: Bone List (Outliner View using UIList) - Shown when armature is active
             if context.active_object and context.active_object.type == 'ARMATURE':
@@ -34,8 +43,10 @@ class VIEW3D_PT_RigBotPanel(bpy.types.Panel):
                 box_list = layout.box()
                 box_list.label(text="Bone List", icon='BONE_DATA')
                 box_list.template_list("BONE_UL_list", "", context.active_object.data, "bones", scene, "rigbot_bone_index", rows=5)
+                box_list.operator("object.select_bones_by_pattern", text="Select by Pattern", icon='VIEWZOOM')
                 # Rename button for the active bone
                 box_list.operator("object.rename_bone", text="Rename Active Bone")
+                box_list.operator("object.rename_bones_bulk", text="Rename Bones", icon='SORTALPHA')
 
         layout.separator()
 
@@ -63,6 +74,12 @@ class VIEW3D_PT_RigBotPanel(bpy.types.Panel):
                     icon='CONSTRAINT_BONE' # Or 'CONSTRAINT_BONE' or 'LINKED'
             )
             parent_op.type = 'BONE' # Set the parenting type
+            # Envelope weighting of the selected meshes
+            col.operator("object.skin_envelope", text="Skin Meshes with Envelopes", icon='MOD_ARMATURE')
+            col.operator("object.clean_weights", text="Clean Up Weights", icon='MOD_VERTEX_WEIGHT')
+            row = col.row(align=True)
+            row.operator("object.skin_weights_export", text="Export Weights", icon='EXPORT')
+            row.operator("object.skin_weights_import", text="Import Weights", icon='IMPORT')
             
             # Clear Parent button
             clear_parent_op = col.operator(
@@ -101,6 +118,29 @@ class VIEW3D_PT_RigBotPanel(bpy.types.Panel):
                     text="Add Inverse Kinematics",
                     icon='CON_KINEMATIC'
             )
+            col.separator()
+            # Add a constraint to many bones at once
+            col.operator(
+                    "rigbot.pose_batch_add_constraint",
+                    text="Batch Add Constraint",
+                    icon='MOD_ARRAY'
+            )
+            # IK controls for every limb chain
+            col.operator("rigbot.auto_ik_chains", text="Auto IK Limbs", icon='CON_KINEMATIC')
+            # Mirror bones and constraint stacks onto the other side
+            col.operator("rigbot.symmetrize_rig", text="Symmetrize Rig", icon='MOD_MIRROR')
+            # Constraint presets
+            row = col.row(align=True)
+            row.operator("rigbot.constraint_preset_save", text="Save Preset", icon='EXPORT')
+            row.operator("rigbot.constraint_preset_apply", text="Apply Preset", icon='IMPORT')
+            # Constraint evaluation cost, hottest constraints of the last profile run
+            col.operator("rigbot.profile_constraints", text="Profile Constraints", icon='TIME')
+            profile = profiler.get_profile(obj) if obj and obj.type == 'ARMATURE' else None
+            if profile is not None:
+                profile_col = box.column(align=True)
+                profile_col.label(text=f"Evaluation: {profile.frame_ms:.2f} ms per frame")
+                for (bone_name, constraint_name), cost in profiler.hottest(profile, 5):
+                    profile_col.label(text=f"{cost:.2f} ms  {bone_name} / {constraint_name}")
             
             # --- Display Existing Constraints ---
             pbone = context.active_pose_bone # Get the active pose bone
@@ -110,66 +150,64 @@ class VIEW3D_PT_RigBotPanel(bpy.types.Panel):
                 if not pbone.constraints:
                     box.label(text="Active bone has no constraints.", icon='INFO')
                 else:
-                    # Iterate through constraints of the active pose bone
-                    for constraint in pbone.constraints:
+                    # Rows come from a cached view-model, rebuilt only when the stack changes
+                    rows = constraint_model.get_rows(context.object, pbone)
+
+                    options_row = box.row(align=True)
+                    options_row.prop(scene, "rigbot_constraints_compact", text="Compact", toggle=True)
+                    options_row.prop(scene, "rigbot_constraints_per_page", text="Per Page")
+
+                    # Long stacks are paged so the panel only draws a handful of constraints
+                    per_page = scene.rigbot_constraints_per_page
+                    page_count = (len(rows) + per_page - 1) // per_page
+                    page = min(scene.rigbot_constraint_page, page_count - 1)
+                    if page_count > 1:
+                        box.prop(scene, "rigbot_constraint_page", text=f"Page (of {page_count})")
+
+                    for row in rows[page * per_page:(page + 1) * per_page]:
+                        constraint = pbone.constraints[row.index]
+
+                        if scene.rigbot_constraints_compact:
+                            # One line per constraint: mute toggle, name and influence
+                            line = box.row(align=True)
+                            line.prop(constraint, "mute", text="", emboss=False,
+                                      icon='HIDE_ON' if constraint.mute else 'HIDE_OFF')
+                            line.label(text=row.name, icon=row.icon)
+                            line.prop(constraint, "influence", text="", slider=True)
+                            if row.cost_ms is not None:
+                                line.label(text=f"{row.cost_ms:.2f} ms")
+                            continue
+
                         # Create a sub-box for each constraint for better organization
                         constraint_box = box.box()
                         # Allow expanding/collapsing constraint details
-                        constraint_box.prop(constraint, "show_expanded", text=constraint.name, icon='CON_TRACKTO')
+                        header = constraint_box.row()
+                        header.prop(constraint, "show_expanded", text=row.name, icon=row.icon)
+                        if row.cost_ms is not None:
+                            header.label(text=f"{row.cost_ms:.2f} ms per frame", icon='TIME')
 
                         if constraint.show_expanded:
-                            # Use layout.prop() with the constraint object and its property name (data path)
-                            # The data paths you provided are attributes of the constraint object itself.
-
                             # Common Constraint Properties
                             constraint_box.prop(constraint, "name", text="Name") # pose.bones[...].constraints[...].name
                             constraint_box.prop(constraint, "target", text="Target") # pose.bones[...].constraints[...].target
-                            # Subtarget Property (Requires prop_search)
-                            # Check if the constraint type *has* a subtarget (like Damped Track, IK, etc.)
-                            if hasattr(constraint, "subtarget"):
-                                if constraint.target:
-                                    constraint_box.prop_search(
-                                            constraint,              # The constraint object
-                                            "subtarget",             # The property name (data path)
-                                            constraint.target.data,  # Search within the target armature's data
-                                            "bones",                 # Search within the 'bones' collection
-                                            text="Bone"              # Label for the UI element
-                                    ) # pose.bones[...].constraints[...].subtarget
-                            constraint_box.prop(constraint, "head_tail", text="Head/Tail") # pose.bones[...].constraints[...].head_tail
-                            # Constraint-Specific Properties (Example: Damped Track)
-                            if constraint.type == 'DAMPED_TRACK':
-                                constraint_box.prop(constraint, "track_axis") # pose.bones[...].constraints[...].track_axis
-                                constraint_box.prop(constraint, "influence", slider=True)
-                            elif constraint.type == 'STRETCH_TO':
-                                constraint_box.prop(constraint, "rest_length")
-                                constraint_box.prop(constraint, "bulge")
-                                constraint_box.prop(constraint, "volume")
-                                constraint_box.prop(constraint, "keep_axis")
-                                constraint_box.prop(constraint, "influence", slider=True)
-                            # --- ADD THIS ELIF BLOCK for IK ---
-                            elif constraint.type == 'IK':
-                                # constraint_box.prop(constraint, "pole_target", text="Pole Target")
-                                # if constraint.pole_target and constraint.pole_target.type == 'ARMATURE':
-                                #     constraint_box.prop_search(
-                                #             constraint,              # The constraint object
-                                #             "pole_subtarget",        # The property name for pole bone
-                                #             constraint.pole_target.data, # Search within the pole target armature's data
-                                #             "bones",                 # Search within the 'bones' collection
-                                #             text="Pole Bone"         # Label for the UI element
-                                #     )
-                                # constraint_box.prop(constraint, "pole_angle", text="Pole Angle") # Often useful with pole target
-                                # constraint_box.separator()
-                                # constraint_box.prop(constraint, "iterations")
-                                constraint_box.prop(constraint, "chain_count", text="Chain Length") # Use chain_count for length
-                                # constraint_box.prop(constraint, "use_tail")
-                                # constraint_box.prop(constraint, "use_stretch")
-                                # constraint_box.separator()
-                                # constraint_box.label(text="Weighting:") # Header for weights
-                                # constraint_box.prop(constraint, "weight", text="Position") # weight controls position
-                                # constraint_box.prop(constraint, "orient_weight", text="Rotation") # orient_weight controls rotation
-                                # constraint_box.separator()
-                                constraint_box.prop(constraint, "influence", slider=True)
-                            # --- END OF ADDED IK BLOCK ---
+                            # Subtarget Property (Requires prop_search on the target armature's bones)
+                            if row.search_bones and constraint.target:
+                                constraint_box.prop_search(
+                                        constraint,              # The constraint object
+                                        "subtarget",             # The property name (data path)
+                                        constraint.target.data,  # Search within the target armature's data
+                                        "bones",                 # Search within the 'bones' collection
+                                        text="Bone"              # Label for the UI element
+                                ) # pose.bones[...].constraints[...].subtarget
+                            if row.show_head_tail:
+                                constraint_box.prop(constraint, "head_tail", text="Head/Tail") # pose.bones[...].constraints[...].head_tail
+                            # Constraint-Specific Properties
+                            for property_name in row.properties:
+                                label = constraint_model.PROPERTY_LABELS.get(property_name)
+                                if label:
+                                    constraint_box.prop(constraint, property_name, text=label)
+                                else:
+                                    constraint_box.prop(constraint, property_name, slider=property_name == "influence")
             elif context.mode != 'POSE':
                 box.label(text="Switch to Pose Mode to see constraints.", icon='INFO')
             elif not pbone:
@@ -196,20 +234,112 @@ class VIEW3D_PT_RigBotPanel(bpy.types.Panel):
 
             col.operator("pose.reset_transforms", text="Reset Transforms", icon='FILE_REFRESH')
 
+            col.separator()
+
+            # Key the evaluated pose (constraints included) over a frame range
+            col.operator("rigbot.bake_pose", text="Bake Pose", icon='ACTION')
+
+            # Pose snapshots of the active armature
+            if obj and obj.type == 'ARMATURE':
+                box.label(text="Pose Snapshots", icon='OUTLINER_OB_IMAGE')
+                row = box.row()
+                row.template_list("POSE_UL_snapshots", "", obj, "rigbot_pose_snapshots", obj, "rigbot_pose_snapshot_index",
+                                  rows=4)
+                side = row.column(align=True)
+                side.operator("pose.snapshot_capture", text="", icon='ADD')
+                side.operator("pose.snapshot_remove", text="", icon='REMOVE')
+                box.operator("pose.snapshot_apply", text="Apply Snapshot", icon='POSE_HLT')
+
+
+class POSE_UL_snapshots(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        if self.layout_type in {'DEFAULT', 'COMPACT'}:
+            row = layout.row(align=True)
+            row.prop(item, "name", text="", emboss=False, icon='ARMATURE_DATA')
+            row.label(text=f"{item.bone_count} bones")
+            apply_op = row.operator("pose.snapshot_apply", text="", icon='PLAY', emboss=False)
+            apply_op.index = index
+        elif self.layout_type in {'GRID'}:
+            layout.alignment = 'CENTER'
+            layout.label(text="", icon='ARMATURE_DATA')
 
 class BONE_UL_list(bpy.types.UIList):
+    filter_collection: bpy.props.StringProperty(
+            name="Bone Collection",
+            description="Only show bones assigned to this bone collection")
+    use_tree_order: bpy.props.BoolProperty(
+            name="Hierarchy",
+            description="Show bones in hierarchy order, indented by depth",
+            default=True)
+
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         if self.layout_type in {'DEFAULT', 'COMPACT'}:
             row = layout.row(align=True)
+            bone_topology = topology.get_topology(data)
+            if self.use_tree_order:
+                depth = bone_topology.depths[index]
+                if depth:
+                    row.separator(factor=depth)
             select_op = row.operator("object.select_bone", text=item.name, emboss=False)
             select_op.bone_name = item.name
-            
-            if item.parent:
-                row.label(text=f"(Parent: {item.parent.name})", icon='BLANK1')
+
+            if not self.use_tree_order:
+                parent_name = bone_topology.parent_name(index)
+                if parent_name:
+                    row.label(text=f"(Parent: {parent_name})", icon='BLANK1')
         elif self.layout_type in {'GRID'}:
             layout.alignment = 'CENTER'
             layout.label(text="", icon='BONE_DATA')
 
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_invert", text="", icon='ARROW_LEFTRIGHT')
+
+        row = layout.row(align=True)
+        obj = context.active_object
+        if obj and obj.type == 'ARMATURE':
+            row.prop_search(self, "filter_collection", obj.data, "collections_all", text="", icon='GROUP_BONE')
+        else:
+            row.prop(self, "filter_collection", text="", icon='GROUP_BONE')
+        row.prop(self, "use_tree_order", text="", icon='OUTLINER')
+        row.prop(self, "use_filter_sort_alpha", text="", icon='SORTALPHA')
+
+    def filter_items(self, context, data, propname):
+        # One cache entry per list: name matches and order are rebuilt when the filter settings or the
+        # bones change, redraws only recompute the collection mask (membership edits notify nothing).
+        # Blender applies use_filter_invert to the returned flags itself.
+        filter_settings = (self.filter_name, self.use_tree_order, self.use_filter_sort_alpha)
+        entry = cache.get(data, ("bone_list_filter", self.list_id), lambda armature_data: {})
+        if entry.get("settings") != filter_settings:
+            entry["settings"] = filter_settings
+            entry["matches"], entry["order"] = self._build_filter(data, *filter_settings)
+
+        visible = entry["matches"]
+        if self.filter_collection:
+            bone_collection = data.collections_all.get(self.filter_collection)
+            members = {bone.name for bone in bone_collection.bones} if bone_collection else set()
+            visible = [shown and name in members for shown, name in zip(visible, data.bones.keys())]
+        flags = [self.bitflag_filter_item if shown else 0 for shown in visible]
+        return flags, entry["order"]
+
+    def _build_filter(self, armature_data, filter_name, tree_order, sort_alpha):
+        bones = armature_data.bones
+        bone_names = bones.keys()
+
+        visible = [True] * len(bone_names)
+        if filter_name:
+            pattern = f"*{filter_name.lower()}*"
+            visible = [fnmatch.fnmatchcase(name.lower(), pattern) for name in bone_names]
+
+        if tree_order:
+            new_order = topology.get_topology(armature_data).position.tolist()
+        elif sort_alpha:
+            new_order = bpy.types.UI_UL_list.sort_items_by_name(bones, "name")
+        else:
+            new_order = []
+        return visible, new_order
+
 def register():
     bpy.types.Scene.rigbot_panel_expanded = bpy.props.BoolProperty(
             name="Expand RigBot Panel", default=True,
@@ -231,20 +361,37 @@ def register():
             name="Expand Posing Panel", default=True,
             description="Toggle display of the Posing panel"
     )
+    bpy.types.Scene.rigbot_constraints_compact = bpy.props.BoolProperty(
+            name="Compact Constraint List", default=False,
+            description="Show one line per constraint with only its mute toggle and influence"
+    )
+    bpy.types.Scene.rigbot_constraint_page = bpy.props.IntProperty(
+            name="Constraint Page", default=0, min=0,
+            description="Page of the active bone's constraint stack shown in the Constraints panel"
+    )
+    bpy.types.Scene.rigbot_constraints_per_page = bpy.props.IntProperty(
+            name="Constraints per Page", default=6, min=1, max=50,
+            description="Number of constraints drawn per page in the Constraints panel"
+    )
     
     bpy.utils.register_class(VIEW3D_PT_RigBotPanel)
     bpy.utils.register_class(BONE_UL_list)
+    bpy.utils.register_class(POSE_UL_snapshots)
 
 def unregister():
     bpy.utils.unregister_class(VIEW3D_PT_RigBotPanel)
     bpy.utils.unregister_class(BONE_UL_list)
+    bpy.utils.unregister_class(POSE_UL_snapshots)
 
     properties_to_delete = [
         "rigbot_panel_expanded",
         "rigbot_bone_index",
         "rigbot_constraints_panel_expanded",
         "rigbot_skinning_panel_expanded",
-        "rigbot_posing_panel_expanded"
+        "rigbot_posing_panel_expanded",
+        "rigbot_constraints_compact",
+        "rigbot_constraint_page",
+        "rigbot_constraints_per_page",
     ]
 
     for property_name in properties_to_delete:
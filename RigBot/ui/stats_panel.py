@@ -0,0 +1,55 @@
+import bpy
+
+from ..core import instrumentation
+
+class VIEW3D_PT_RigBotStatsPanel(bpy.types.Panel):
+    bl_label = "RigBot Stats"
+    bl_idname = "VIEW3D_PT_RigBotStatsPanel"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "RigBot"
+    bl_parent_id = "VIEW3D_PT_RigBotPanel"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        operator_stats = instrumentation.operator_stats()
+
+        if not operator_stats:
+            layout.label(text="No RigBot operators run yet.", icon='INFO')
+        else:
+            col = layout.column(align=True)
+            header = col.row()
+            header.label(text="Operator")
+            header.label(text="Calls")
+            header.label(text="Mean / p95 ms")
+            for idname, stats in sorted(operator_stats.items()):
+                summary = stats.summary()
+                row = col.row()
+                row.label(text=idname.split(".")[-1])
+                row.label(text=str(summary["calls"]))
+                row.label(text=f"{summary['mean_ms']:.1f} / {summary['p95_ms']:.1f}")
+
+        startup_report = instrumentation.startup_report()
+        if startup_report:
+            box = layout.box()
+            box.label(text="Startup", icon='TIME')
+            col = box.column(align=True)
+            for name, step in startup_report:
+                row = col.row()
+                # Last two name parts: "core.bake" and "operators.bake" stay apart
+                row.label(text=".".join(name.split(".")[-2:]),
+                          icon='SORTTIME' if step.phase == "first use" else 'BLANK1')
+                row.label(text=f"{step.self_ms:.1f} ms")
+            enable_ms = sum(step.self_ms for _name, step in startup_report if step.phase == "enable")
+            box.label(text=f"Enable: {enable_ms:.1f} ms (lazy modules load on first use)")
+
+        row = layout.row(align=True)
+        row.operator("rigbot.stats_export", text="Export JSON", icon='EXPORT')
+        row.operator("rigbot.stats_reset", text="Reset", icon='X')
+
+def register():
+    bpy.utils.register_class(VIEW3D_PT_RigBotStatsPanel)
+
+def unregister():
+    bpy.utils.unregister_class(VIEW3D_PT_RigBotStatsPanel)
@@ -0,0 +1,106 @@
+"""Timing comparison of "Parent by Name" against the previous per-object operator loop.
+
+Run headless from the repository root:
+
+    blender -b --factory-startup --python benchmarks/bench_parent_by_name.py -- --counts 100 1000 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import RigBot # noqa: E402
+
+
+def build_scene(count):
+    """Creates an armature with `count` bones and one rigid part object named after each bone."""
+    armature_data = bpy.data.armatures.new("BenchRig")
+    armature_obj = bpy.data.objects.new("BenchRig", armature_data)
+    scene = bpy.context.scene
+    scene.collection.objects.link(armature_obj)
+    bpy.context.view_layer.objects.active = armature_obj
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    for i in range(count):
+        edit_bone = armature_data.edit_bones.new(f"Part.{i:05d}")
+        edit_bone.head = (i % 100 * 0.1, i // 100 * 0.1, 0.0)
+        edit_bone.tail = (i % 100 * 0.1, i // 100 * 0.1, 0.1)
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    mesh = bpy.data.meshes.new("BenchPart")
+    mesh.from_pydata([(0, 0, 0), (0.05, 0, 0), (0, 0.05, 0)], [], [(0, 1, 2)])
+    parts = []
+    for i in range(count):
+        part = bpy.data.objects.new(f"Part.{i:05d}", mesh)
+        scene.collection.objects.link(part)
+        parts.append(part)
+
+    for part in parts:
+        part.select_set(True)
+    armature_obj.select_set(True)
+    bpy.context.view_layer.objects.active = armature_obj
+    return armature_obj, parts, mesh
+
+def clear_scene(armature_obj, parts, mesh):
+    armature_data = armature_obj.data
+    bpy.data.batch_remove([armature_obj, *parts])
+    bpy.data.batch_remove([armature_data, mesh])
+
+def legacy_parent_by_name(context, armature_obj):
+    """The previous implementation: one selection change, two mode switches and one parent_set per object."""
+    armature_data = armature_obj.data
+    bones_dict = {bone.name: bone for bone in armature_data.bones}
+    children = [obj for obj in context.selected_objects if obj != armature_obj]
+    for child_obj in children:
+        if child_obj.name not in bones_dict:
+            continue
+        bpy.ops.object.select_all(action='DESELECT')
+        child_obj.select_set(True)
+        armature_obj.select_set(True)
+        context.view_layer.objects.active = armature_obj
+        armature_data.bones.active = bones_dict[child_obj.name]
+        bpy.ops.object.mode_set(mode='POSE')
+        bpy.ops.object.parent_set(type='BONE')
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+def time_call(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--legacy-max", type=int, default=5000,
+                        help="Skip the legacy loop above this object count (it is very slow)")
+    args = parser.parse_args(argv)
+
+    RigBot.register()
+    try:
+        print(f"{'objects':>8} {'legacy (s)':>12} {'batch (s)':>12} {'speedup':>9}")
+        for count in args.counts:
+            legacy_time = None
+            if count <= args.legacy_max:
+                scene_data = build_scene(count)
+                legacy_time = time_call(lambda: legacy_parent_by_name(bpy.context, scene_data[0]))
+                clear_scene(*scene_data)
+
+            scene_data = build_scene(count)
+            batch_time = time_call(lambda: bpy.ops.object.parent_by_name())
+            parented = sum(1 for part in scene_data[1] if part.parent == scene_data[0])
+            clear_scene(*scene_data)
+            if parented != count:
+                print(f"Warning: only {parented}/{count} objects were parented by the batch operator")
+
+            legacy_text = f"{legacy_time:12.3f}" if legacy_time is not None else f"{'skipped':>12}"
+            speedup_text = f"{legacy_time / batch_time:8.1f}x" if legacy_time is not None else f"{'-':>9}"
+            print(f"{count:>8} {legacy_text} {batch_time:12.3f} {speedup_text}")
+    finally:
+        RigBot.unregister()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""RigBot benchmark suite on synthetic rigs, with JSON baselines and regression checks.
+
+Runs headless under Blender or with the `bpy` pip module, from the repository root:
+
+    blender -b --factory-startup --python benchmarks/run_benchmarks.py -- --sizes 100 1000 10000 --output results.json
+    blender -b --factory-startup --python benchmarks/run_benchmarks.py -- --compare baseline.json --threshold 0.25
+    python benchmarks/run_benchmarks.py --sizes 100 1000 --output baseline.json
+
+With --compare, the run exits with code 1 when a case is slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+import bpy
+from mathutils import Vector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import RigBot # noqa: E402
+from RigBot.core import cache # noqa: E402
+from RigBot.ui import rigbot_panel # noqa: E402
+
+CHAIN_LENGTH = 8 # Bones per chain before the synthetic rig branches
+BATCH_CALLS = 50 # Operator calls per sample for single-bone operators
+
+
+class SyntheticRig:
+    """An armature with chains and branches, plus one rigid part object per bone named after it"""
+
+    def __init__(self, bone_count, with_parts=True):
+        scene = bpy.context.scene
+        self.armature_data = bpy.data.armatures.new(f"SynthRig{bone_count}")
+        self.armature_obj = bpy.data.objects.new(self.armature_data.name, self.armature_data)
+        scene.collection.objects.link(self.armature_obj)
+        self.activate()
+
+        bpy.ops.object.mode_set(mode='EDIT')
+        edit_bones = self.armature_data.edit_bones
+        created = []
+        directions = (Vector((0, 0, 0.2)), Vector((0.2, 0, 0.05)), Vector((-0.2, 0, 0.05)), Vector((0, 0.2, 0.05)))
+        for i in range(bone_count):
+            edit_bone = edit_bones.new(f"Bone.{i:05d}")
+            if i == 0:
+                parent = None
+                edit_bone.head = (0.0, 0.0, 0.0)
+            elif i % CHAIN_LENGTH == 0:
+                parent = created[i // 2] # Branch off an earlier bone
+                edit_bone.head = parent.tail
+            else:
+                parent = created[i - 1] # Continue the chain
+                edit_bone.head = parent.tail
+            edit_bone.tail = edit_bone.head + directions[(i // CHAIN_LENGTH) % len(directions)]
+            if parent is not None:
+                edit_bone.parent = parent
+                edit_bone.use_connect = i % CHAIN_LENGTH != 0
+            created.append(edit_bone)
+        bpy.ops.object.mode_set(mode='OBJECT')
+        self.bone_names = self.armature_data.bones.keys()
+
+        self.parts = []
+        self.part_mesh = None
+        if with_parts:
+            self.part_mesh = bpy.data.meshes.new("SynthPart")
+            self.part_mesh.from_pydata([(0, 0, 0), (0.05, 0, 0), (0, 0.05, 0)], [], [(0, 1, 2)])
+            for name in self.bone_names:
+                part = bpy.data.objects.new(name, self.part_mesh)
+                scene.collection.objects.link(part)
+                self.parts.append(part)
+
+    def activate(self):
+        bpy.context.view_layer.objects.active = self.armature_obj
+        self.armature_obj.select_set(True)
+
+    def set_mode(self, mode):
+        self.activate()
+        if self.armature_obj.mode != mode:
+            bpy.ops.object.mode_set(mode=mode)
+
+    def remove(self):
+        self.set_mode('OBJECT')
+        bpy.data.batch_remove([self.armature_obj, *self.parts])
+        bpy.data.batch_remove([id_block for id_block in (self.armature_data, self.part_mesh) if id_block])
+
+# --- Cases ---
+# Each case takes a SyntheticRig, does its setup and returns the callable that is timed.
+
+def case_parent_by_name(rig):
+    rig.set_mode('OBJECT')
+    for part in rig.parts:
+        part.parent = None
+        part.select_set(True)
+    rig.activate()
+    return lambda: bpy.ops.object.parent_by_name()
+
+def case_select_bone(rig):
+    rig.set_mode('POSE')
+    names = rig.bone_names[::max(1, len(rig.bone_names) // BATCH_CALLS)][:BATCH_CALLS]
+    def run():
+        for name in names:
+            bpy.ops.object.select_bone(bone_name=name)
+    return run
+
+def case_rename_bone(rig):
+    rig.set_mode('OBJECT')
+    bones = rig.armature_data.bones
+    names = rig.bone_names[:BATCH_CALLS]
+    for name in names: # Undo the previous sample's renames
+        if f"{name}_renamed" in bones:
+            bones[f"{name}_renamed"].name = name
+    def run():
+        for name in names:
+            bones.active = bones[name]
+            bpy.ops.object.rename_bone(new_name=f"{name}_renamed")
+    return run
+
+def _pose_case(operator):
+    def case(rig):
+        rig.set_mode('POSE')
+        for pose_bone in rig.armature_obj.pose.bones:
+            pose_bone.location = (0.1, 0.2, 0.3)
+            pose_bone.bone.select = True
+        return operator
+    return case
+
+def _constraint_case(operator_name):
+    def case(rig):
+        rig.set_mode('POSE')
+        pose_bones = rig.armature_obj.pose.bones
+        names = rig.bone_names[:BATCH_CALLS]
+        for name in names:
+            pose_bones[name].constraints.clear()
+        operator = getattr(bpy.ops.rigbot, operator_name)
+        def run():
+            for name in names:
+                rig.armature_data.bones.active = rig.armature_data.bones[name]
+                operator()
+        return run
+    return case
+
+def case_batch_add_constraint(rig):
+    rig.set_mode('POSE')
+    for pose_bone in rig.armature_obj.pose.bones:
+        pose_bone.constraints.clear()
+        pose_bone.bone.select = True
+    return lambda: bpy.ops.rigbot.pose_batch_add_constraint(constraint_type='STRETCH_TO', subtarget_rule='CHILD')
+
+class _RecordingLayout:
+    """Stands in for UILayout in background mode, every layout call returns another recorder"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        def record(*_args, **_kwargs):
+            self.calls += 1
+            return self
+        return record
+
+def case_panel_draw(rig):
+    rig.set_mode('POSE')
+    pose_bone = rig.armature_obj.pose.bones[0]
+    pose_bone.constraints.clear()
+    for _ in range(5):
+        pose_bone.constraints.new('DAMPED_TRACK').target = rig.armature_obj
+    context = SimpleNamespace(scene=bpy.context.scene, active_object=rig.armature_obj, object=rig.armature_obj,
+                              mode='POSE', active_pose_bone=pose_bone)
+    panel = SimpleNamespace(layout=_RecordingLayout())
+    return lambda: rigbot_panel.VIEW3D_PT_RigBotPanel.draw(panel, context)
+
+def case_bone_list_filter(rig):
+    ui_list = SimpleNamespace(list_id="", filter_name="", filter_collection="", use_filter_invert=False,
+                              use_tree_order=True, use_filter_sort_alpha=False, bitflag_filter_item=1 << 30)
+    ui_list._build_filter = lambda *args: rigbot_panel.BONE_UL_list._build_filter(ui_list, *args)
+    def run():
+        cache.invalidate(rig.armature_data) # Cold: the first redraw after a change
+        rigbot_panel.BONE_UL_list.filter_items(ui_list, bpy.context, rig.armature_data, "bones")
+    return run
+
+CASES = {
+    "parent_by_name": case_parent_by_name,
+    "select_bone": case_select_bone,
+    "rename_bone": case_rename_bone,
+    "reset_location": _pose_case(lambda: bpy.ops.pose.reset_location()),
+    "reset_rotation": _pose_case(lambda: bpy.ops.pose.reset_rotation()),
+    "reset_scale": _pose_case(lambda: bpy.ops.pose.reset_scale()),
+    "reset_transforms": _pose_case(lambda: bpy.ops.pose.reset_transforms()),
+    "add_damped_track": _constraint_case("pose_add_damped_track_self"),
+    "add_stretch_to": _constraint_case("pose_add_stretch_to"),
+    "add_ik": _constraint_case("pose_add_ik"),
+    "batch_add_constraint": case_batch_add_constraint,
+    "panel_draw": case_panel_draw,
+    "bone_list_filter": case_bone_list_filter,
+}
+
+def run_suite(sizes, case_names, repeat):
+    results = {}
+    for size in sizes:
+        rig = SyntheticRig(size)
+        try:
+            for case_name in case_names:
+                key = f"{case_name}@{size}"
+                samples = []
+                try:
+                    for _ in range(repeat):
+                        timed = CASES[case_name](rig)
+                        start = time.perf_counter()
+                        timed()
+                        samples.append(time.perf_counter() - start)
+                except RuntimeError as e:
+                    # Operators polling for screen context members that don't exist in background mode are
+                    # skipped, any other error is a bug and stops the run
+                    if "poll() failed" not in str(e):
+                        raise
+                    results[key] = {"error": str(e)}
+                    print(f"{key:<32} error: {e}")
+                    continue
+                results[key] = {"median_s": statistics.median(samples), "min_s": min(samples), "samples": len(samples)}
+                print(f"{key:<32} median {results[key]['median_s'] * 1000:10.2f} ms   min {results[key]['min_s'] * 1000:10.2f} ms")
+        finally:
+            rig.remove()
+    return results
+
+def compare(results, baseline, threshold):
+    """Prints the comparison against a baseline, returns the keys of cases that regressed.
+
+    A case with timings in the baseline that now fails counts as a regression.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        reference = baseline.get(key)
+        if reference is None or "error" in reference:
+            continue
+        if "error" in result:
+            print(f"{key:<32} ERROR (baseline {reference['median_s'] * 1000:.2f} ms): {result['error']} REGRESSION")
+            regressions.append(key)
+            continue
+        ratio = result["median_s"] / reference["median_s"] if reference["median_s"] else 1.0
+        flag = "REGRESSION" if ratio > 1.0 + threshold else ""
+        print(f"{key:<32} {ratio:6.2f}x baseline {flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Bone counts")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES), help="Cases to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Samples per case, the median is reported")
+    parser.add_argument("--output", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    RigBot.register()
+    try:
+        results = run_suite(args.sizes, args.cases, args.repeat)
+    finally:
+        RigBot.unregister()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({
+                "meta": {"blender": bpy.app.version_string, "platform": platform.platform(),
+                         "date": time.strftime("%Y-%m-%d %H:%M:%S")},
+                "results": results,
+            }, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Name matching rules of Parent by Name. Needs Blender's `bpy` (the bpy pip module or `blender -b`):
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("bpy")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from RigBot.core import name_match # noqa: E402
+
+RIGIFY_BONES = [f"DEF-spine.{i:03d}" for i in range(1, 7)] + [
+    "DEF-spine",
+    "DEF-upper_arm.L",
+    "DEF-upper_arm.L.001",
+    "DEF-upper_arm.R",
+    "DEF-upper_arm.R.001",
+]
+RULES = name_match.NameMatchRules(strip_prefixes=("MESH_", "DEF-"))
+
+
+@pytest.fixture
+def index():
+    return name_match.BoneNameIndex(RIGIFY_BONES, RULES)
+
+@pytest.mark.parametrize("object_name, bone_name", [
+    ("MESH_spine.003", "DEF-spine.003"),
+    ("MESH_spine", "DEF-spine"),
+    ("DEF-spine.003.001", "DEF-spine.003"),
+    ("MESH_spine.006.002", "DEF-spine.006"),
+    ("MESH_upper_arm.L.001", "DEF-upper_arm.L.001"),
+    ("MESH_upper_arm_L", "DEF-upper_arm.L"),
+    ("MESH_upper_arm.R.001.004", "DEF-upper_arm.R.001"),
+])
+def test_numbered_chains_match_their_own_bone(index, object_name, bone_name):
+    assert index.match(object_name) == bone_name
+
+def test_numbered_bones_keep_distinct_keys(index):
+    assert not index.ambiguous
+
+def test_duplicate_suffix_kept_without_rule():
+    index = name_match.BoneNameIndex(RIGIFY_BONES, RULES._replace(strip_duplicate_suffix=False))
+    assert index.match("MESH_spine.003.001") is None
+    assert index.match("MESH_spine.003") == "DEF-spine.003"